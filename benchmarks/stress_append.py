@@ -0,0 +1,124 @@
+# --------------------------------------------------------
+# Stress test: concurrent submissions to one response file
+# --------------------------------------------------------
+"""Fire many concurrent submissions at one CSV and verify it afterwards.
+
+Workers are spread over several processes (like Streamlit replicas on one
+volume), each running several threads (like browser sessions). Every row
+carries awkward text – commas, quotes, newlines, emoji – so any interleaved
+or torn write shows up as a parse error, a wrong field count or a missing
+(worker, seq) pair.
+
+    python benchmarks/stress_append.py --processes 4 --threads 8 --rows 250
+"""
+
+import argparse
+import csv
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bridgeai.sink import DURABILITY_MODES, SubmissionSink  # noqa: E402
+from bridgeai.storage import CSVBackend  # noqa: E402
+
+HEADER = ["timestamp", "worker", "seq", "city", "comments", "score"]
+PAYLOAD = 'Toronto, "GTA"; ok\nline two 🍁 ' * 4
+
+
+def _worker(path, process_id, threads, rows, durability):
+    backend = CSVBackend(path, "stress", HEADER)
+    sink = SubmissionSink(backend, durability=durability, batch_size=16, interval_ms=5)
+
+    def run(thread_id):
+        worker = f"{process_id}-{thread_id}"
+        for seq in range(rows):
+            sink.submit(dict(zip(HEADER, [time.time(), worker, seq, "Ontario - Toronto",
+                                          PAYLOAD, seq % 10])))
+
+    pool = [threading.Thread(target=run, args=(t,)) for t in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    sink.close()
+
+
+def verify(path, expected_workers, rows):
+    """Return a list of problems found in ``path`` (empty means clean)."""
+    problems = []
+    seen = set()
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header != HEADER:
+            problems.append(f"bad header: {header!r}")
+        for line_no, row in enumerate(reader, start=2):
+            if row == HEADER:
+                problems.append(f"duplicate header at record {line_no}")
+                continue
+            if len(row) != len(HEADER) or row[4] != PAYLOAD:
+                problems.append(f"torn or interleaved record {line_no}: {row[:3]!r}")
+                continue
+            key = (row[1], int(row[2]))
+            if key in seen:
+                problems.append(f"duplicate row {key}")
+            seen.add(key)
+    expected = {(w, s) for w in expected_workers for s in range(rows)}
+    missing = expected - seen
+    if missing:
+        problems.append(f"{len(missing)} row(s) missing, e.g. {sorted(missing)[:3]}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=250, help="rows per thread")
+    parser.add_argument("--durability", choices=DURABILITY_MODES, default="group")
+    parser.add_argument("--path", help="target CSV (default: a temporary file)")
+    args = parser.parse_args(argv)
+
+    tmpdir = None
+    path = args.path
+    if path is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmpdir.name, "stress.csv")
+
+    started = time.perf_counter()
+    procs = [
+        multiprocessing.Process(
+            target=_worker, args=(path, p, args.threads, args.rows, args.durability)
+        )
+        for p in range(args.processes)
+    ]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - started
+
+    total = args.processes * args.threads * args.rows
+    workers = [f"{p}-{t}" for p in range(args.processes) for t in range(args.threads)]
+    problems = verify(path, workers, args.rows)
+
+    print(f"{total} submissions in {elapsed:.2f}s ({total / elapsed:,.0f} rows/s), "
+          f"durability={args.durability}")
+    if problems:
+        print(f"FAILED: {len(problems)} problem(s)")
+        for problem in problems[:20]:
+            print("  " + problem)
+    else:
+        print(f"OK: {path} parses cleanly")
+    if tmpdir is not None:
+        tmpdir.cleanup()
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+# --------------------------------------------------------
+# End-to-end submission benchmark
+# --------------------------------------------------------
+"""Measure submit latency and throughput for the survey apps.
+
+Each configuration (survey × backend × durability × prefill size ×
+concurrency) runs in a fresh child process so peak RSS is per run:
+
+1. the response store is pre-filled with ``prefill`` synthetic rows;
+2. ``concurrency`` threads submit schema-valid random answers until
+   ``submissions`` rows have been sent;
+3. the sink is drained and the p50/p95/p99 submit latency, rows/sec
+   (including the final drain) and peak RSS are recorded.
+
+``--mode direct`` drives the submit path (``build_record`` + sink) the
+way the form handler does, with one thread per concurrent respondent.
+``--mode apptest`` runs the real script through Streamlit's headless
+``AppTest`` for every submission, so latency includes the full script rerun
+and widget tree rebuild. ``AppTest`` shares one global runtime per process,
+so there each concurrent respondent is a separate process writing to the
+same store, like replicas sharing a volume.
+
+Results are printed (or written with ``--out``) as JSON for tracking::
+
+    python benchmarks/submit_bench.py --survey both --prefill 0 100000 \\
+        --concurrency 1 8 32 --submissions 2000 --out bench.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Only modules that do not read BRIDGEAI_* settings at import time may be
+# imported here; the rest are imported in the child after the env is set.
+from bridgeai.synth import random_answers, random_record  # noqa: E402
+
+SCRIPTS = {"customer": "bridgeai_chat.py", "business": "bridgeai_business_chat.py"}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _prefill(survey, backend, rows, rng):
+    batch = []
+    for _ in range(rows):
+        batch.append(random_record(survey, rng))
+        if len(batch) == 5000:
+            backend.append(batch)
+            batch = []
+    if batch:
+        backend.append(batch)
+
+
+def _submit_direct(survey, sink, rng):
+    sink.submit(survey.build_record(random_answers(survey, rng), datetime.now().isoformat()))
+
+
+def _submit_apptest(survey, rng):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, SCRIPTS[survey.name]), default_timeout=60).run()
+    answers = random_answers(survey, rng)
+    for question in survey.questions:
+        if question.key not in answers or question.show_if is not None:
+            continue  # follow-ups only appear after a rerun inside st.form
+        widget = getattr(at, _WIDGETS[question.kind])(key=question.key)
+        widget.set_value(answers[question.key])
+    at.button[-1].click().run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+
+_WIDGETS = {
+    "radio": "radio",
+    "select": "selectbox",
+    "multiselect": "multiselect",
+    "slider": "slider",
+    "text": "text_input",
+    "textarea": "text_area",
+}
+
+
+def _apptest_worker(config, workdir, count, seed, results):
+    """Submit ``count`` forms through AppTest; one process per respondent."""
+    os.chdir(workdir)
+    from bridgeai.schema import load_survey
+    from bridgeai.sink import drain_all
+
+    survey = load_survey(config["survey"])
+    rng = random.Random(seed)
+    latencies, errors = [], []
+    for _ in range(count):
+        started = time.perf_counter()
+        try:
+            _submit_apptest(survey, rng)
+        except Exception as exc:
+            errors.append(repr(exc))
+            continue
+        latencies.append(time.perf_counter() - started)
+    drain_all()
+    results.put((latencies, errors, peak_rss_mb()))
+
+
+def _run_apptest(config, workdir):
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    share, extra = divmod(config["submissions"], config["concurrency"])
+    procs = [
+        ctx.Process(target=_apptest_worker,
+                    args=(config, workdir, share + (i < extra), config["seed"] + i, results))
+        for i in range(config["concurrency"])
+    ]
+    for p in procs:
+        p.start()
+    latencies, errors, rss = [], [], []
+    for _ in procs:
+        worker_latencies, worker_errors, worker_rss = results.get()
+        latencies += worker_latencies
+        errors += worker_errors
+        rss.append(worker_rss or 0)
+    for p in procs:
+        p.join()
+    return latencies, errors, max(rss)
+
+
+def run_config(config):
+    """Run one benchmark configuration. Executed in a child process."""
+    workdir = tempfile.mkdtemp(prefix="bridgeai-bench-")
+    os.environ["BRIDGEAI_DATA_DIR"] = os.path.join(workdir, "data")
+    os.environ["BRIDGEAI_STORAGE"] = config["backend"]
+    os.environ["BRIDGEAI_SQLITE_PATH"] = os.path.join(workdir, "data", "responses.db")
+    os.environ["BRIDGEAI_DURABILITY"] = config["durability"]
+    os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+    os.chdir(workdir)
+
+    from bridgeai.schema import load_survey
+    from bridgeai.sink import drain_all, get_sink
+    from bridgeai.storage import open_backend
+
+    survey = load_survey(config["survey"])
+    rng = random.Random(config["seed"])
+    os.makedirs(os.environ["BRIDGEAI_DATA_DIR"], exist_ok=True)
+
+    prefill_backend = open_backend(survey.name, survey.csv_path, survey.stored_columns,
+                                   survey.multi_columns, survey.indexed)
+    _prefill(survey, prefill_backend, config["prefill"], rng)
+    prefill_backend.close()
+
+    if config["mode"] == "apptest":
+        started = time.perf_counter()
+        latencies, errors, rss = _run_apptest(config, workdir)
+        elapsed = time.perf_counter() - started
+        return _report(config, survey, workdir, latencies, errors, elapsed, rss)
+
+    sink = get_sink(survey)
+    latencies = []
+    errors = []
+    counter = iter(range(config["submissions"]))
+    counter_lock = threading.Lock()
+
+    def worker(seed):
+        local_rng = random.Random(seed)
+        while True:
+            with counter_lock:
+                if next(counter, None) is None:
+                    return
+            started = time.perf_counter()
+            try:
+                _submit_direct(survey, sink, local_rng)
+            except Exception as exc:
+                errors.append(repr(exc))
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=worker, args=(config["seed"] + i,))
+               for i in range(config["concurrency"])]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    drain_all()
+    elapsed = time.perf_counter() - started
+    return _report(config, survey, workdir, latencies, errors, elapsed, peak_rss_mb())
+
+
+def _report(config, survey, workdir, latencies, errors, elapsed, rss):
+    latencies.sort()
+    size = os.path.getsize(survey.csv_path) if config["backend"] == "csv" else \
+        os.path.getsize(os.environ["BRIDGEAI_SQLITE_PATH"])
+    os.chdir(ROOT)
+    shutil.rmtree(workdir, ignore_errors=True)
+    ms = 1000.0
+    return dict(
+        config,
+        ok=len(latencies),
+        errors=len(errors),
+        first_error=errors[0] if errors else None,
+        elapsed_s=round(elapsed, 4),
+        rows_per_s=round(len(latencies) / elapsed, 1) if elapsed else None,
+        p50_ms=round(percentile(latencies, 50) * ms, 3) if latencies else None,
+        p95_ms=round(percentile(latencies, 95) * ms, 3) if latencies else None,
+        p99_ms=round(percentile(latencies, 99) * ms, 3) if latencies else None,
+        max_ms=round(latencies[-1] * ms, 3) if latencies else None,
+        store_bytes=size,
+        peak_rss_mb=rss,
+    )
+
+
+def _child(config, queue):
+    queue.put(run_config(config))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--survey", choices=["customer", "business", "both"], default="both")
+    parser.add_argument("--mode", choices=["direct", "apptest"], default="direct")
+    parser.add_argument("--backend", nargs="+", default=["csv"], choices=["csv", "sqlite"])
+    parser.add_argument("--durability", nargs="+", default=["group"],
+                        choices=["row", "group", "fsync"])
+    parser.add_argument("--prefill", nargs="+", type=int, default=[0, 10000])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8])
+    parser.add_argument("--submissions", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    surveys = ["customer", "business"] if args.survey == "both" else [args.survey]
+    configs = [
+        dict(survey=s, mode=args.mode, backend=b, durability=d, prefill=p,
+             concurrency=c, submissions=args.submissions, seed=args.seed)
+        for s in surveys for b in args.backend for d in args.durability
+        for p in args.prefill for c in args.concurrency
+    ]
+
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    for config in configs:
+        queue = ctx.Queue()
+        child = ctx.Process(target=_child, args=(config, queue))
+        child.start()
+        result = queue.get()
+        child.join()
+        results.append(result)
+        print(f"{result['survey']:8} {result['backend']:6} {result['durability']:5} "
+              f"prefill={result['prefill']:<7} c={result['concurrency']:<3} "
+              f"p50={result['p50_ms']}ms p99={result['p99_ms']}ms "
+              f"{result['rows_per_s']} rows/s rss={result['peak_rss_mb']}MB",
+              file=sys.stderr)
+
+    report = {
+        "benchmark": "submit",
+        "created": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 1 if any(r["errors"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Shared runtime for the BridgeAI / YourFirstYear survey apps."""
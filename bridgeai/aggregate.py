@@ -0,0 +1,138 @@
+# --------------------------------------------------------
+# Incremental aggregation over the response files
+# --------------------------------------------------------
+"""Running per-question tallies that only parse newly appended rows.
+
+An :class:`IncrementalAggregator` remembers the byte offset it has read up
+to. Each :meth:`~IncrementalAggregator.refresh` parses only the records
+appended since, so refresh cost scales with new submissions rather than
+total responses. If the file shrinks or its header changes (rotation,
+migration) the aggregator starts over. Rows written by earlier schema
+versions are mapped onto the current columns as they are read. With
+segmented storage it follows the segment manifest instead (see
+``bridgeai.segments.SegmentCursor``).
+"""
+
+import os
+import threading
+from collections import Counter
+
+from bridgeai.reader import is_header, iter_survey_rows, read_header
+from bridgeai.schema import CATEGORY, INTEGER, MULTI
+from bridgeai.segments import SegmentCursor, response_source
+from bridgeai.storage import DEFAULT_STORAGE, MULTI_SEPARATOR
+
+
+def split_multi(value):
+    return [v for v in value.split(MULTI_SEPARATOR) if v]
+
+
+class IncrementalAggregator:
+    """Per-column value counts and pairwise crosstabs for one survey file.
+
+    ``crosstabs`` is a list of ``(row_column, col_column)`` pairs to tally
+    jointly; multi-select columns are exploded so each selected option
+    counts once.
+    """
+
+    def __init__(self, survey, path=None, crosstabs=()):
+        self.survey = survey
+        self.path = path or response_source(survey)
+        # Segmented storage: sealed segments are read once, then skipped.
+        segmented = os.path.isdir(self.path) or (path is None and DEFAULT_STORAGE == "segments")
+        self.cursor = SegmentCursor(self.path) if segmented else None
+        self.crosstab_pairs = tuple(crosstabs)
+        self.columns = [c for c in survey.columns if survey.types[c] in (CATEGORY, MULTI, INTEGER)]
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        if self.cursor is not None:
+            self.cursor.reset()
+        self.offset = 0
+        self.header = None
+        self.rows = 0
+        self.last_new_rows = 0
+        self.counts = {column: Counter() for column in self.columns}
+        self.crosstabs = {pair: Counter() for pair in self.crosstab_pairs}
+
+    def _values(self, column, record):
+        value = record.get(column, "")
+        if self.survey.types.get(column) == MULTI:
+            return split_multi(value)
+        return [value] if value != "" else []
+
+    def add(self, record):
+        """Fold one record (as read from the CSV) into the running totals."""
+        self.rows += 1
+        for column in self.columns:
+            if column in record:
+                self.counts[column].update(self._values(column, record))
+        for pair in self.crosstab_pairs:
+            left = self._values(pair[0], record)
+            right = self._values(pair[1], record)
+            self.crosstabs[pair].update((a, b) for a in left for b in right)
+
+    def refresh(self):
+        """Parse rows appended since the last call. Returns how many were new."""
+        with self._lock:
+            if self.cursor is not None:
+                return self._refresh_segments()
+            header, start = read_header(self.path)
+            if header is None:
+                self.reset()
+                return 0
+            if not is_header(header):
+                start = 0
+            if header != self.header or os.path.getsize(self.path) < self.offset:
+                self.reset()
+                self.header = header
+                self.offset = start
+            new_rows = 0
+            columns = self.survey.columns
+            for values, end in iter_survey_rows(self.survey, self.path, offset=self.offset):
+                self.add(dict(zip(columns, values)))
+                self.offset = end
+                new_rows += 1
+            self.last_new_rows = new_rows
+            return new_rows
+
+    def _refresh_segments(self):
+        columns = self.survey.columns
+        new_rows = 0
+        for values in self.cursor.read_new(self.survey):
+            self.add(dict(zip(columns, values)))
+            new_rows += 1
+        self.last_new_rows = new_rows
+        return new_rows
+
+    # ---------- views ----------
+    def distribution(self, column):
+        """Counts for ``column`` in option order (unknown values last)."""
+        counts = self.counts[column]
+        if self.survey.types[column] == INTEGER:
+            question = self.survey.question_for(column)
+            order = [str(v) for v in range(question.min_value, question.max_value + 1)]
+        else:
+            order = list(self.survey.question_for(column).options)
+        order += sorted(v for v in counts if v not in order)
+        return {value: counts.get(value, 0) for value in order}
+
+    def crosstab(self, row_column, col_column):
+        """Nested ``{row_value: {col_value: count}}`` for a configured pair."""
+        table = {}
+        for (a, b), n in self.crosstabs[(row_column, col_column)].items():
+            table.setdefault(a, {})[b] = n
+        return table
+
+    def mean_by(self, group_column, value_column):
+        """Mean of an integer column per value of ``group_column``."""
+        totals = {}
+        for (group, value), n in self.crosstabs[(group_column, value_column)].items():
+            try:
+                number = int(value)
+            except ValueError:
+                continue
+            total, count = totals.get(group, (0, 0))
+            totals[group] = (total + number * n, count + n)
+        return {group: total / count for group, (total, count) in totals.items() if count}
@@ -0,0 +1,397 @@
+# --------------------------------------------------------
+# Vectorized crosstab / segment analytics
+# --------------------------------------------------------
+"""Load a survey's responses into coded NumPy arrays and slice them fast.
+
+:func:`load_frame` reads the response file and encodes every option
+question:
+
+* single-choice answers and sliders become integer codes into their option
+  list (``-1`` = no answer);
+* multi-selects become a boolean ``rows × options`` matrix.
+
+The resulting :class:`SurveyFrame` is cached per file version (size and
+mtime), so reruns of an interactive dashboard reuse it until new responses
+arrive. Then only the appended rows are parsed and encoded, from the byte
+offset the last load stopped at, as ``bridgeai.aggregate`` does. Options
+first seen in new rows are added after the known ones. Results of
+:meth:`~SurveyFrame.crosstab`, :meth:`~SurveyFrame.share` and
+:meth:`~SurveyFrame.bootstrap_ci` are memoized on the frame. A new file
+version therefore invalidates them all at once.
+
+Any two option questions can be crossed, including multi-selects. Each
+selected option counts once. Every function takes optional ``weights``,
+the name of a weight vector attached with :meth:`SurveyFrame.add_weights`
+(``bridgeai.weighting.rake_frame`` attaches raking weights), and
+``where``, a ``{column: value or values}`` filter selecting a segment.
+Requires ``numpy`` and ``pandas``::
+
+    frame = load_frame(load_survey("business"))
+    frame.crosstab("payment_model", "q14_lead", normalize="index")
+    frame.bootstrap_ci("cac_cost", "$0-50", by="industry")
+"""
+
+import os
+import threading
+
+from bridgeai.reader import is_header, iter_survey_rows, read_header
+from bridgeai.schema import CATEGORY, INTEGER, MULTI
+from bridgeai.segments import MANIFEST, SegmentCursor, response_source, segment_paths
+from bridgeai.storage import MULTI_SEPARATOR
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:  # optional dependency
+    np = pd = None
+
+BOOTSTRAP_CELLS = 1 << 23  # resampled values held in memory at once
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("Analytics needs numpy and pandas: pip install numpy pandas")
+
+
+def _as_tuple(value):
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(sorted(value))
+    return (value,)
+
+
+class SurveyFrame:
+    """Coded columns for one version of a survey's responses."""
+
+    def __init__(self, survey, rows, labels, codes, multi, version=None):
+        self.survey = survey
+        self.rows = rows
+        self.labels = labels  # column -> list of option labels
+        self.codes = codes  # single-choice column -> int16 codes, -1 = no answer
+        self.multi = multi  # multi-select column -> bool matrix (rows x options)
+        self.version = version
+        self.weights = {}
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    @property
+    def columns(self):
+        return list(self.labels)
+
+    def add_weights(self, name, values):
+        """Attach a per-row weight vector usable as ``weights=name``."""
+        values = np.asarray(values, dtype=np.float64)
+        if values.shape != (self.rows,):
+            raise ValueError(f"weights {name!r} must have one value per row ({self.rows})")
+        with self._lock:
+            self.weights[name] = values
+            self._memo = {k: v for k, v in self._memo.items() if name not in k}
+
+    # ---------- building blocks ----------
+    def _memoized(self, key, compute):
+        with self._lock:
+            if key in self._memo:
+                return self._memo[key]
+        value = compute()
+        with self._lock:
+            self._memo[key] = value
+        return value
+
+    def indicator(self, column):
+        """Boolean ``rows × options`` matrix: row answered with that option."""
+        def compute():
+            if column in self.multi:
+                return self.multi[column]
+            codes = self.codes[column]
+            matrix = np.zeros((self.rows, len(self.labels[column])), dtype=bool)
+            answered = codes >= 0
+            matrix[np.flatnonzero(answered), codes[answered]] = True
+            return matrix
+        return self._memoized(("indicator", column), compute)
+
+    def mask(self, where=None):
+        """Rows in the segment described by ``where`` (all rows if ``None``)."""
+        if not where:
+            return None
+        key = ("mask",) + tuple(sorted((c, _as_tuple(v)) for c, v in where.items()))
+
+        def compute():
+            mask = np.ones(self.rows, dtype=bool)
+            for column, values in where.items():
+                options = self.labels[column]
+                wanted = [options.index(v) for v in _as_tuple(values) if v in options]
+                mask &= self.indicator(column)[:, wanted].any(axis=1)
+            return mask
+        return self._memoized(key, compute)
+
+    def _weights(self, weights):
+        if weights is None:
+            return np.ones(self.rows)
+        return self.weights[weights]
+
+    # ---------- analyses ----------
+    def crosstab(self, row, col, weights=None, where=None, normalize=None):
+        """Weighted counts of ``row`` × ``col`` as a DataFrame.
+
+        ``normalize`` is ``None``, ``"index"`` (shares within each row) or
+        ``"all"``. Multi-selects count every selected option.
+        """
+        key = ("crosstab", row, col, weights, normalize, self._where_key(where))
+
+        def compute():
+            w = self._weights(weights)
+            mask = self.mask(where)
+            if mask is not None:
+                w = w * mask
+            if row not in self.multi and col not in self.multi:
+                # Both single-choice: one bincount over combined codes.
+                a, b = self.codes[row], self.codes[col]
+                ok = (a >= 0) & (b >= 0)
+                width = len(self.labels[col])
+                counts = np.bincount(a[ok].astype(np.int64) * width + b[ok], weights=w[ok],
+                                     minlength=len(self.labels[row]) * width)
+                counts = counts.reshape(len(self.labels[row]), width)
+            else:
+                left = self.indicator(row) * w[:, None]
+                counts = left.T @ self.indicator(col)
+            frame = pd.DataFrame(counts, index=pd.Index(self.labels[row], name=row),
+                                 columns=pd.Index(self.labels[col], name=col))
+            if normalize == "index":
+                totals = frame.sum(axis=1).replace(0, np.nan)
+                frame = frame.div(totals, axis=0)
+            elif normalize == "all":
+                frame = frame / (frame.values.sum() or np.nan)
+            return frame
+        return self._memoized(key, compute)
+
+    def share(self, column, weights=None, by=None, where=None):
+        """Weighted share of respondents choosing each option of ``column``.
+
+        The denominator is the number of respondents who answered ``column``,
+        so multi-select shares can add up to more than 1. With ``by`` the
+        result has one row per group.
+        """
+        key = ("share", column, weights, by, self._where_key(where))
+
+        def compute():
+            w = self._weights(weights)
+            mask = self.mask(where)
+            if mask is not None:
+                w = w * mask
+            hits = self.indicator(column)
+            answered = hits.any(axis=1)
+            if by is None:
+                groups = np.ones((self.rows, 1), dtype=bool)
+                index = pd.Index(["all"])
+            else:
+                groups = self.indicator(by)
+                index = pd.Index(self.labels[by], name=by)
+            weighted = groups * w[:, None]
+            numerator = weighted.T @ hits
+            denominator = weighted.T @ answered
+            with np.errstate(invalid="ignore", divide="ignore"):
+                shares = numerator / denominator[:, None]
+            return pd.DataFrame(shares, index=index,
+                                columns=pd.Index(self.labels[column], name=column))
+        return self._memoized(key, compute)
+
+    def bootstrap_ci(self, column, option, by=None, weights=None, where=None,
+                     samples=1000, level=0.95, seed=0):
+        """Bootstrap confidence interval for the share choosing ``option``.
+
+        Respondents who answered ``column`` are resampled with replacement
+        within each group. Returns a DataFrame with ``share``, ``low``,
+        ``high`` and ``n`` per group.
+        """
+        key = ("bootstrap", column, option, by, weights, self._where_key(where),
+               samples, level, seed)
+
+        def compute():
+            rng = np.random.default_rng(seed)
+            w = self._weights(weights)
+            mask = self.mask(where)
+            hits = self.indicator(column)
+            answered = hits.any(axis=1)
+            if mask is not None:
+                answered &= mask
+            chosen = hits[:, self.labels[column].index(option)]
+            if by is None:
+                groups, names = answered[:, None], ["all"]
+            else:
+                groups, names = self.indicator(by) & answered[:, None], self.labels[by]
+            tail = (1 - level) / 2
+            records = []
+            for g, name in enumerate(names):
+                rows = np.flatnonzero(groups[:, g])
+                if not len(rows):
+                    records.append((name, np.nan, np.nan, np.nan, 0))
+                    continue
+                y = chosen[rows].astype(np.float64)
+                wg = w[rows]
+                estimate = (y * wg).sum() / wg.sum()
+                stats = []
+                batch = max(1, BOOTSTRAP_CELLS // len(rows))
+                for start in range(0, samples, batch):
+                    idx = rng.integers(0, len(rows), size=(min(batch, samples - start), len(rows)))
+                    ws = wg[idx]
+                    stats.append((y[idx] * ws).sum(axis=1) / ws.sum(axis=1))
+                stats = np.concatenate(stats)
+                low, high = np.quantile(stats, [tail, 1 - tail])
+                records.append((name, estimate, low, high, len(rows)))
+            frame = pd.DataFrame(records, columns=[by or "group", "share", "low", "high", "n"])
+            return frame.set_index(by or "group")
+        return self._memoized(key, compute)
+
+    @staticmethod
+    def _where_key(where):
+        if not where:
+            return None
+        return tuple(sorted((c, _as_tuple(v)) for c, v in where.items()))
+
+
+# ---------- loading ----------
+def _codes(values, options):
+    """Integer codes of ``values`` into ``options`` (``-1`` = blank or unknown)."""
+    return pd.Index(options).get_indexer(np.asarray(values, dtype=object)).astype(np.int16)
+
+
+class _FrameBuilder:
+    """Coded columns of one response source, extended as rows are appended.
+
+    Like :class:`bridgeai.aggregate.IncrementalAggregator` it remembers the
+    byte offset read up to (or a :class:`~bridgeai.segments.SegmentCursor`
+    for a segment directory), so a refresh only parses and encodes new rows.
+    The arrays grow by doubling. Each frame gets views of the rows that
+    existed when it was made, which later appends do not touch.
+    """
+
+    def __init__(self, survey, source):
+        self.survey = survey
+        self.source = source
+        self.columns = [c for c in survey.columns if survey.types[c] in (CATEGORY, MULTI, INTEGER)]
+        self.positions = [survey.columns.index(c) for c in self.columns]
+        self.cursor = SegmentCursor(source) if os.path.isdir(source) else None
+        self.frame = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        if self.cursor is not None:
+            self.cursor.reset()
+        self.header = None
+        self.offset = 0
+        self.rows = 0
+        self.labels, self.codes, self.multi = {}, {}, {}
+        for column in self.columns:
+            question = self.survey.question_for(column)
+            if self.survey.types[column] == INTEGER:
+                self.labels[column] = [str(v) for v in range(question.min_value, question.max_value + 1)]
+            else:
+                self.labels[column] = list(question.options)
+            if self.survey.types[column] == MULTI:
+                self.multi[column] = np.zeros((0, len(self.labels[column])), bool)
+            else:
+                self.codes[column] = np.zeros(0, np.int16)
+
+    def _new_rows(self):
+        if self.cursor is not None:
+            yield from self.cursor.read_new(self.survey)
+            return
+        header, start = read_header(self.source)
+        if header is None:
+            self.reset()
+            return
+        if not is_header(header):
+            start = 0
+        if header != self.header or os.path.getsize(self.source) < self.offset:
+            self.reset()
+            self.header = header
+            self.offset = start
+        for values, end in iter_survey_rows(self.survey, self.source, offset=self.offset):
+            self.offset = end
+            yield values
+
+    def _room(self, array, rows, width=None):
+        """``array`` with space for ``rows`` rows (and ``width`` columns), copied if it must grow."""
+        capacity, columns = len(array), array.shape[1] if array.ndim == 2 else None
+        if rows <= capacity and width in (None, columns):
+            return array
+        if rows > capacity:
+            capacity = max(rows, 2 * capacity, 1024)
+        shape = (capacity,) + ((width,) if width is not None else ())
+        grown = np.zeros(shape, array.dtype)
+        if width is None:
+            grown[:self.rows] = array[:self.rows]
+        else:
+            grown[:self.rows, :columns] = array[:self.rows]
+        return grown
+
+    def load(self, version):
+        """A frame of all rows, encoding those appended since the last call first."""
+        with self._lock:
+            if self.frame is None or self.frame.version != version:
+                self.frame = self._refresh(version)
+            return self.frame
+
+    def _refresh(self, version):
+        selected = [[values[i] for i in self.positions] for values in self._new_rows()]
+        start, rows = self.rows, self.rows + len(selected)
+        raw = dict(zip(self.columns, zip(*selected))) if selected else {}
+        del selected
+
+        for column, values in raw.items():
+            options = self.labels[column]
+            # Few distinct answers repeat many times: encode the distinct ones only.
+            inverse, uniques = pd.factorize(np.asarray(values, dtype=object))
+            if self.survey.types[column] == MULTI:
+                split = [[o for o in u.split(MULTI_SEPARATOR) if o] for u in uniques]
+                options += sorted({o for chosen in split for o in chosen} - set(options))
+                index = {o: i for i, o in enumerate(options)}
+                patterns = np.zeros((len(uniques), len(options)), dtype=bool)
+                for u, chosen in enumerate(split):
+                    patterns[u, [index[o] for o in chosen]] = True
+                matrix = self.multi[column] = self._room(self.multi[column], rows, len(options))
+                matrix[start:rows] = patterns[inverse]
+                continue
+            options += sorted(set(uniques) - set(options) - {""})
+            codes = self.codes[column] = self._room(self.codes[column], rows)
+            codes[start:rows] = _codes(uniques, options)[inverse]
+        self.rows = rows
+        return SurveyFrame(
+            self.survey, rows,
+            {column: list(options) for column, options in self.labels.items()},
+            {column: codes[:rows] for column, codes in self.codes.items()},
+            {column: matrix[:rows] for column, matrix in self.multi.items()},
+            version,
+        )
+
+
+def file_version(source):
+    """Cheap change detector: size and mtime of a file (or a segment directory)."""
+    paths = [source]
+    if os.path.isdir(source):
+        paths = [os.path.join(source, MANIFEST)] + segment_paths(source)[-1:]
+    version = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            version.append(None)
+            continue
+        version.append((st.st_size, st.st_mtime_ns))
+    return tuple(version)
+
+
+_frames = {}  # (survey, source) -> _FrameBuilder
+_frames_lock = threading.Lock()
+
+
+def load_frame(survey, source=None):
+    """The coded responses of ``survey``; only rows appended since the last call are read."""
+    _require_numpy()
+    source = source or response_source(survey)
+    key = (survey.name, os.path.abspath(source))
+    with _frames_lock:
+        builder = _frames.get(key)
+        if builder is None:
+            builder = _frames[key] = _FrameBuilder(survey, source)
+    return builder.load(file_version(source))
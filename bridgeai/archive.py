@@ -0,0 +1,694 @@
+# --------------------------------------------------------
+# Compressed, seekable archives of historical responses
+# --------------------------------------------------------
+"""Pack a survey's stored responses into one compressed file that can be read by time window.
+
+An archive keeps the response files exactly as stored: every record's raw
+bytes, under the header line of the file it came from, whatever layout or
+schema version it was written with. Nothing is mapped onto the current
+columns, so rows of older layouts, untagged rows and rows no layout
+recognises all survive. The records are cut into blocks of about
+``--block-kb`` (default 1024) KiB. A block never spans two source files.
+Each block is compressed on its own with zstd (needs the ``zstandard``
+package), or with the standard library's zlib or lzma. The free-text
+answers are what make response CSVs big, and they compress well: expect the
+archive to be a fraction of the CSV.
+
+Layout::
+
+    BZAR\\x02 | block 0 | block 1 | ... | index (JSON) | trailer
+
+The trailer (the last 16 bytes) gives the index's offset and length. The
+index lists the source files with their header lines and, for every block,
+its source, offset, compressed and raw length, CRC-32, record count, the
+schema versions of its rows and the earliest and latest timestamp in it.
+:class:`ArchiveReader` reads the index once and then decompresses only the
+blocks whose timestamp range overlaps the requested window. Every block is
+checked against its CRC before use.
+
+Timestamps are compared as times, not strings: the legacy
+``2025-10-25 16:29:13`` form and the apps' ``2025-10-25T16:29:13.241272``
+are both parsed. Windows are ISO dates or timestamps; ``--since`` is
+inclusive and ``--until`` exclusive.
+
+Extracting a whole archive gives back each source file byte for byte.
+A SQLite database has no file layout to keep. Its rows are archived in the
+current columns with each row's own ``schema_version``. Archiving stops with
+an error if the database holds columns the current schema no longer has.
+
+Command line::
+
+    python -m bridgeai.archive create customer
+    python -m bridgeai.archive create business --codec lzma --until 2026-01-01
+    python -m bridgeai.archive info data/archive/customer-2026-10-18.bza
+    python -m bridgeai.archive extract data/archive/customer-2026-10-18.bza \\
+        --since 2026-03-01 --until 2026-04-01 --out march.csv
+    python -m bridgeai.archive verify data/archive/customer-2026-10-18.bza \\
+        --source data/yourfirstyear_customer_survey.csv
+
+The source is never modified. ``verify --source`` checks every block and
+then compares the archive with the source, byte for byte. Only after that
+passes should the original be moved off the server.
+"""
+
+import argparse
+import io
+import json
+import lzma
+import os
+import sqlite3
+import struct
+import sys
+import zlib
+from collections import Counter
+from datetime import date, datetime
+
+from bridgeai.bulk import Progress, _is_sqlite, _sqlite_rows, default_source, source_size
+from bridgeai.locking import FileLock, encode_rows
+from bridgeai.reader import RowMapper, _parse, is_header
+from bridgeai.schema import SURVEYS, load_survey
+from bridgeai.segments import segment_paths
+from bridgeai.storage import DATA_DIR
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; zlib and lzma are always there
+    zstandard = None
+
+ARCHIVE_DIR = os.path.join(DATA_DIR, "archive")
+EXTENSION = "bza"
+MAGIC = b"BZAR\x02"
+TRAILER = struct.Struct("<QQ")  # index offset, index length
+FORMAT_VERSION = 2
+
+CODECS = ("zstd", "zlib", "lzma")
+DEFAULT_CODEC = "zstd" if zstandard is not None else "zlib"
+DEFAULT_LEVELS = {"zstd": 12, "zlib": 9, "lzma": 6}
+DEFAULT_BLOCK_BYTES = 1024 * 1024
+READ_SIZE = 1 << 20
+
+UNMAPPED = "unrecognised"
+
+
+def _require_zstandard():
+    if zstandard is None:
+        raise RuntimeError("zstd archives need zstandard: pip install zstandard")
+
+
+def is_archive(path):
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+# ---------- codecs ----------
+def _compressor(codec, level):
+    """A function compressing one block."""
+    if codec == "zstd":
+        _require_zstandard()
+        return zstandard.ZstdCompressor(level=level).compress
+    if codec == "zlib":
+        return lambda data: zlib.compress(data, level)
+    if codec == "lzma":
+        return lambda data: lzma.compress(data, preset=level)
+    raise ValueError(f"Unknown codec: {codec!r}")
+
+
+def _decompressor(codec):
+    if codec == "zstd":
+        _require_zstandard()
+        decompressor = zstandard.ZstdDecompressor()
+        return lambda data, size: decompressor.decompress(data, max_output_size=size)
+    if codec == "zlib":
+        return lambda data, size: zlib.decompress(data, bufsize=size or zlib.DEF_BUF_SIZE)
+    if codec == "lzma":
+        return lambda data, size: lzma.decompress(data)
+    raise ValueError(f"Unknown codec: {codec!r}")
+
+
+
+# ---------- timestamps ----------
+def parse_moment(value):
+    """``value`` (an ISO date/timestamp string or a datetime) as a naive datetime, or ``None``.
+
+    Accepts both the legacy ``2025-10-25 16:29:13`` and the ``T``-separated
+    form. Aware timestamps are converted to local time.
+    """
+    if isinstance(value, datetime):
+        moment = value
+    else:
+        try:
+            moment = datetime.fromisoformat(value.strip())
+        except (AttributeError, ValueError):
+            return None
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment
+
+
+def _bound(value):
+    if value is None:
+        return None
+    moment = parse_moment(value)
+    if moment is None:
+        raise ValueError(f"not an ISO date or timestamp: {value!r}")
+    return moment
+
+
+def _in_window(moment, since, until):
+    return (since is None or moment >= since) and (until is None or moment < until)
+
+
+# ---------- sources ----------
+def _raw_records(path):
+    """Yield the raw bytes of every record in ``path``, header line included.
+
+    Records are reassembled by quote parity like ``bridgeai.reader.iter_rows``
+    does, but nothing is dropped: blank lines and a torn tail are kept as is.
+    """
+    with FileLock(path, shared=True), open(path, "rb") as f:
+        end = os.fstat(f.fileno()).st_size
+        position = 0
+        record = b""
+        quotes = 0
+        while position < end:
+            line = f.readline(min(READ_SIZE, end - position))
+            if not line:
+                break
+            position += len(line)
+            record += line
+            quotes += line.count(b'"')
+            if quotes % 2 or not record.endswith(b"\n"):
+                continue
+            yield record
+            record = b""
+            quotes = 0
+        if record:
+            yield record
+
+
+def _parse_records(records):
+    """One parsed row per raw record (``[]`` for a blank one)."""
+    rows = list(_parse(b"".join(records)))
+    if len(rows) != len(records):  # a torn record can swallow its neighbours
+        rows = [next(iter(_parse(record)), []) for record in records]
+    return rows
+
+
+def _file_sources(paths):
+    """``(name, header, header_line, records)`` for each response file."""
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        records = _raw_records(path)
+        first = next(records, None)
+        if first is None:
+            continue
+        row = next(iter(_parse(first)), [])
+        if is_header(row):
+            yield os.path.basename(path), row, first, records
+        else:  # headerless legacy file: the first line is a record
+            yield os.path.basename(path), None, b"", _chain(first, records)
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+
+def _sqlite_source(survey, path):
+    """The survey's SQLite rows as one CSV source in the stored columns.
+
+    Refuses a database holding columns the current schema would drop.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info(\"{survey.name}\")")}
+    finally:
+        conn.close()
+    prefix = f"{survey.name}__"
+    lost = sorted(existing - set(survey.stored_columns) - {"id"})
+    lost += sorted(t[len(prefix):] for t in tables
+                   if t.startswith(prefix) and t[len(prefix):] not in survey.multi_columns)
+    if lost:
+        raise ValueError(f"{path} has {survey.name} columns the current schema lacks "
+                         f"({', '.join(lost)}); they would be lost")
+    header = list(survey.stored_columns)
+    records = (encode_rows([values]) for values, _ in _sqlite_rows(survey, path, columns=header))
+    yield os.path.basename(path), header, encode_rows([], header), records
+
+
+def _sources(survey, source):
+    if os.path.isdir(source):
+        return _file_sources(segment_paths(source))
+    if os.path.exists(source) and _is_sqlite(source):
+        return _sqlite_source(survey, source)
+    return _file_sources([source])
+
+
+# ---------- writing ----------
+def _layout(mapper, row):
+    version, positions = mapper.match(row)
+    if positions is None:
+        return UNMAPPED
+    return f"v{version}" if version is not None else "header layout"
+
+
+def write_archive(survey, out, source=None, codec=DEFAULT_CODEC, level=None,
+                  block_bytes=DEFAULT_BLOCK_BYTES, since=None, until=None, progress=None):
+    """Archive ``survey``'s stored records (optionally only ``[since, until)``) to ``out``.
+
+    Returns the index. The file is written next to ``out`` and renamed into
+    place when complete. Raises ``ValueError`` if the source holds data the
+    archive could not keep.
+    """
+    compress = _compressor(codec, DEFAULT_LEVELS[codec] if level is None else level)
+    since, until = _bound(since), _bound(until)
+    windowed = since is not None or until is not None
+    source = source or default_source(survey)
+    progress = progress or Progress(f"archive {survey.name}", enabled=False)
+    progress.total = source_size(survey, source)
+    sources, blocks = [], []
+    layouts = Counter()
+    totals = {"rows": 0, "raw_bytes": 0, "left_out": 0}
+
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    tmp_path = out + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+
+            def seal(number, records, moments, counts):
+                raw = b"".join(records)
+                data = compress(raw)
+                blocks.append({
+                    "source": number,
+                    "offset": f.tell(),
+                    "length": len(data),
+                    "raw_length": len(raw),
+                    "crc32": zlib.crc32(raw),
+                    "rows": len(records),
+                    "layouts": dict(counts),
+                    "first": min(moments).isoformat() if moments else None,
+                    "last": max(moments).isoformat() if moments else None,
+                })
+                f.write(data)
+                totals["rows"] += len(records)
+                totals["raw_bytes"] += len(raw)
+
+            done = 0
+            for name, header, header_line, records in _sources(survey, source):
+                number = len(sources)
+                sources.append({"name": name, "header": header,
+                                "header_line": header_line.decode("utf-8", errors="surrogateescape")})
+                totals["raw_bytes"] += len(header_line)
+                mapper = RowMapper(survey, header)
+                pending, size = [], 0
+
+                def flush(pending):
+                    kept, moments, counts = [], [], Counter()
+                    for record, row in zip(pending, _parse_records(pending)):
+                        moment = parse_moment(row[0]) if row else None
+                        if windowed and (moment is None or not _in_window(moment, since, until)):
+                            totals["left_out"] += 1
+                            continue
+                        kept.append(record)
+                        if moment is not None:
+                            moments.append(moment)
+                        if row:
+                            counts[_layout(mapper, row)] += 1
+                    if kept:
+                        seal(number, kept, moments, counts)
+                        layouts.update(counts)
+
+                for record in records:
+                    pending.append(record)
+                    size += len(record)
+                    done += len(record)
+                    progress.update(1, done)
+                    if size >= block_bytes:
+                        flush(pending)
+                        pending, size = [], 0
+                if pending:
+                    flush(pending)
+
+            index = {
+                "format": FORMAT_VERSION,
+                "survey": survey.name,
+                "schema_version": survey.version,
+                "codec": codec,
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "since": since.isoformat() if since else None,
+                "until": until.isoformat() if until else None,
+                **totals,
+                "layouts": dict(layouts),
+                "sources": sources,
+                "blocks": blocks,
+            }
+            index_offset = f.tell()
+            payload = json.dumps(index, separators=(",", ":")).encode("utf-8")
+            f.write(payload)
+            f.write(TRAILER.pack(index_offset, len(payload)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, out)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    progress.done()
+    return index
+
+
+# ---------- reading ----------
+class ArchiveReader:
+    """Random access to an archive's blocks by timestamp window."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self.index = self._read_index()
+        except Exception:
+            self._file.close()
+            raise
+        self.sources = self.index["sources"]
+        self.blocks = self.index["blocks"]
+        self._spans = [(parse_moment(b["first"]), parse_moment(b["last"])) if b["first"] else None
+                       for b in self.blocks]
+        self._decompress = _decompressor(self.index["codec"])
+
+    def _read_index(self):
+        f = self._file
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{self.path} is not a response archive (or one of an older format)")
+        size = os.fstat(f.fileno()).st_size
+        if size < len(MAGIC) + TRAILER.size:
+            raise ValueError(f"{self.path} is truncated")
+        f.seek(size - TRAILER.size)
+        offset, length = TRAILER.unpack(f.read(TRAILER.size))
+        if offset + length + TRAILER.size != size:
+            raise ValueError(f"{self.path} is truncated or has a damaged trailer")
+        f.seek(offset)
+        index = json.loads(f.read(length))
+        if index.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{self.path}: unsupported archive format {index.get('format')!r}")
+        return index
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def rows(self):
+        return self.index["rows"]
+
+    def header_line(self, number):
+        """The raw header line of source ``number`` (empty for a headerless file)."""
+        return self.sources[number]["header_line"].encode("utf-8", errors="surrogateescape")
+
+    def blocks_for(self, since=None, until=None):
+        """Numbers of the blocks that may hold rows in ``[since, until)``."""
+        since, until = _bound(since), _bound(until)
+        if since is None and until is None:
+            return list(range(len(self.blocks)))
+        return [
+            number for number, span in enumerate(self._spans)
+            if span is not None
+            and (until is None or span[0] < until)
+            and (since is None or span[1] >= since)
+        ]
+
+    def read_block(self, number):
+        """The block's raw CSV bytes, checked against its CRC."""
+        block = self.blocks[number]
+        self._file.seek(block["offset"])
+        try:
+            raw = self._decompress(self._file.read(block["length"]), block["raw_length"])
+        except Exception as exc:  # zlib.error, lzma.LZMAError, zstandard.ZstdError
+            raise ValueError(f"{self.path}: block {number} is corrupt ({exc})") from exc
+        if len(raw) != block["raw_length"] or zlib.crc32(raw) != block["crc32"]:
+            raise ValueError(f"{self.path}: block {number} is corrupt")
+        return raw
+
+    def iter_records(self, since=None, until=None):
+        """Yield ``(source number, raw record bytes)`` for the records in ``[since, until)``."""
+        since, until = _bound(since), _bound(until)
+        windowed = since is not None or until is not None
+        for number in self.blocks_for(since, until):
+            source = self.blocks[number]["source"]
+            records = list(_split_records(self.read_block(number)))
+            first, last = self._spans[number]
+            if not windowed or (_in_window(first, since, None) and _in_window(last, None, until)):
+                for record in records:
+                    yield source, record
+                continue
+            for record, row in zip(records, _parse_records(records)):
+                moment = parse_moment(row[0]) if row else None
+                if moment is not None and _in_window(moment, since, until):
+                    yield source, record
+
+    def iter_rows(self, since=None, until=None):
+        """Yield ``(header, row)`` for the rows in ``[since, until)``, in their stored layout."""
+        for source, record in self.iter_records(since, until):
+            row = next(iter(_parse(record)), None)
+            if row:
+                yield self.sources[source]["header"], row
+
+    def iter_survey_rows(self, survey, since=None, until=None):
+        """Yield the rows in ``[since, until)`` mapped onto ``survey``'s current columns.
+
+        Rows no layout recognises are skipped, as ``bridgeai.reader`` does.
+        """
+        mappers = [RowMapper(survey, source["header"]) for source in self.sources]
+        for source, record in self.iter_records(since, until):
+            row = next(iter(_parse(record)), None)
+            values = mappers[source].map(row) if row else None
+            if values is not None:
+                yield values
+
+    def source_bytes(self, number):
+        """Yield the chunks that make up source file ``number``, header first."""
+        yield self.header_line(number)
+        for block_number, block in enumerate(self.blocks):
+            if block["source"] == number:
+                yield self.read_block(block_number)
+
+    def verify(self):
+        """Decompress every block; returns a list of problems (empty when intact)."""
+        problems = []
+        rows = 0
+        for number, block in enumerate(self.blocks):
+            try:
+                count = sum(1 for _ in _split_records(self.read_block(number)))
+            except Exception as exc:
+                problems.append(str(exc))
+                continue
+            if count != block["rows"]:
+                problems.append(f"block {number}: {count} records, index says {block['rows']}")
+            rows += count
+        if not problems and rows != self.rows:
+            problems.append(f"{rows} records in blocks, index says {self.rows}")
+        return problems
+
+    def compare(self, source):
+        """Problems found comparing the archive with ``source`` (a file or segment directory).
+
+        Every archived file must match the start of the file of the same name
+        byte for byte; the source may have grown since it was archived.
+        """
+        if self.index["since"] or self.index["until"]:
+            return ["a windowed archive cannot be compared with its source"]
+        problems = []
+        for number, entry in enumerate(self.sources):
+            path = os.path.join(source, entry["name"]) if os.path.isdir(source) else source
+            if not os.path.isdir(source) and len(self.sources) > 1:
+                return [f"the archive holds {len(self.sources)} files; pass their directory"]
+            if not os.path.exists(path):
+                problems.append(f"{path} does not exist")
+                continue
+            if _is_sqlite(path):
+                problems.append(f"{path} is a database; only files can be compared byte for byte")
+                continue
+            with open(path, "rb") as f:
+                for chunk in self.source_bytes(number):
+                    if f.read(len(chunk)) != chunk:
+                        problems.append(f"{path} differs from the archive")
+                        break
+        return problems
+
+
+def _split_records(data):
+    """Split a block back into its raw records (quote-aware, like :func:`_raw_records`)."""
+    stream = io.BytesIO(data)
+    record = b""
+    quotes = 0
+    for line in stream:
+        record += line
+        quotes += line.count(b'"')
+        if quotes % 2 or not record.endswith(b"\n"):
+            continue
+        yield record
+        record = b""
+        quotes = 0
+    if record:
+        yield record
+
+
+def extract(path, out, since=None, until=None):
+    """Write the archived records in ``[since, until)`` to ``out`` (``"-"`` for stdout).
+
+    ``out`` may be a directory, which gets one file per archived source
+    under its original name. A single file is written when every source
+    shares one header line. Returns the number of records written.
+    """
+    with ArchiveReader(path) as reader:
+        if out != "-" and os.path.isdir(out):
+            return _extract_files(reader, out, since, until)
+        if len({entry["header_line"] for entry in reader.sources}) > 1:
+            raise ValueError(f"{path} holds {len(reader.sources)} files with different headers; "
+                             "pass a directory to --out")
+        if out == "-":
+            return _write_records(reader, sys.stdout.buffer, since, until)
+        os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+        return _write_atomically(out, lambda f: _write_records(reader, f, since, until))
+
+
+def _extract_files(reader, directory, since, until):
+    count = 0
+    for number, entry in enumerate(reader.sources):
+        target = os.path.join(directory, entry["name"])
+        count += _write_atomically(
+            target, lambda f: _write_records(reader, f, since, until, number))
+    return count
+
+
+def _write_atomically(out, write):
+    tmp_path = out + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            count = write(f)
+        os.replace(tmp_path, out)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return count
+
+
+def _write_records(reader, f, since, until, only=None):
+    if reader.sources:
+        f.write(reader.header_line(only or 0))
+    count = 0
+    for source, record in reader.iter_records(since, until):
+        if only is None or source == only:
+            f.write(record)
+            count += 1
+    return count
+
+
+def describe(path):
+    """A human-readable summary of the archive's index."""
+    with ArchiveReader(path) as reader:
+        index = reader.index
+        size = os.path.getsize(path)
+        spans = [span for span in reader._spans if span is not None]
+        span = (f"{min(s[0] for s in spans).isoformat()} .. {max(s[1] for s in spans).isoformat()}"
+                if spans else "no timestamps")
+        ratio = index["raw_bytes"] / size if size else 0.0
+        layouts = ", ".join(f"{name} {count:,}" for name, count in sorted(index["layouts"].items()))
+        lines = [
+            f"{path}: {index['survey']} (schema v{index['schema_version']}), created {index['created']}",
+            f"  {index['rows']:,} records from {len(reader.sources)} file(s) in "
+            f"{len(reader.blocks)} {index['codec']} blocks, {span}",
+            f"  rows by layout: {layouts or 'none'}",
+            f"  {index['raw_bytes']:,} bytes of CSV in {size:,} bytes ({ratio:.1f}x)",
+        ]
+        if index["layouts"].get(UNMAPPED):
+            lines.append(f"  {index['layouts'][UNMAPPED]:,} rows fit no known layout; "
+                         "they are archived as stored")
+        if index["since"] or index["until"]:
+            lines.append(f"  window {index['since'] or '...'} .. {index['until'] or '...'}: "
+                         f"{index['left_out']:,} records left out")
+        return "\n".join(lines)
+
+
+# ---------- command line ----------
+def _window_bound(text):
+    """Parse an ISO date or timestamp for --since/--until."""
+    moment = parse_moment(text)
+    if moment is None:
+        raise argparse.ArgumentTypeError(f"not an ISO date or timestamp: {text!r}")
+    return moment
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compressed, seekable archives of survey responses.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create_parser = commands.add_parser("create", help="archive a survey's stored responses")
+    create_parser.add_argument("survey", choices=SURVEYS)
+    create_parser.add_argument("--source", help="response CSV, segment directory or SQLite database "
+                                                "(default: the configured store)")
+    create_parser.add_argument("--out", help="default: data/archive/<survey>-<date>.bza")
+    create_parser.add_argument("--codec", choices=CODECS, default=DEFAULT_CODEC)
+    create_parser.add_argument("--level", type=int, help="compression level (default depends on codec)")
+    create_parser.add_argument("--block-kb", type=int, default=DEFAULT_BLOCK_BYTES // 1024,
+                               help="uncompressed size of a block (default %(default)s)")
+    create_parser.add_argument("--quiet", action="store_true", help="no progress output")
+
+    extract_parser = commands.add_parser("extract", help="write archived records back out as CSV")
+    extract_parser.add_argument("archive")
+    extract_parser.add_argument("--out", default="-",
+                                help="CSV path, a directory for one file per source, "
+                                     "or '-' for stdout (default)")
+
+    for sub in (create_parser, extract_parser):
+        sub.add_argument("--since", type=_window_bound, help="first timestamp to include")
+        sub.add_argument("--until", type=_window_bound, help="first timestamp to leave out")
+
+    commands.add_parser("info").add_argument("archive")
+    verify_parser = commands.add_parser("verify", help="check every block, and optionally the source")
+    verify_parser.add_argument("archive")
+    verify_parser.add_argument("--source", help="response CSV or segment directory to compare with")
+    args = parser.parse_args(argv)
+
+    if args.command == "create":
+        survey = load_survey(args.survey)
+        out = args.out or os.path.join(ARCHIVE_DIR, f"{survey.name}-{date.today()}.{EXTENSION}")
+        progress = Progress(f"archive {survey.name}", enabled=not args.quiet)
+        try:
+            write_archive(survey, out, source=args.source, codec=args.codec, level=args.level,
+                          block_bytes=args.block_kb * 1024, since=args.since, until=args.until,
+                          progress=progress)
+        except (RuntimeError, ValueError) as exc:
+            parser.exit(2, f"{exc}\n")
+        print(describe(out))
+        return 0
+
+    try:
+        if args.command == "extract":
+            count = extract(args.archive, args.out, args.since, args.until)
+            if args.out != "-":
+                print(f"Wrote {count} records to {args.out}", file=sys.stderr)
+            return 0
+        if args.command == "info":
+            print(describe(args.archive))
+            return 0
+        with ArchiveReader(args.archive) as reader:
+            problems = reader.verify()
+            if not problems and args.source:
+                problems = reader.compare(args.source)
+    except (ValueError, RuntimeError) as exc:
+        parser.exit(2, f"{exc}\n")
+    for problem in problems:
+        print(problem)
+    print(f"{args.archive}: {'OK' if not problems else f'{len(problems)} problem(s)'}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,652 @@
+# --------------------------------------------------------
+# Streaming bulk export and import of responses
+# --------------------------------------------------------
+"""Move responses out of and into the stores without loading them whole.
+
+**Export** reads a survey's responses wherever they are kept and maps every
+row onto the current columns. The source can be a response CSV, a segment
+directory or the SQLite database; by default it is the store selected by
+``BRIDGEAI_STORAGE``. The rows are written as:
+
+* ``jsonl``   – one object per response: sliders as numbers, multi-selects
+  as lists, blank answers as ``null``;
+* ``csv``     – the current columns, multi-selects joined with ``"; "``;
+* ``parquet`` – the typed layout of ``bridgeai.columnar`` (needs pyarrow);
+* ``sqlite``  – a standalone database laid out like the SQLite backend.
+
+**Import** bulk-loads responses collected elsewhere, such as a typed-up
+paper batch or another deployment's export. The input is CSV or JSONL
+keyed by column name. Every record is checked against the survey:
+
+* choices must be one of the question's options (case, spacing and the
+  leading emoji are ignored, so ``international student`` is accepted);
+* sliders must be whole numbers inside their range;
+* multi-selects may not exceed ``max_choices``;
+* timestamps must be ISO 8601; a blank one gets the import time.
+
+Records that fail go to ``<input>.rejects.csv`` with the reason. The rest
+are appended to the configured backend in batches, tagged with the current
+schema version. Contact columns go to the contacts file, as they do from
+the apps.
+
+Both directions are generator pipelines that read, convert and write one
+chunk at a time, so memory use does not grow with the file. Progress is
+reported on stderr (``--quiet`` turns it off)::
+
+    python -m bridgeai.bulk export customer --format jsonl --out - | gzip > customer.jsonl.gz
+    python -m bridgeai.bulk export all --format parquet
+    python -m bridgeai.bulk import quick paper_batch.csv --check
+    python -m bridgeai.bulk import quick paper_batch.csv
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+import unicodedata
+from collections import Counter
+from datetime import datetime
+
+from bridgeai.columnar import EXPORT_DIR
+from bridgeai.contacts import get_contact_queue
+from bridgeai.locking import encode_rows
+from bridgeai.reader import iter_rows, iter_survey_rows
+from bridgeai.schema import CATEGORY, INTEGER, MULTI, SURVEYS, TIMESTAMP, VERSION_COLUMN, load_survey
+from bridgeai.segments import response_source, segment_paths
+from bridgeai.storage import (
+    DEFAULT_SQLITE_PATH, DEFAULT_STORAGE, MULTI_SEPARATOR, SQLiteBackend, _quote, open_backend,
+)
+
+EXPORT_FORMATS = ("jsonl", "csv", "parquet", "sqlite")
+IMPORT_FORMATS = ("jsonl", "csv")
+EXTENSIONS = {"jsonl": "jsonl", "csv": "csv", "parquet": "parquet", "sqlite": "db"}
+
+CHUNK_ROWS = 4096
+PARQUET_BATCH_ROWS = 16384  # one row group each; smaller than columnar's default to bound memory
+PROGRESS_INTERVAL = 1.0  # seconds between progress lines
+REJECT_COLUMNS = ("line", "reason", "record")
+SQLITE_MAGIC = b"SQLite format 3\0"
+
+_LEADING = re.compile(r"^[\W_]+")
+_SPACES = re.compile(r"\s+")
+
+
+def chunked(items, size=CHUNK_ROWS):
+    """Yield lists of up to ``size`` items."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Progress:
+    """Throttled progress line: rows done, rate and, if the total is known, percent."""
+
+    def __init__(self, label, total=None, stream=None, enabled=True, interval=PROGRESS_INTERVAL):
+        self.label = label
+        self.total = total
+        self.stream = stream or sys.stderr
+        self.enabled = enabled
+        self.interval = interval
+        self.rows = 0
+        self.position = 0
+        self.started = self._last = time.monotonic()
+        # Rewrite one line on a terminal; print a line per interval into a log.
+        self._end = "\r" if getattr(self.stream, "isatty", lambda: False)() else "\n"
+
+    def update(self, rows=1, position=None):
+        self.rows += rows
+        if position is not None:
+            self.position = position
+        now = time.monotonic()
+        if self.enabled and now - self._last >= self.interval:
+            self._last = now
+            self._print(now)
+
+    def track(self, items):
+        """Pass ``(item, position)`` pairs through, yielding the items and counting them."""
+        for item, position in items:
+            self.update(1, position)
+            yield item
+
+    def done(self):
+        if self.enabled:
+            self._print(time.monotonic(), end="\n")
+
+    def _print(self, now, end=None):
+        rate = self.rows / max(now - self.started, 1e-9)
+        line = f"{self.label}: {self.rows:,} rows, {rate:,.0f} rows/s"
+        if self.total:
+            line += f", {min(100.0, 100.0 * self.position / self.total):.0f}%"
+        self.stream.write(line + (end or self._end))
+        self.stream.flush()
+
+
+# ---------- sources ----------
+def default_source(survey):
+    """Where the configured backend keeps ``survey``: a CSV, a segment directory or a database."""
+    return DEFAULT_SQLITE_PATH if DEFAULT_STORAGE == "sqlite" else response_source(survey)
+
+
+def _is_sqlite(path):
+    with open(path, "rb") as f:
+        return f.read(len(SQLITE_MAGIC)) == SQLITE_MAGIC
+
+
+def source_size(survey, source):
+    """Progress total for :func:`iter_source`: bytes for CSVs, the last row id for a database."""
+    if not os.path.exists(source):
+        return 0
+    if os.path.isdir(source):
+        return sum(os.path.getsize(p) for p in segment_paths(source) if os.path.exists(p))
+    if _is_sqlite(source):
+        conn = sqlite3.connect(source)
+        try:
+            return conn.execute(f"SELECT max(id) FROM {_quote(survey.name)}").fetchone()[0] or 0
+        except sqlite3.OperationalError:  # no table for this survey yet
+            return 0
+        finally:
+            conn.close()
+    return os.path.getsize(source)
+
+
+def iter_source(survey, source=None):
+    """Yield ``(values, position)`` in current column order from any response store.
+
+    ``position`` is the bytes read so far (the row id for a database), for progress.
+    """
+    source = source or default_source(survey)
+    if not os.path.exists(source):
+        return
+    if os.path.isdir(source):
+        done = 0
+        for path in segment_paths(source):
+            for values, end in iter_survey_rows(survey, path):
+                yield values, done + end
+            if os.path.exists(path):
+                done += os.path.getsize(path)
+    elif _is_sqlite(source):
+        yield from _sqlite_rows(survey, source)
+    else:
+        yield from iter_survey_rows(survey, source)
+
+
+def _sqlite_rows(survey, path, columns=None):
+    """Rows of the SQLite backend's tables, rebuilt in ``columns`` (default: current) order.
+
+    Child rows are inserted in parent order, so one cursor per multi-select
+    table walks alongside the main one (a merge join) instead of a query per
+    response. Everything is read from one snapshot.
+    """
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        def table_columns(table):
+            return {row[1] for row in conn.execute(f"PRAGMA table_info({_quote(table)})")}
+
+        existing = table_columns(survey.name)
+        if not existing:
+            return
+        columns = columns or survey.columns
+        scalar = [c for c in columns if c not in survey.multi_columns]
+        selected = ", ".join(_quote(c) if c in existing else "''" for c in scalar)
+        conn.execute("BEGIN")
+        main = conn.execute(f"SELECT id, {selected} FROM {_quote(survey.name)} ORDER BY id")
+        children = {}
+        for column in survey.multi_columns:
+            table = f"{survey.name}__{column}"
+            if table_columns(table):
+                cursor = conn.execute(f"SELECT response_id, option FROM {_quote(table)} ORDER BY rowid")
+                children[column] = [cursor, next(cursor, None)]
+        for row in main:
+            response_id = row[0]
+            record = dict(zip(scalar, row[1:]))
+            for column in survey.multi_columns:
+                options = []
+                child = children.get(column)
+                while child is not None and child[1] is not None and child[1][0] <= response_id:
+                    if child[1][0] == response_id:
+                        options.append(child[1][1])
+                    child[1] = next(child[0], None)
+                record[column] = MULTI_SEPARATOR.join(options)
+            yield ["" if record[c] is None else str(record[c]) for c in columns], response_id
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+
+# ---------- export ----------
+def to_json(survey, values):
+    """A row as a typed JSON object (see the module docstring)."""
+    record = {}
+    for column, value in zip(survey.columns, values):
+        kind = survey.types[column]
+        if kind == MULTI:
+            record[column] = [v for v in value.split(MULTI_SEPARATOR) if v]
+        elif value == "":
+            record[column] = None
+        elif kind == INTEGER:
+            try:
+                record[column] = int(value)
+            except ValueError:
+                record[column] = value
+        else:
+            record[column] = value
+    return record
+
+
+def _write_jsonl(survey, rows, f):
+    count = 0
+    for chunk in chunked(rows):
+        f.write("".join(json.dumps(to_json(survey, v), ensure_ascii=False) + "\n" for v in chunk))
+        count += len(chunk)
+    return count
+
+
+def _write_csv(survey, rows, f):
+    writer = csv.writer(f)
+    writer.writerow(survey.columns)
+    count = 0
+    for chunk in chunked(rows):
+        writer.writerows(chunk)
+        count += len(chunk)
+    return count
+
+
+def _write_parquet(survey, rows, path):
+    from bridgeai.columnar import ColumnarEncoder, iter_batches, pq
+
+    writer = pq.ParquetWriter(path, ColumnarEncoder(survey).schema, compression="zstd")
+    count = 0
+    try:
+        for batch in iter_batches(survey, list(survey.columns), rows, PARQUET_BATCH_ROWS):
+            writer.write_batch(batch)
+            count += batch.num_rows
+    finally:
+        writer.close()
+    return count
+
+
+def _write_sqlite(survey, rows, path):
+    backend = SQLiteBackend(path, survey.name, survey.stored_columns, survey.multi_columns,
+                            survey.indexed)
+    count = 0
+    try:
+        for chunk in chunked(rows):
+            records = [dict(zip(survey.columns, values)) for values in chunk]
+            for record in records:
+                record[VERSION_COLUMN] = survey.version
+            backend.append(records)
+            count += len(records)
+    finally:
+        backend.close()
+    return count
+
+
+def export(survey, out, fmt="jsonl", source=None, progress=None):
+    """Stream ``survey``'s responses to ``out`` (a path, or ``"-"`` for stdout). Returns the row count.
+
+    Files are written next to ``out`` and renamed into place when complete.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt!r}")
+    source = source or default_source(survey)
+    progress = progress or Progress(f"export {survey.name}", enabled=False)
+    progress.total = source_size(survey, source)
+    rows = progress.track(iter_source(survey, source))
+
+    if out == "-":
+        if fmt not in ("jsonl", "csv"):
+            raise ValueError(f"{fmt} cannot be written to stdout")
+        stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", newline="",
+                                  write_through=False)
+        try:
+            write = _write_jsonl if fmt == "jsonl" else _write_csv
+            count = write(survey, rows, stdout)
+        finally:
+            stdout.flush()
+            stdout.detach()
+        progress.done()
+        return count
+
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    tmp_path = out + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        if fmt in ("jsonl", "csv"):
+            with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+                count = (_write_jsonl if fmt == "jsonl" else _write_csv)(survey, rows, f)
+        elif fmt == "parquet":
+            count = _write_parquet(survey, rows, tmp_path)
+        else:
+            count = _write_sqlite(survey, rows, tmp_path)
+        for suffix in ("-wal", "-shm"):  # a closed WAL database leaves none, but be sure
+            if os.path.exists(out + suffix):
+                os.remove(out + suffix)
+        os.replace(tmp_path, out)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    progress.done()
+    return count
+
+
+# ---------- import ----------
+def _option_key(text):
+    """Loose match key: no leading emoji or punctuation, spacing collapsed, case-folded."""
+    text = unicodedata.normalize("NFKC", str(text)).strip()
+    return _SPACES.sub(" ", _LEADING.sub("", text)).casefold()
+
+
+class RecordValidator:
+    """Check and normalize imported records against a survey's questions."""
+
+    def __init__(self, survey, timestamp=None):
+        self.survey = survey
+        self.timestamp = timestamp or datetime.now().isoformat()
+        self.known = set(survey.columns)
+        self.pii = {q.column for q in survey.stored_questions if q.pii}
+        self.lookups = {}
+        for column in survey.columns:
+            if survey.types[column] in (CATEGORY, MULTI):
+                options = survey.question_for(column).options
+                keys = Counter(_option_key(o) for o in options)
+                lookup = {_option_key(o): o for o in options if keys[_option_key(o)] == 1}
+                lookup.update((o, o) for o in options)  # exact labels always win
+                self.lookups[column] = lookup
+
+    def unknown(self, names):
+        """Field names that are neither a column, an old name for one, nor the version tag."""
+        renames = self.survey.renames
+        return [n for n in names if renames.get(n, n) not in self.known and n != VERSION_COLUMN]
+
+    def check(self, raw):
+        """Return ``(record, contacts, problems)`` for one input record.
+
+        ``record`` is ready for a backend (PII blanked); ``contacts`` maps PII
+        columns to their values.
+        """
+        renames = self.survey.renames
+        values = {renames.get(k, k): v for k, v in raw.items()}
+        problems = [f"unknown field {n!r}" for n in self.unknown(raw)]
+        record = {VERSION_COLUMN: self.survey.version}
+        contacts = {}
+        for column in self.survey.columns:
+            value = values.get(column)
+            try:
+                value = self._value(column, value)
+            except ValueError as exc:
+                problems.append(f"{column}: {exc}")
+                value = ""
+            if column in self.pii:
+                if value:
+                    contacts[column] = value
+                value = ""
+            record[column] = value
+        return record, contacts, problems
+
+    def _value(self, column, value):
+        kind = self.survey.types[column]
+        if kind == MULTI:
+            return self._options(column, value)
+        if isinstance(value, (list, tuple, dict)):
+            raise ValueError("expected a single value")
+        text = "" if value is None else str(value).strip()
+        if kind == TIMESTAMP:
+            if not text:
+                return self.timestamp
+            try:
+                return datetime.fromisoformat(text).isoformat()
+            except ValueError:
+                raise ValueError(f"{text!r} is not an ISO 8601 timestamp") from None
+        if not text:
+            return ""
+        if kind == CATEGORY:
+            option = self.lookups[column].get(text) or self.lookups[column].get(_option_key(text))
+            if option is None:
+                raise ValueError(f"{text!r} is not an option")
+            return option
+        if kind == INTEGER:
+            question = self.survey.question_for(column)
+            try:
+                number = float(text)
+            except ValueError:
+                number = None
+            if number is None or not number.is_integer():
+                raise ValueError(f"{text!r} is not a whole number")
+            if not question.min_value <= number <= question.max_value:
+                raise ValueError(f"{text} is outside {question.min_value}-{question.max_value}")
+            return int(number)
+        return text
+
+    def _options(self, column, value):
+        if value is None:
+            return []
+        if isinstance(value, str):
+            value = [v for v in (part.strip() for part in value.split(MULTI_SEPARATOR.strip())) if v]
+        elif not isinstance(value, (list, tuple)):
+            raise ValueError("expected a list of options")
+        lookup = self.lookups[column]
+        chosen = []
+        for item in value:
+            option = lookup.get(str(item).strip()) or lookup.get(_option_key(item))
+            if option is None:
+                raise ValueError(f"{item!r} is not an option")
+            if option not in chosen:
+                chosen.append(option)
+        limit = self.survey.question_for(column).max_choices
+        if limit and len(chosen) > limit:
+            raise ValueError(f"{len(chosen)} options chosen, at most {limit} allowed")
+        return chosen
+
+
+def _read_csv(path):
+    """Yield ``(line, record, raw, position, error)``; the first item is the header."""
+    rows = iter_rows(path, lock=False)
+    first = next(rows, None)
+    if first is None:
+        return
+    header, _ = first
+    yield 1, None, header, 0, None
+    for line, (row, end) in enumerate(rows, 2):
+        if len(row) != len(header):
+            yield line, None, row, end, f"expected {len(header)} fields, got {len(row)}"
+        else:
+            yield line, dict(zip(header, row)), row, end, None
+
+
+def _read_jsonl(path):
+    with open(path, "rb") as f:
+        position = 0
+        for line, text in enumerate(f, 1):
+            position += len(text)
+            if not text.strip():
+                continue
+            raw = text.decode("utf-8", errors="replace").rstrip("\r\n")
+            try:
+                record = json.loads(text)
+            except ValueError:
+                yield line, None, raw, position, "invalid JSON"
+                continue
+            if not isinstance(record, dict):
+                yield line, None, raw, position, "expected a JSON object"
+            else:
+                yield line, record, raw, position, None
+
+
+class ImportReport:
+    """What an import accepted and rejected, and why."""
+
+    def __init__(self, path):
+        self.path = path
+        self.accepted = 0
+        self.rejected = 0
+        self.contacts = 0
+        self.reasons = Counter()
+        self.rejects_path = None
+
+    @property
+    def rows(self):
+        return self.accepted + self.rejected
+
+    def summary(self, dry_run=False):
+        verb = "would be imported" if dry_run else "imported"
+        lines = [f"{self.path}: {self.accepted} row(s) {verb}, {self.rejected} rejected"]
+        for reason, count in self.reasons.most_common(10):
+            lines.append(f"  {count:>7}  {reason}")
+        if self.rejects_path:
+            lines.append(f"  rejected rows written to {self.rejects_path}")
+        return "\n".join(lines)
+
+
+def _reason_kind(problem):
+    """Group ``"province: 'Ontari' is not an option"`` as ``"province: not an option"``."""
+    column, _, detail = problem.partition(": ")
+    if not detail:
+        return problem
+    return f"{column}: {re.sub(r'^.*? is ', '', detail)}"
+
+
+def import_file(survey, path, fmt=None, dry_run=False, rejects_path=None, storage=None,
+                batch_rows=CHUNK_ROWS, progress=None):
+    """Validate ``path`` and append its good records to ``survey``'s store.
+
+    Raises ``ValueError`` before writing anything if a CSV header names a
+    column the survey does not have. With ``dry_run`` nothing is written.
+    """
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson", ".json")) else "csv")
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unknown import format: {fmt!r}")
+    rejects_path = rejects_path or path + ".rejects.csv"
+    report = ImportReport(path)
+    validator = RecordValidator(survey)
+    progress = progress or Progress(f"import {survey.name}", enabled=False)
+    progress.total = os.path.getsize(path)
+    records = _read_csv(path) if fmt == "csv" else _read_jsonl(path)
+    if fmt == "csv":
+        header = next(records, None)
+        if header is None:
+            return report
+        unknown = validator.unknown(header[2])
+        if unknown:
+            raise ValueError(f"{path}: unknown column(s) {', '.join(unknown)}")
+
+    backend = None
+    contact_queue = None
+    rejects = None
+    batch = []
+    try:
+        if not dry_run:
+            os.makedirs(os.path.dirname(os.path.abspath(survey.csv_path)), exist_ok=True)
+            backend = open_backend(survey.name, survey.csv_path, survey.stored_columns,
+                                   survey.multi_columns, survey.indexed, kind=storage)
+        for line, raw, original, position, error in records:
+            progress.update(1, position)
+            if error is not None:
+                problems = [error]
+            else:
+                record, contacts, problems = validator.check(raw)
+            if problems:
+                report.rejected += 1
+                report.reasons.update(_reason_kind(p) for p in problems)
+                if not dry_run:
+                    if rejects is None:
+                        rejects = open(rejects_path, "ab")
+                        if rejects.tell() == 0:
+                            rejects.write(encode_rows([], REJECT_COLUMNS))
+                        report.rejects_path = rejects_path
+                    text = original if isinstance(original, str) else json.dumps(original, ensure_ascii=False)
+                    rejects.write(encode_rows([[line, "; ".join(problems), text]]))
+                continue
+            report.accepted += 1
+            if dry_run:
+                continue
+            batch.append(record)
+            for column, email in contacts.items():
+                if contact_queue is None:
+                    contact_queue = get_contact_queue()
+                contact_queue.put(survey.name, column, email, record["timestamp"])
+                report.contacts += 1
+            if len(batch) >= batch_rows:
+                backend.append(batch)
+                batch = []
+        if batch:
+            backend.append(batch, durable=True)
+        if contact_queue is not None:
+            contact_queue.join()
+    finally:
+        if backend is not None:
+            backend.close()
+        if rejects is not None:
+            rejects.close()
+    progress.done()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream survey responses out of or into storage.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="write stored responses to a file")
+    export_parser.add_argument("survey", choices=SURVEYS + ("all",))
+    export_parser.add_argument("--format", choices=EXPORT_FORMATS, default="jsonl")
+    export_parser.add_argument("--source", help="response CSV, segment directory or SQLite database "
+                                                "(default: the configured store)")
+    export_parser.add_argument("--out", help="output file, '-' for stdout, or a directory for 'all' "
+                                             "(default: data/exports/<survey>.<format>)")
+
+    import_parser = commands.add_parser("import", help="validate and load responses from a file")
+    import_parser.add_argument("survey", choices=SURVEYS)
+    import_parser.add_argument("input", help="CSV or JSONL keyed by column name")
+    import_parser.add_argument("--format", choices=IMPORT_FORMATS,
+                               help="input format (default: from the file extension)")
+    import_parser.add_argument("--check", action="store_true", help="validate only, write nothing")
+    import_parser.add_argument("--rejects", help="where to write rejected rows "
+                                                 "(default: <input>.rejects.csv)")
+    import_parser.add_argument("--storage", choices=["csv", "sqlite", "segments"],
+                               help="backend to load into (default: BRIDGEAI_STORAGE)")
+    for sub in (export_parser, import_parser):
+        sub.add_argument("--quiet", action="store_true", help="no progress output")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        names = SURVEYS if args.survey == "all" else (args.survey,)
+        if len(names) > 1 and (args.out == "-" or args.source):
+            parser.error("'all' writes one file per survey; use a directory for --out and no --source")
+        for name in names:
+            survey = load_survey(name)
+            filename = f"{survey.name}.{EXTENSIONS[args.format]}"
+            if args.out is None:
+                out = os.path.join(EXPORT_DIR, filename)
+            elif len(names) > 1:
+                out = os.path.join(args.out, filename)
+            else:
+                out = args.out
+            progress = Progress(f"export {survey.name}", enabled=not args.quiet)
+            count = export(survey, out, args.format, source=args.source, progress=progress)
+            if out != "-":
+                print(f"Wrote {count} rows to {out}", file=sys.stderr)
+        return 0
+
+    survey = load_survey(args.survey)
+    progress = Progress(f"import {survey.name}", enabled=not args.quiet)
+    try:
+        report = import_file(survey, args.input, fmt=args.format, dry_run=args.check,
+                             rejects_path=args.rejects, storage=args.storage, progress=progress)
+    except ValueError as exc:
+        parser.exit(2, f"{exc}\n")
+    print(report.summary(dry_run=args.check))
+    return 1 if report.rejected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,593 @@
+# --------------------------------------------------------
+# Local submission collector for multi-replica deployments
+# --------------------------------------------------------
+"""One process owns the response files; app replicas send it their records.
+
+With several Streamlit processes behind a load balancer, every replica
+otherwise appends to the same files under ``data/`` and they queue on the
+file lock. Run one collector next to them instead::
+
+    python -m bridgeai.collector serve                       # unix:data/collector.sock
+    python -m bridgeai.collector serve --listen tcp:127.0.0.1:7650
+
+and start the apps with ``BRIDGEAI_COLLECTOR`` set to the same address. Their
+sinks (``bridgeai.sink``) still batch records per process as configured by
+``BRIDGEAI_DURABILITY``, but each batch goes to the collector as one request
+over a pooled, persistent connection. The request is acknowledged once the
+batch has been written. The collector has a single writer per survey: it
+takes the batches waiting from every connection and appends them with one
+backend write (one fsync for ``fsync`` batches). Adding replicas therefore
+adds batches to that write rather than processes to the lock queue. The
+collector writes to the store selected by its own ``BRIDGEAI_STORAGE``.
+
+If the collector cannot be reached or reports a failed write, the batch is
+appended to a spool file, ``data/spool/<survey>.jsonl``, and the submit still
+succeeds. Each replica retries the collector every ``REPLAY_SECONDS`` and
+sends spooled records back in order. Delivery is at least once: a batch that
+was written but whose acknowledgement was lost is sent again. Run
+``python -m bridgeai.collector replay`` to drain the spool by hand, and
+``python -m bridgeai.collector status`` to check a running collector.
+
+Messages are length-prefixed JSON: a 4-byte big-endian length, then
+``{"survey", "durable", "columns", "rows"}`` in one direction (rows are
+value lists, so column names are sent once per batch) and ``{"ok", "rows"}``
+or ``{"ok": false, "error"}`` in the other. Contact emails are not routed
+through the collector; they go to the contacts file as before.
+"""
+
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+
+from bridgeai.locking import FileLock
+from bridgeai.metrics import REGISTRY, STORAGE_WRITE_SECONDS
+from bridgeai.schema import SURVEYS, load_survey
+from bridgeai.storage import DATA_DIR, StorageBackend, open_backend
+
+DEFAULT_LISTEN = ("unix:" + os.path.join(DATA_DIR, "collector.sock") if hasattr(socket, "AF_UNIX")
+                  else "tcp:127.0.0.1:7650")
+COLLECTOR_ADDRESS = os.environ.get("BRIDGEAI_COLLECTOR")
+SPOOL_DIR = os.environ.get("BRIDGEAI_SPOOL_DIR", os.path.join(DATA_DIR, "spool"))
+TIMEOUT = float(os.environ.get("BRIDGEAI_COLLECTOR_TIMEOUT", "10"))
+POOL_SIZE = 4  # idle connections kept per address
+RETRY_SECONDS = 5.0  # after a failure, spool without trying the collector for this long
+REPLAY_SECONDS = 10.0
+REPLAY_BATCH = 500
+MAX_FRAME = 64 * 1024 * 1024
+
+FRAME_HEADER = struct.Struct(">I")
+
+COLLECTED = REGISTRY.counter("bridgeai_collector_rows_total", "Records written by the collector.")
+SPOOLED = REGISTRY.counter("bridgeai_spooled_total", "Records spooled because the collector was unreachable.")
+REPLAYED = REGISTRY.counter("bridgeai_replayed_total", "Spooled records delivered to the collector.")
+
+log = logging.getLogger(__name__)
+
+
+class CollectorUnavailable(Exception):
+    """The collector could not be reached or did not write the batch."""
+
+
+# ---------- wire format ----------
+def parse_address(spec):
+    """``unix:<path>`` / ``<path>`` or ``tcp:<host>:<port>`` -> ``(family, address)``."""
+    if spec.startswith("tcp:"):
+        host, _, port = spec[4:].rpartition(":")
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    return socket.AF_UNIX, spec[5:] if spec.startswith("unix:") else spec
+
+
+def send_frame(sock, message):
+    payload = json.dumps(message, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    sock.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock, size):
+    buf = bytearray(size)
+    view = memoryview(buf)
+    while view:
+        received = sock.recv_into(view)
+        if not received:
+            return None
+        view = view[received:]
+    return bytes(buf)
+
+
+def recv_frame(sock):
+    """The next message, or ``None`` if the peer closed the connection."""
+    header = _recv_exact(sock, FRAME_HEADER.size)
+    if header is None:
+        return None
+    (size,) = FRAME_HEADER.unpack(header)
+    if size > MAX_FRAME:
+        raise ValueError(f"frame of {size} bytes exceeds the {MAX_FRAME} byte limit")
+    payload = _recv_exact(sock, size)
+    if payload is None:
+        return None
+    return json.loads(payload)
+
+
+# ---------- server ----------
+class SurveyWriter:
+    """The single writer for one survey: batches from every connection go out in one append.
+
+    Group commit without a writer thread: the connection that finds the
+    writer idle writes everything queued so far, its own batch included,
+    while the others wait for it.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.written = 0
+        self._cond = threading.Condition()
+        self._queue = []  # [records, durable, done, error]
+        self._writing = False
+        self._closed = False
+
+    def write(self, records, durable=False):
+        """Queue a batch and return once it has been written."""
+        entry = [records, durable, False, None]
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"Writer for {self.backend.name} is closed")
+            self._queue.append(entry)
+            while not entry[2]:
+                if self._writing:
+                    self._cond.wait()
+                    continue
+                self._writing = True
+                batch, self._queue = self._queue, []
+                self._cond.release()
+                try:
+                    error = self._commit(batch)
+                finally:
+                    self._cond.acquire()
+                for queued in batch:
+                    queued[2], queued[3] = True, error
+                self._writing = False
+                self._cond.notify_all()
+        if entry[3] is not None:
+            raise entry[3]
+
+    def _commit(self, batch):
+        records = [record for entry in batch for record in entry[0]]
+        try:
+            with STORAGE_WRITE_SECONDS.time(survey=self.backend.name):
+                self.backend.append(records, durable=any(entry[1] for entry in batch))
+        except Exception as exc:  # reported to every waiting connection
+            log.error("Failed to write %d record(s) to %s: %s", len(records), self.backend.name, exc)
+            return exc
+        self.written += len(records)
+        COLLECTED.inc(len(records), survey=self.backend.name)
+        return None
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            while self._writing or self._queue:
+                self._cond.wait()
+        self.backend.close()
+
+
+class Collector:
+    """Routes requests to one :class:`SurveyWriter` per survey."""
+
+    def __init__(self, kind=None):
+        self.kind = kind
+        self._writers = {}
+        self._lock = threading.Lock()
+
+    def writer(self, name):
+        with self._lock:
+            writer = self._writers.get(name)
+            if writer is None:
+                if name not in SURVEYS:
+                    raise ValueError(f"Unknown survey: {name!r}")
+                survey = load_survey(name)
+                os.makedirs(os.path.dirname(os.path.abspath(survey.csv_path)), exist_ok=True)
+                backend = open_backend(survey.name, survey.csv_path, survey.stored_columns,
+                                       survey.multi_columns, survey.indexed, kind=self.kind)
+                writer = self._writers[name] = SurveyWriter(backend)
+            return writer
+
+    def handle(self, request):
+        if request.get("op") == "ping":
+            with self._lock:
+                written = {name: writer.written for name, writer in self._writers.items()}
+            return {"ok": True, "pid": os.getpid(), "written": written}
+        columns, rows = request.get("columns"), request.get("rows")
+        if not isinstance(columns, list) or not isinstance(rows, list):
+            return {"ok": False, "error": "request has no rows"}
+        records = [dict(zip(columns, row)) for row in rows]
+        try:
+            self.writer(request.get("survey")).write(records, bool(request.get("durable")))
+        except Exception as exc:
+            return {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+        return {"ok": True, "rows": len(records)}
+
+    def close(self):
+        with self._lock:
+            writers = list(self._writers.values())
+            self._writers.clear()
+        for writer in writers:
+            writer.close()
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        collector = self.server.collector
+        while True:
+            try:
+                request = recv_frame(self.request)
+                if request is None:
+                    return
+                send_frame(self.request, collector.handle(request))
+            except (OSError, ValueError) as exc:
+                log.warning("Dropping collector connection: %s", exc)
+                return
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+def make_server(listen, collector):
+    """Bind ``listen``; a leftover socket file from a dead collector is replaced."""
+    family, address = parse_address(listen)
+    if family == socket.AF_INET:
+        server = _TCPServer(address, _Handler)
+    else:
+        if os.path.exists(address):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(address)
+            except OSError:
+                os.remove(address)
+            else:
+                raise RuntimeError(f"A collector is already listening on {address}")
+            finally:
+                probe.close()
+        os.makedirs(os.path.dirname(os.path.abspath(address)), exist_ok=True)
+        server = _UnixServer(address, _Handler)
+    server.collector = collector
+    return server
+
+
+def serve(listen=DEFAULT_LISTEN, kind=None):
+    """Run a collector until SIGTERM or Ctrl-C, then write everything pending and exit."""
+    collector = Collector(kind)
+    server = make_server(listen, collector)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    log.info("Collector listening on %s", listen)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        collector.close()
+        if server.address_family == socket.AF_UNIX and os.path.exists(server.server_address):
+            os.remove(server.server_address)
+
+
+# ---------- client ----------
+class ConnectionPool:
+    """Persistent connections to one collector, reused across requests and threads."""
+
+    def __init__(self, address, size=POOL_SIZE, timeout=TIMEOUT):
+        self.address = address
+        self.family, self.target = parse_address(address)
+        self.size = size
+        self.timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+
+    def _connect(self):
+        sock = socket.socket(self.family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.target)
+        except OSError:
+            sock.close()
+            raise
+        if self.family == socket.AF_INET:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def request(self, message):
+        """Send one message and return the reply; raises :class:`CollectorUnavailable`.
+
+        A pooled connection the collector has since closed is retried once on
+        a fresh one. A timeout is not retried: the batch may have been written.
+        """
+        if time.monotonic() < self._down_until:
+            raise CollectorUnavailable(f"collector at {self.address} is down")
+        for attempt in range(2):
+            with self._lock:
+                sock = self._idle.pop() if self._idle else None
+            pooled = sock is not None
+            try:
+                if sock is None:
+                    sock = self._connect()
+                send_frame(sock, message)
+                reply = recv_frame(sock)
+                if reply is None:
+                    raise ConnectionResetError("collector closed the connection")
+            except (ConnectionResetError, BrokenPipeError) as exc:
+                if sock is not None:
+                    sock.close()
+                if pooled and attempt == 0:
+                    continue
+                self._down_until = time.monotonic() + RETRY_SECONDS
+                raise CollectorUnavailable(str(exc)) from exc
+            except (OSError, ValueError) as exc:
+                if sock is not None:
+                    sock.close()
+                self._down_until = time.monotonic() + RETRY_SECONDS
+                raise CollectorUnavailable(str(exc)) from exc
+            with self._lock:
+                if len(self._idle) < self.size:
+                    self._idle.append(sock)
+                    sock = None
+            if sock is not None:
+                sock.close()
+            if not reply.get("ok"):
+                raise CollectorUnavailable(reply.get("error", "write failed"))
+            return reply
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for sock in idle:
+            sock.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(address):
+    """The process-wide pool for ``address``."""
+    with _pools_lock:
+        pool = _pools.get(address)
+        if pool is None:
+            pool = _pools[address] = ConnectionPool(address)
+        return pool
+
+
+class CollectorBackend(StorageBackend):
+    """Sends batches to the collector, spooling them locally when it is unreachable.
+
+    A background thread replays the spool every ``replay_seconds`` (pass
+    ``None`` to only replay on request).
+    """
+
+    def __init__(self, address, name, columns, multi_columns=(), indexed=(), spool_dir=SPOOL_DIR,
+                 replay_seconds=REPLAY_SECONDS):
+        super().__init__(name, columns, multi_columns, indexed)
+        self.pool = get_pool(address)
+        self.spool_dir = spool_dir
+        self.spool_path = os.path.join(spool_dir, f"{name}.jsonl")
+        self._warned = False
+        self._stop = threading.Event()
+        self._replay_lock = threading.Lock()
+        self._replayer = None
+        if replay_seconds:
+            self._replayer = threading.Thread(target=self._run, args=(replay_seconds,),
+                                              name=f"replay:{name}", daemon=True)
+            self._replayer.start()
+
+    def files(self):
+        return [self.spool_path]
+
+    def append(self, records, durable=False):
+        try:
+            self._send(records, durable)
+            self._warned = False
+        except CollectorUnavailable as exc:
+            if not self._warned:
+                log.warning("Collector unavailable (%s); spooling %s records to %s",
+                            exc, self.name, self.spool_path)
+                self._warned = True
+            self._spool(records, durable)
+
+    def _send(self, records, durable):
+        columns = self.columns
+        rows = [[record.get(column, "") for column in columns] for record in records]
+        self.pool.request({"survey": self.name, "durable": durable, "columns": columns, "rows": rows})
+
+    def _spool(self, records, durable):
+        os.makedirs(self.spool_dir, exist_ok=True)
+        payload = "".join(json.dumps(r, separators=(",", ":"), ensure_ascii=False) + "\n"
+                          for r in records).encode("utf-8")
+        with FileLock(self.spool_path):
+            with open(self.spool_path, "ab") as f:
+                f.write(payload)
+                if durable:
+                    f.flush()
+                    os.fsync(f.fileno())
+        SPOOLED.inc(len(records), survey=self.name)
+
+    def close(self):
+        self._stop.set()
+        if self._replayer is not None:
+            self._replayer.join()
+
+    # ---------- replay ----------
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.replay()
+            except CollectorUnavailable:
+                pass
+            except Exception as exc:  # keep retrying; the spool is left as it was
+                log.error("Failed to replay the %s spool: %s", self.name, exc)
+
+    def _claim(self):
+        """Spool files to send: ours, orphans of dead processes, and the current spool moved aside.
+
+        Claimed files are named ``<spool>.<pid>[-<previous owner>...].replay``.
+        """
+        pid = str(os.getpid())
+        mine = f"{self.spool_path}.{pid}.replay"
+        prefix = os.path.basename(self.spool_path) + "."
+        try:
+            names = sorted(n for n in os.listdir(self.spool_dir)
+                           if n.startswith(prefix) and n.endswith(".replay"))
+        except FileNotFoundError:
+            return []
+        claimed = []
+        for name in names:
+            path = os.path.join(self.spool_dir, name)
+            owner = name[len(prefix):-len(".replay")]
+            if owner.split("-")[0] == pid:
+                claimed.append(path)
+            elif owner.split("-")[0].isdigit() and not _alive(int(owner.split("-")[0])):
+                target = f"{self.spool_path}.{pid}-{owner}.replay"
+                try:
+                    os.replace(path, target)
+                except FileNotFoundError:  # another replica claimed it first
+                    continue
+                claimed.append(target)
+        if mine not in claimed and os.path.exists(self.spool_path):
+            with FileLock(self.spool_path):
+                if os.path.getsize(self.spool_path):
+                    os.replace(self.spool_path, mine)
+                    claimed.append(mine)
+        return claimed
+
+    def replay(self):
+        """Send spooled records to the collector; returns how many were delivered.
+
+        Raises :class:`CollectorUnavailable` if it is still down; what was
+        not acknowledged stays spooled.
+        """
+        with self._replay_lock:
+            delivered = 0
+            for path in self._claim():
+                delivered += self._replay_file(path)
+            return delivered
+
+    def _replay_file(self, path):
+        """Send one claimed spool file in batches. On failure, only the unsent part is kept."""
+        delivered = 0
+        start = 0  # offset of the first record not yet acknowledged
+        try:
+            with open(path, "rb") as f:
+                batch = []
+                while True:
+                    line = f.readline()
+                    if line.strip():
+                        try:
+                            batch.append(json.loads(line))
+                        except ValueError:  # torn by a crash while spooling
+                            log.warning("Skipping an unreadable line in %s", path)
+                    if batch and (not line or len(batch) >= REPLAY_BATCH):
+                        self._send(batch, durable=True)
+                        REPLAYED.inc(len(batch), survey=self.name)
+                        delivered += len(batch)
+                        batch = []
+                        start = f.tell()
+                    if not line:
+                        break
+        except CollectorUnavailable:
+            if start:
+                _drop_front(path, start)
+            raise
+        os.remove(path)
+        log.info("Replayed %d spooled %s records", delivered, self.name)
+        return delivered
+
+
+def _drop_front(path, offset):
+    """Rewrite ``path`` without its first ``offset`` bytes."""
+    tmp_path = path + ".tmp"
+    with open(path, "rb") as src, open(tmp_path, "wb") as dst:
+        src.seek(offset)
+        while True:
+            chunk = src.read(1 << 20)
+            if not chunk:
+                break
+            dst.write(chunk)
+        dst.flush()
+        os.fsync(dst.fileno())
+    os.replace(tmp_path, path)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# ---------- command line ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Single-writer collector for survey submissions.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="accept submissions and write them")
+    serve_parser.add_argument("--listen", default=COLLECTOR_ADDRESS or DEFAULT_LISTEN,
+                              help="unix:<path> or tcp:<host>:<port> (default %(default)s)")
+    serve_parser.add_argument("--storage", choices=["csv", "sqlite", "segments"],
+                              help="backend to write to (default: BRIDGEAI_STORAGE)")
+    for command, text in (("status", "ping a running collector"),
+                          ("replay", "send spooled records to the collector now")):
+        commands.add_parser(command, help=text).add_argument(
+            "--address", default=COLLECTOR_ADDRESS or DEFAULT_LISTEN,
+            help="collector address (default %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+        try:
+            serve(args.listen, kind=args.storage)
+        except (OSError, RuntimeError) as exc:
+            parser.exit(2, f"{exc}\n")
+        return 0
+
+    pool = get_pool(args.address)
+    if args.command == "status":
+        try:
+            reply = pool.request({"op": "ping"})
+        except CollectorUnavailable as exc:
+            print(f"No collector at {args.address}: {exc}")
+            return 1
+        written = ", ".join(f"{name} {rows}" for name, rows in sorted(reply["written"].items()))
+        print(f"Collector at {args.address} (pid {reply['pid']}): rows written {written or 'none yet'}")
+        return 0
+
+    status = 0
+    for name in SURVEYS:
+        survey = load_survey(name)
+        backend = CollectorBackend(args.address, survey.name, survey.stored_columns,
+                                   survey.multi_columns, survey.indexed, replay_seconds=None)
+        try:
+            print(f"{name}: replayed {backend.replay()} records")
+        except CollectorUnavailable as exc:
+            print(f"{name}: collector unavailable ({exc}); records stay spooled")
+            status = 1
+        finally:
+            backend.close()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+# --------------------------------------------------------
+# Columnar (Parquet / Arrow IPC) export of survey responses
+# --------------------------------------------------------
+"""Convert a response CSV into a typed columnar file.
+
+Column layout, derived from the survey schema:
+
+* single-choice answers – dictionary-encoded strings (option list first,
+  any unexpected values appended, so nothing is lost);
+* sliders – ``int8``;
+* multi-selects – one boolean column per option, named
+  ``<column>__<option_slug>`` (Arrow stores booleans bit-packed);
+* free text – plain strings; ``timestamp`` – microsecond timestamps.
+
+Arrow IPC (``.arrow``) files can be memory-mapped by :func:`load`, so a
+million-row file opens without copying. Requires ``pyarrow``::
+
+    python -m bridgeai.columnar customer --format arrow
+"""
+
+import argparse
+import os
+import re
+import sys
+from datetime import datetime
+
+from bridgeai.reader import iter_survey_rows
+from bridgeai.schema import CATEGORY, INTEGER, MULTI, SURVEYS, TIMESTAMP, load_survey
+from bridgeai.segments import response_source, segment_paths
+from bridgeai.storage import DATA_DIR, MULTI_SEPARATOR
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = None
+
+BATCH_ROWS = 65536
+EXPORT_DIR = os.path.join(DATA_DIR, "exports")
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Columnar export needs pyarrow: pip install pyarrow")
+
+
+def slug(text):
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
+
+
+def option_columns(survey, column):
+    """``{option: boolean_column_name}`` for a multi-select column."""
+    names = {}
+    for option in survey.question_for(column).options:
+        name = f"{column}__{slug(option)}"
+        while name in names.values():
+            name += "_"
+        names[option] = name
+    return names
+
+
+def _timestamp(value):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+class ColumnarEncoder:
+    """Turn batches of CSV records into Arrow record batches."""
+
+    def __init__(self, survey):
+        _require_pyarrow()
+        self.survey = survey
+        self.multi_names = {c: option_columns(survey, c) for c in survey.multi_columns}
+        # Dictionaries grow when unexpected values appear, never reorder.
+        self.dictionaries = {
+            c: list(survey.question_for(c).options)
+            for c in survey.columns if survey.types[c] == CATEGORY
+        }
+        self.schema = pa.schema(self._fields())
+
+    def _fields(self):
+        fields = []
+        for column in self.survey.columns:
+            kind = self.survey.types[column]
+            if kind == TIMESTAMP:
+                fields.append(pa.field(column, pa.timestamp("us")))
+            elif kind == CATEGORY:
+                fields.append(pa.field(column, pa.dictionary(pa.int16(), pa.string())))
+            elif kind == INTEGER:
+                fields.append(pa.field(column, pa.int8()))
+            elif kind == MULTI:
+                fields.extend(pa.field(name, pa.bool_()) for name in self.multi_names[column].values())
+            else:
+                fields.append(pa.field(column, pa.string()))
+        return fields
+
+    def _category(self, column, values):
+        dictionary = self.dictionaries[column]
+        values = pc.if_else(pc.equal(values, ""), pa.scalar(None, pa.string()), values)
+        indices = pc.index_in(values, value_set=pa.array(dictionary, pa.string()))
+        unknown = pc.and_(pc.is_null(indices), pc.is_valid(values))
+        if pc.any(unknown).as_py():
+            for value in pc.unique(pc.filter(values, unknown)).to_pylist():
+                dictionary.append(value)
+            indices = pc.index_in(values, value_set=pa.array(dictionary, pa.string()))
+        return pa.DictionaryArray.from_arrays(
+            pc.cast(indices, pa.int16()), pa.array(dictionary, pa.string())
+        )
+
+    def _timestamps(self, values):
+        try:
+            return pc.cast(values, pa.timestamp("us"))
+        except pa.ArrowInvalid:
+            return pa.array([_timestamp(v) for v in values.to_pylist()], pa.timestamp("us"))
+
+    def _options(self, column, values):
+        lists = pc.split_pattern(values, pattern=MULTI_SEPARATOR)
+        flat = pc.list_flatten(lists)
+        parents = pc.list_parent_indices(lists)
+        rows = pa.array(range(len(values)), pa.int64())
+        for option in self.multi_names[column]:
+            hits = pc.filter(parents, pc.equal(flat, option))
+            yield pc.is_in(rows, value_set=hits)
+
+    def encode(self, header, rows):
+        """Encode positional ``rows`` laid out by ``header`` into a record batch."""
+        positions = {name: i for i, name in enumerate(header)}
+        columns = list(zip(*rows)) if rows else [() for _ in header]
+        blank = [""] * len(rows)
+        arrays = []
+        for column in self.survey.columns:
+            kind = self.survey.types[column]
+            index = positions.get(column)
+            values = pa.array(columns[index] if index is not None else blank, pa.string())
+            if kind == TIMESTAMP:
+                arrays.append(self._timestamps(values))
+            elif kind == CATEGORY:
+                arrays.append(self._category(column, values))
+            elif kind == INTEGER:
+                stripped = pc.utf8_trim_whitespace(values)
+                numbers = pc.if_else(pc.equal(stripped, ""), pa.scalar(None, pa.string()), stripped)
+                arrays.append(pc.cast(numbers, pa.int8()))
+            elif kind == MULTI:
+                arrays.extend(self._options(column, values))
+            else:
+                arrays.append(values)
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+
+def iter_batches(survey, header, rows, batch_rows=BATCH_ROWS):
+    """Encode positional rows laid out by ``header`` into Arrow record batches."""
+    encoder = ColumnarEncoder(survey)
+    width = len(header)
+    batch = []
+    for row in rows:
+        if len(row) != width:
+            continue
+        batch.append(row)
+        if len(batch) >= batch_rows:
+            yield encoder.encode(header, batch)
+            batch = []
+    if batch:
+        yield encoder.encode(header, batch)
+
+
+def export(survey, out_path, source=None, fmt=None, batch_rows=BATCH_ROWS):
+    """Write ``source`` to ``out_path``. Returns the row count.
+
+    ``source`` is a response CSV, a list of them, or a segment directory; it
+    defaults to wherever the configured backend writes the survey.
+    """
+    _require_pyarrow()
+    fmt = fmt or ("arrow" if out_path.endswith((".arrow", ".feather")) else "parquet")
+    source = source or response_source(survey)
+    if isinstance(source, str):
+        sources = segment_paths(source) if os.path.isdir(source) else [source]
+    else:
+        sources = list(source)
+    # Rows of every schema version arrive mapped onto the current columns.
+    header = list(survey.columns)
+    rows = (values for path in sources for values, _ in iter_survey_rows(survey, path))
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    tmp_path = out_path + ".tmp"
+    count = 0
+    if fmt == "parquet":
+        writer = None
+        for batch in iter_batches(survey, header, rows, batch_rows):
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, batch.schema, compression="zstd")
+            writer.write_batch(batch)
+            count += batch.num_rows
+        if writer is None:
+            pq.write_table(ColumnarEncoder(survey).schema.empty_table(), tmp_path)
+        else:
+            writer.close()
+    elif fmt == "arrow":
+        # The IPC file format needs one dictionary per column, so unify first.
+        schema = ColumnarEncoder(survey).schema
+        batches = list(iter_batches(survey, header, rows, batch_rows))
+        table = pa.Table.from_batches(batches, schema=schema).unify_dictionaries()
+        count = table.num_rows
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table, max_chunksize=batch_rows)
+    else:
+        raise ValueError(f"Unknown columnar format: {fmt!r}")
+    os.replace(tmp_path, out_path)
+    return count
+
+
+def load(path):
+    """Open an exported file; Arrow IPC files are memory-mapped, not copied."""
+    _require_pyarrow()
+    if path.endswith((".arrow", ".feather")):
+        return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    return pq.read_table(path, memory_map=True)
+
+
+def crosstab(table, survey, row_column, col_column):
+    """Vectorized crosstab as ``{row_value: {col_value: count}}``.
+
+    ``col_column`` may be a multi-select; its boolean columns are summed per
+    row group instead of exploding strings.
+    """
+    _require_pyarrow()
+    if survey.types.get(col_column) == MULTI:
+        names = option_columns(survey, col_column)
+        grouped = table.group_by(row_column).aggregate(
+            [(name, "sum") for name in names.values()]
+        )
+        keys = grouped.column(row_column).to_pylist()
+        result = {key: {} for key in keys}
+        for option, name in names.items():
+            for key, total in zip(keys, grouped.column(f"{name}_sum").to_pylist()):
+                result[key][option] = total or 0
+        return result
+
+    left = table.column(row_column)
+    right = table.column(col_column)
+    pairs = pa.table({"a": pc.cast(left, pa.string()) if pa.types.is_dictionary(left.type) else left,
+                      "b": pc.cast(right, pa.string()) if pa.types.is_dictionary(right.type) else right})
+    grouped = pairs.group_by(["a", "b"]).aggregate([([], "count_all")])
+    result = {}
+    for a, b, n in zip(grouped.column("a").to_pylist(), grouped.column("b").to_pylist(),
+                       grouped.column("count_all").to_pylist()):
+        result.setdefault(a, {})[b] = n
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export survey responses to Parquet or Arrow IPC.")
+    parser.add_argument("survey", choices=SURVEYS)
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    parser.add_argument("--source", help="response CSV or segment directory "
+                                         "(default: where the survey is stored)")
+    parser.add_argument("--out", help="output path (default: data/exports/<survey>.<format>)")
+    args = parser.parse_args(argv)
+
+    survey = load_survey(args.survey)
+    out_path = args.out or os.path.join(EXPORT_DIR, f"{survey.name}.{args.format}")
+    rows = export(survey, out_path, source=args.source, fmt=args.format)
+    print(f"Wrote {rows} rows to {out_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
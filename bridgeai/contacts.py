@@ -0,0 +1,184 @@
+# --------------------------------------------------------
+# Contact (email) capture, kept apart from the response rows
+# --------------------------------------------------------
+"""Background capture of the email addresses respondents leave.
+
+Questions marked ``pii=True`` in the schema are written blank in the
+response files. :func:`capture` hands their answers to a
+:class:`ContactQueue` instead and returns immediately. A worker thread then
+normalizes and validates each address, drops duplicates and appends the
+rest to a separate contacts file (``BRIDGEAI_CONTACTS_PATH``, default
+``data/contacts.csv``).
+
+Duplicates are detected per ``(survey, purpose, address)`` against an
+in-memory index of 16-byte digests. It is rebuilt from the file on start and
+caught up with rows appended by other processes before each write, under the
+same file lock as the write itself.
+"""
+
+import atexit
+import hashlib
+import logging
+import os
+import queue
+import re
+import threading
+
+from bridgeai.locking import FileLock, append_rows
+from bridgeai.reader import iter_records, read_header
+from bridgeai.storage import DATA_DIR
+
+CONTACT_COLUMNS = ("timestamp", "survey", "purpose", "email", "email_hash")
+DEFAULT_CONTACTS_PATH = os.environ.get(
+    "BRIDGEAI_CONTACTS_PATH", os.path.join(DATA_DIR, "contacts.csv")
+)
+
+# Deliberately loose: one "@", no spaces, a dot in the domain.
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+MAX_EMAIL_LENGTH = 254
+
+log = logging.getLogger(__name__)
+
+
+def normalize_email(value):
+    """Return the address trimmed and lower-cased, or ``None`` if it is invalid."""
+    email = (value or "").strip().lower()
+    if len(email) > MAX_EMAIL_LENGTH or not EMAIL_RE.match(email):
+        return None
+    return email
+
+
+def email_hash(email):
+    """Stable hex digest of a normalized address (safe to log or join on)."""
+    return hashlib.sha256(email.encode("utf-8")).hexdigest()
+
+
+def _key(survey, purpose, digest):
+    return hashlib.blake2b(f"{survey}\0{purpose}\0{digest}".encode(), digest_size=16).digest()
+
+
+class ContactQueue:
+    """Validate, dedupe and store contacts on a background thread."""
+
+    def __init__(self, path=DEFAULT_CONTACTS_PATH):
+        self.path = path
+        self.accepted = 0
+        self.rejected = 0
+        self.duplicates = 0
+        self._queue = queue.Queue()
+        self._seen = set()
+        self._offset = None
+        self._thread = threading.Thread(target=self._run, name="contacts", daemon=True)
+        self._thread.start()
+
+    # ---------- public API ----------
+    def put(self, survey, purpose, email, timestamp):
+        """Queue one address; never blocks on I/O."""
+        self._queue.put((timestamp, survey, purpose, email))
+
+    def join(self):
+        """Block until everything queued so far has been processed."""
+        self._queue.join()
+
+    def close(self):
+        """Process what is queued and stop the worker."""
+        self._queue.put(None)
+        self._thread.join()
+
+    # ---------- internals ----------
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            while True:  # drain whatever else is waiting into the same write
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in items
+            try:
+                self._store([item for item in items if item is not None])
+            except Exception as exc:  # keep the worker alive
+                log.error("Failed to store %d contact(s): %s", len(items), exc)
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _catch_up(self):
+        """Add rows written since the last look (by any process) to the index.
+
+        The caller holds the contacts file lock.
+        """
+        if self._offset is None:
+            header, offset = read_header(self.path, lock=False)
+            if header is None:
+                return
+            if list(header) != list(CONTACT_COLUMNS):
+                raise RuntimeError(f"{self.path} does not look like a contacts file")
+            self._offset = offset
+        for row, self._offset in iter_records(self.path, CONTACT_COLUMNS, self._offset, lock=False):
+            self._seen.add(_key(row["survey"], row["purpose"], row["email_hash"]))
+
+    def _store(self, items):
+        if not items:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # One lock over catch-up, dedupe and append, so two processes cannot
+        # both store the same address.
+        with FileLock(self.path):
+            self._catch_up()
+            rows, keys = [], set()
+            for timestamp, survey, purpose, value in items:
+                email = normalize_email(value)
+                if email is None:
+                    self.rejected += 1
+                    continue
+                digest = email_hash(email)
+                key = _key(survey, purpose, digest)
+                if key in self._seen or key in keys:
+                    self.duplicates += 1
+                    continue
+                keys.add(key)
+                rows.append([timestamp, survey, purpose, email, digest])
+            if rows:
+                append_rows(self.path, CONTACT_COLUMNS, rows, lock=False)
+                self.accepted += len(rows)
+        # Only once written: a failed write must not mark the addresses as seen.
+        self._seen.update(keys)
+
+
+# ---------- process-wide queue ----------
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_contact_queue():
+    """Return the process-wide contact queue, starting it on first use."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = ContactQueue()
+        return _queue
+
+
+def capture(survey, answers, timestamp):
+    """Queue the PII answers of one submission. Returns the number queued."""
+    contacts = survey.contact_answers(answers)
+    if contacts:
+        contact_queue = get_contact_queue()
+        for purpose, email in contacts.items():
+            contact_queue.put(survey.name, purpose, email, timestamp)
+    return len(contacts)
+
+
+def drain():
+    """Flush and stop the process-wide queue. Registered with ``atexit``."""
+    global _queue
+    with _queue_lock:
+        contact_queue, _queue = _queue, None
+    if contact_queue is not None:
+        contact_queue.close()
+
+
+atexit.register(drain)
@@ -0,0 +1,295 @@
+# --------------------------------------------------------
+# Duplicate and spam screening before a response is written
+# --------------------------------------------------------
+"""Catch repeated submissions without rescanning the response file.
+
+Each submission is reduced to a 16-byte *fingerprint*: a hash of the
+normalized stored answers. Text is case-folded, its punctuation dropped and
+its whitespace collapsed; multi-selects are sorted. The hash also covers
+the contact emails, so two people giving the same answers differ. Each
+check is O(1) against two tiers:
+
+* a bounded in-memory LRU of recent fingerprints and the session that sent
+  them: exact and cheap, but lost on restart;
+* an on-disk Bloom filter (``data/dedupe/<survey>.bloom``, memory-mapped).
+  It survives restarts and is shared by every process. It has two
+  generations: when the active one fills up, the older one is cleared and
+  takes over. Memory stays fixed and the oldest fingerprints age out.
+
+:meth:`SubmissionFilter.check` returns a :class:`Verdict` and records
+nothing. The fingerprint, the rate-limit slot and any flag are recorded by
+:meth:`SubmissionFilter.commit`, which the apps call only once the sink has
+taken the record. A write that fails therefore does not turn the
+respondent's retry into a "duplicate". Verdicts:
+
+* ``reject`` – the same session already sent these answers, or it went over
+  ``BRIDGEAI_SUBMIT_LIMIT`` submissions (default ``3/600``: three per ten
+  minutes);
+* ``flag``   – the answers were seen from another session, or only the Bloom
+  filter knows them (it can give false positives). The response is written
+  and also listed in ``data/dedupe/<survey>.flags.csv`` for analysts;
+* ``accept`` – anything else.
+
+``BRIDGEAI_DEDUPE=off`` turns screening off.
+"""
+
+import hashlib
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+
+from bridgeai.locking import FileLock, append_rows
+from bridgeai.metrics import SCREENED
+from bridgeai.storage import DATA_DIR, MULTI_SEPARATOR
+
+DEDUPE_DIR = os.path.join(DATA_DIR, "dedupe")
+ENABLED = os.environ.get("BRIDGEAI_DEDUPE", "on") != "off"
+DEFAULT_LIMIT = os.environ.get("BRIDGEAI_SUBMIT_LIMIT", "3/600")
+
+LRU_SIZE = 10_000
+BLOOM_BITS = 1 << 20  # per generation: ~1% false positives at 100k entries
+BLOOM_HASHES = 7
+BLOOM_CAPACITY = 100_000  # entries per generation before it rotates
+
+FLAG_COLUMNS = ("timestamp", "reason", "fingerprint")
+
+ACCEPT = "accept"
+FLAG = "flag"
+REJECT = "reject"
+
+REJECT_MESSAGES = {
+    "duplicate": "It looks like you already sent these answers. Thank you! Each response is counted once.",
+    "rate limit": "You have submitted several times in the last few minutes. Please wait a little "
+                  "before trying again.",
+}
+
+_UNSEEN = object()
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+
+@dataclass(frozen=True)
+class Verdict:
+    status: str
+    reason: str = None
+    fingerprint: str = None
+
+    @property
+    def rejected(self):
+        return self.status == REJECT
+
+    @property
+    def message(self):
+        """User-facing explanation of a rejection."""
+        return REJECT_MESSAGES.get(self.reason)
+
+
+def _normalize(value):
+    if isinstance(value, (list, tuple)):
+        return MULTI_SEPARATOR.join(sorted(_normalize(v) for v in value))
+    text = unicodedata.normalize("NFKC", str(value)).casefold()
+    return _SPACES.sub(" ", _PUNCTUATION.sub("", text)).strip()
+
+
+def fingerprint(survey, answers):
+    """16-byte digest of the normalized answers (timestamp and version excluded)."""
+    record = survey.build_record(answers, "")
+    parts = [_normalize(record[c]) for c in survey.columns if c != "timestamp"]
+    contacts = survey.contact_answers(answers)
+    parts += [_normalize(contacts[c]) for c in sorted(contacts)]
+    return hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=16).digest()
+
+
+def parse_limit(spec):
+    """``"3/600"`` -> ``(3, 600.0)``: at most 3 submissions per 600 seconds."""
+    count, _, seconds = spec.partition("/")
+    return int(count), float(seconds or 60)
+
+
+# ---------- on-disk Bloom filter ----------
+class BloomFilter:
+    """Two-generation Bloom filter in a memory-mapped file.
+
+    Layout: a 64-byte header (magic, bits, hashes, active generation and
+    one count per generation), then the two bit arrays.
+    """
+
+    MAGIC = b"BRBLOOM1"
+    HEADER = struct.Struct("<8sQIIQQ")
+    HEADER_SIZE = 64
+
+    def __init__(self, path, bits=BLOOM_BITS, hashes=BLOOM_HASHES, capacity=BLOOM_CAPACITY):
+        self.path = path
+        self.capacity = capacity
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with FileLock(path):
+            if not os.path.exists(path) or os.path.getsize(path) < self.HEADER_SIZE:
+                with open(path, "wb") as f:
+                    header = self.HEADER.pack(self.MAGIC, bits, hashes, 0, 0, 0)
+                    f.write(header.ljust(self.HEADER_SIZE, b"\0"))
+                    f.truncate(self.HEADER_SIZE + 2 * bits // 8)
+            self._file = open(path, "r+b")
+            self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, self.bits, self.hashes, _, _, _ = self.HEADER.unpack_from(self._map)
+        if magic != self.MAGIC:
+            raise ValueError(f"{path} is not a Bloom filter file")
+        self._lock = threading.Lock()
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def _positions(self, key):
+        # Double hashing (Kirsch-Mitzenmacher) from one 16-byte digest.
+        h1, h2 = struct.unpack("<QQ", key[:16].ljust(16, b"\0"))
+        h2 |= 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def _has(self, generation, positions):
+        base = self.HEADER_SIZE + generation * self.bits // 8
+        m = self._map
+        return all(m[base + p // 8] & (1 << (p % 8)) for p in positions)
+
+    def __contains__(self, key):
+        positions = self._positions(key)
+        return self._has(0, positions) or self._has(1, positions)
+
+    def add(self, key):
+        """Record ``key`` in the active generation, rotating it when full."""
+        positions = self._positions(key)
+        with self._lock, FileLock(self.path):
+            m = self._map
+            _, bits, hashes, active, count0, count1 = self.HEADER.unpack_from(m)
+            counts = [count0, count1]
+            if counts[active] >= self.capacity:
+                active ^= 1
+                start = self.HEADER_SIZE + active * bits // 8
+                m[start:start + bits // 8] = bytes(bits // 8)
+                counts[active] = 0
+            base = self.HEADER_SIZE + active * bits // 8
+            for p in positions:
+                m[base + p // 8] |= 1 << (p % 8)
+            counts[active] += 1
+            self.HEADER.pack_into(m, 0, self.MAGIC, bits, hashes, active, *counts)
+
+
+# ---------- filter ----------
+class SubmissionFilter:
+    """Screen submissions for one survey (see the module docstring)."""
+
+    def __init__(self, survey, directory=DEDUPE_DIR, lru_size=LRU_SIZE, limit=DEFAULT_LIMIT,
+                 bloom=None):
+        self.survey = survey
+        self.lru_size = lru_size
+        self.max_submits, self.window = parse_limit(limit)
+        self.bloom = bloom or BloomFilter(os.path.join(directory, f"{survey.name}.bloom"))
+        self.flags_path = os.path.join(directory, f"{survey.name}.flags.csv")
+        self._recent = OrderedDict()  # fingerprint -> session
+        self._sessions = OrderedDict()  # session -> deque of submit times
+        self._lock = threading.Lock()
+
+    def _recent_times(self, session, now):
+        """The session's submit times still inside the rate-limit window."""
+        times = self._sessions.get(session)
+        if times is None:
+            return ()
+        self._sessions.move_to_end(session)
+        while times and now - times[0] > self.window:
+            times.popleft()
+        return times
+
+    def check(self, answers, session=None, now=None):
+        """Screen one submission. Records nothing; see :meth:`commit`."""
+        key = fingerprint(self.survey, answers)
+        digest = key.hex()
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            seen_by = self._recent.get(key, _UNSEEN)
+            if session is not None and seen_by == session:
+                return Verdict(REJECT, "duplicate", digest)
+            if session is not None and len(self._recent_times(session, now)) >= self.max_submits:
+                return Verdict(REJECT, "rate limit", digest)
+        if seen_by is not _UNSEEN:
+            return Verdict(FLAG, "duplicate from another session", digest)
+        if key in self.bloom:
+            return Verdict(FLAG, "probable duplicate", digest)
+        return Verdict(ACCEPT, None, digest)
+
+    def commit(self, verdict, session=None, timestamp=None, now=None):
+        """Remember a submission once it has been written.
+
+        Called only after the sink accepted the record, so a failed write
+        leaves nothing behind and the respondent's retry is not taken for a
+        duplicate.
+        """
+        if verdict.rejected or verdict.fingerprint is None:
+            return
+        key = bytes.fromhex(verdict.fingerprint)
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            new = key not in self._recent
+            self._recent[key] = session
+            self._recent.move_to_end(key)
+            if len(self._recent) > self.lru_size:
+                self._recent.popitem(last=False)
+            if session is not None:
+                times = self._sessions.get(session)
+                if times is None:
+                    times = self._sessions[session] = deque()
+                    if len(self._sessions) > self.lru_size:
+                        self._sessions.popitem(last=False)
+                times.append(now)
+        if new:
+            self.bloom.add(key)
+        if verdict.status == FLAG:
+            append_rows(self.flags_path, FLAG_COLUMNS, [[timestamp or "", verdict.reason, verdict.fingerprint]])
+
+    def close(self):
+        self.bloom.close()
+
+
+def session_id():
+    """The current Streamlit session's id, or ``None`` outside a session."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
+_filters = {}
+_filters_lock = threading.Lock()
+
+
+def get_filter(survey):
+    """The shared filter for ``survey``, created on first use."""
+    with _filters_lock:
+        screen_filter = _filters.get(survey.name)
+        if screen_filter is None:
+            screen_filter = _filters[survey.name] = SubmissionFilter(survey)
+        return screen_filter
+
+
+def screen(survey, answers):
+    """Check a submission from the current session; accepts everything when disabled.
+
+    Nothing is remembered until :func:`commit` is called with the verdict.
+    """
+    if not ENABLED:
+        return Verdict(ACCEPT)
+    verdict = get_filter(survey).check(answers, session_id())
+    SCREENED.inc(survey=survey.name, status=verdict.status, reason=verdict.reason or "")
+    return verdict
+
+
+def commit(survey, verdict, timestamp=None):
+    """Remember a screened submission from the current session after it was written."""
+    if ENABLED:
+        get_filter(survey).commit(verdict, session_id(), timestamp)
@@ -0,0 +1,180 @@
+# --------------------------------------------------------
+# Resumable drafts of unfinished responses
+# --------------------------------------------------------
+"""Keep partial answers so a dropped session can pick up where it stopped.
+
+A draft is saved:
+
+* in paged mode, every time the respondent moves to another page;
+* in single-page mode, when they press "Save and finish later". A
+  Streamlit form sends nothing to the server before one of its buttons is
+  pressed, so there is nothing to save in between.
+
+Drafts are keyed by a resume token. The token is kept in the session and
+in the page URL (``?resume=<token>``), so reloading the page, a websocket
+reconnect or reopening the link on the same device restores the answers.
+It is removed once the response is submitted.
+
+The :class:`DraftStore` is an in-process, expiring key-value cache. Values
+are zlib-compressed JSON; a 30-question draft is a few hundred bytes.
+Entries expire after ``BRIDGEAI_DRAFT_TTL_HOURS`` (default 48). The store
+holds at most ``BRIDGEAI_DRAFT_MB`` (default 16) of compressed drafts:
+past that, the least recently saved drafts are evicted first. Drafts do
+not survive a server restart.
+"""
+
+import json
+import os
+import re
+import secrets
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import streamlit as st
+
+from bridgeai.metrics import REGISTRY
+
+DRAFT_TTL = float(os.environ.get("BRIDGEAI_DRAFT_TTL_HOURS", "48")) * 3600
+DRAFT_MAX_BYTES = int(float(os.environ.get("BRIDGEAI_DRAFT_MB", "16")) * 1024 * 1024)
+MAX_DRAFT_BYTES = 64 * 1024  # compressed; anything bigger is not a survey draft
+
+TOKEN_PARAM = "resume"
+_TOKEN_RE = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+_ENTRY_OVERHEAD = 200  # rough per-entry bytes beyond the blob (key, tuple, dict slot)
+
+
+class DraftStore:
+    """Thread-safe TTL cache of compressed drafts with a total size cap.
+
+    Entries are kept in save order, which with a fixed TTL is also expiry
+    order, so evicting expired or excess entries only ever pops the oldest.
+    """
+
+    def __init__(self, ttl=DRAFT_TTL, max_bytes=DRAFT_MAX_BYTES, max_entry_bytes=MAX_DRAFT_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.evicted = 0
+        self._items = OrderedDict()  # key -> (expires_at, blob)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+    @property
+    def bytes(self):
+        with self._lock:
+            return self._bytes
+
+    @staticmethod
+    def _size(key, blob):
+        return len(key) + len(blob) + _ENTRY_OVERHEAD
+
+    def _pop(self, key):
+        _, blob = self._items.pop(key)
+        self._bytes -= self._size(key, blob)
+
+    def _evict(self, now):
+        while self._items:
+            key, (expires_at, _) = next(iter(self._items.items()))
+            if expires_at > now and self._bytes <= self.max_bytes:
+                break
+            self._pop(key)
+            self.evicted += 1
+
+    def put(self, key, value, now=None):
+        """Save ``value`` (JSON-serializable) under ``key``. Returns False if it is too big."""
+        blob = zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+        if len(blob) > self.max_entry_bytes:
+            return False
+        now = time.time() if now is None else now
+        with self._lock:
+            if key in self._items:
+                self._pop(key)
+            self._items[key] = (now + self.ttl, blob)
+            self._bytes += self._size(key, blob)
+            self._evict(now)
+        return True
+
+    def get(self, key, now=None):
+        """The saved value, or ``None`` if there is none or it expired."""
+        now = time.time() if now is None else now
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, blob = item
+            if expires_at <= now:
+                self._pop(key)
+                return None
+        return json.loads(zlib.decompress(blob))
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._items:
+                self._pop(key)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_draft_store():
+    """The process-wide draft store, shared by every session."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DraftStore()
+            REGISTRY.gauge("bridgeai_draft_entries", "Drafts held in memory.").set_function(
+                lambda: len(_store))
+            REGISTRY.gauge("bridgeai_draft_bytes", "Approximate memory used by drafts.").set_function(
+                lambda: _store.bytes)
+        return _store
+
+
+# ---------- session helpers ----------
+def resume_token(create=False):
+    """This session's resume token, taken from the URL on first use.
+
+    With ``create`` a new token is issued (and put in the URL) if there is none.
+    """
+    state = st.session_state
+    token = state.get("_resume_token")
+    if token is None:
+        candidate = st.query_params.get(TOKEN_PARAM)
+        if candidate and _TOKEN_RE.match(candidate):
+            token = state["_resume_token"] = candidate
+    if token is None and create:
+        token = state["_resume_token"] = secrets.token_urlsafe(16)
+    if token is not None and create and st.query_params.get(TOKEN_PARAM) != token:
+        st.query_params[TOKEN_PARAM] = token
+    return token
+
+
+def _key(survey, token):
+    return f"{survey.name}:{token}"
+
+
+def load_draft(survey):
+    """The saved draft for this session, ``{"page": int, "answers": dict}``, or ``None``."""
+    token = resume_token()
+    if token is None:
+        return None
+    return get_draft_store().get(_key(survey, token))
+
+
+def save_draft(survey, answers, page=0):
+    """Save the answers so far; returns whether the draft was kept."""
+    token = resume_token(create=True)
+    return get_draft_store().put(_key(survey, token), {"page": page, "answers": answers})
+
+
+def discard_draft(survey):
+    """Drop this session's draft after the response was submitted."""
+    token = resume_token()
+    if token is not None:
+        get_draft_store().delete(_key(survey, token))
@@ -0,0 +1,331 @@
+# --------------------------------------------------------
+# Form-interaction events and the drop-off funnel
+# --------------------------------------------------------
+"""Record how far respondents get through a form, not just who submits.
+
+Events, one row each in the log:
+
+* ``start``   – a session first sees the form (it has reached section 1);
+* ``section`` – a session reaches a later section;
+* ``leave``   – a session leaves a section, with the ``seconds`` spent on it;
+* ``change``  – an answer changed (``key`` is the question key);
+* ``stop``    – the respondent took a screening question's stop branch;
+* ``save``    – "Save and finish later";
+* ``submit``  – the response was handed to the sink, with the total seconds.
+
+A Streamlit form sends nothing to the server until one of its buttons is
+pressed, so changes are seen when the form is next submitted, and the
+single-page layout learns how far someone got only from the sections they
+changed answers in. In paged mode every page turn is seen, so reach and
+time per section are exact.
+
+:func:`emit` only appends a tuple to a bounded in-memory ring (a deque of
+``BRIDGEAI_EVENT_BUFFER`` entries, default 10000) and bumps a counter:
+a few microseconds per event, and a rerun emits a handful at most. A
+background thread flushes the ring every couple of seconds, or sooner when
+it fills up, appending each batch to a daily log
+``data/events/events-<date>.csv`` in one locked write. If the writer falls
+behind, the oldest events are dropped and counted in
+``bridgeai_events_dropped_total``. ``BRIDGEAI_EVENTS=off`` turns
+recording off.
+
+:class:`FunnelAggregator` reads the logs incrementally (byte offsets, as
+:class:`bridgeai.aggregate.IncrementalAggregator` does for responses). It
+keeps, per session, the furthest section reached and whether the session
+stopped or submitted, plus the time spent per section.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+
+from bridgeai.dedupe import session_id
+from bridgeai.locking import append_rows
+from bridgeai.metrics import REGISTRY
+from bridgeai.reader import iter_records
+from bridgeai.storage import DATA_DIR
+
+EVENTS_DIR = os.path.join(DATA_DIR, "events")
+ENABLED = os.environ.get("BRIDGEAI_EVENTS", "on") != "off"
+RING_SIZE = int(os.environ.get("BRIDGEAI_EVENT_BUFFER", "10000"))
+FLUSH_SECONDS = 2.0
+FLUSH_BATCH = 1000  # wake the writer early once this many events are waiting
+
+EVENT_COLUMNS = ("time", "session", "survey", "event", "section", "key", "seconds")
+
+START = "start"
+SECTION = "section"
+LEAVE = "leave"
+CHANGE = "change"
+STOP = "stop"
+SAVE = "save"
+SUBMIT = "submit"
+
+EVENTS = REGISTRY.counter("bridgeai_events_total", "Form events recorded.")
+EVENTS_DROPPED = REGISTRY.counter("bridgeai_events_dropped_total",
+                                  "Form events lost because the ring buffer was full.")
+
+log = logging.getLogger(__name__)
+
+
+def log_path(directory, timestamp):
+    day = datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d")
+    return os.path.join(directory, f"events-{day}.csv")
+
+
+def log_paths(directory=EVENTS_DIR):
+    """Daily event logs, oldest first."""
+    try:
+        names = sorted(n for n in os.listdir(directory) if n.startswith("events-") and n.endswith(".csv"))
+    except FileNotFoundError:
+        return []
+    return [os.path.join(directory, name) for name in names]
+
+
+class EventLog:
+    """Bounded ring of events, flushed to the daily logs by a background thread."""
+
+    def __init__(self, directory=EVENTS_DIR, capacity=RING_SIZE, flush_seconds=FLUSH_SECONDS,
+                 flush_batch=FLUSH_BATCH):
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self.flush_batch = flush_batch
+        self.written = 0
+        self._ring = deque(maxlen=capacity)
+        self._wake = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ring)
+
+    def emit(self, session, survey, event, section="", key="", seconds=""):
+        """Queue one event. Never blocks on I/O."""
+        ring = self._ring
+        if len(ring) == ring.maxlen:
+            EVENTS_DROPPED.inc(survey=survey)
+        ring.append((time.time(), session or "", survey, event, section, key, seconds))
+        EVENTS.inc(survey=survey, event=event)
+        if self._thread is None:
+            self._start()
+        elif len(ring) >= self.flush_batch:
+            self._wake.set()
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="events", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as exc:  # keep the writer alive; the events stay lost
+                log.error("Failed to write form events: %s", exc)
+
+    def flush(self):
+        """Write everything queued so far. Returns the number of events written."""
+        with self._flush_lock:
+            ring = self._ring
+            batch = [ring.popleft() for _ in range(len(ring))]
+            if not batch:
+                return 0
+            by_path = {}
+            for row in batch:
+                timestamp, *rest = row
+                by_path.setdefault(log_path(self.directory, timestamp), []).append(
+                    [f"{timestamp:.3f}"] + rest)
+            os.makedirs(self.directory, exist_ok=True)
+            for path, rows in by_path.items():
+                append_rows(path, EVENT_COLUMNS, rows)
+            self.written += len(batch)
+            return len(batch)
+
+
+_log = None
+_log_lock = threading.Lock()
+
+
+def get_event_log():
+    """The process-wide event log, shared by every session."""
+    global _log
+    with _log_lock:
+        if _log is None:
+            _log = EventLog()
+            REGISTRY.gauge("bridgeai_events_pending", "Form events waiting to be written.").set_function(
+                lambda: len(_log))
+        return _log
+
+
+def drain():
+    """Write whatever is still queued. Registered with ``atexit``."""
+    with _log_lock:
+        event_log = _log
+    if event_log is not None:
+        event_log.flush()
+
+
+atexit.register(drain)
+
+
+def emit(survey, event, section="", key="", seconds=""):
+    """Record an event for the current session (no-op when disabled)."""
+    if ENABLED:
+        get_event_log().emit(session_id(), survey.name, event, section, key, seconds)
+
+
+# ---------- tracking a session through a form ----------
+def _section_of(survey):
+    return {q.key: i for i, section in enumerate(survey.sections) for q in section.questions}
+
+
+def _state(survey):
+    import streamlit as st
+
+    return st.session_state.setdefault(f"_events_{survey.name}", {})
+
+
+def _enter(survey, state, section, now):
+    """Leave the current section (if any) and enter ``section``."""
+    current = state.get("section")
+    if current == section:
+        return
+    if current is not None:
+        emit(survey, LEAVE, current, seconds=f"{now - state['entered']:.1f}")
+    if section > state.get("furthest", -1):
+        emit(survey, SECTION, section)
+        state["furthest"] = section
+    state["section"] = section
+    state["entered"] = now
+
+
+def observe(survey, answers, section=None):
+    """Call after the form is drawn on every run; emits what changed since the last run.
+
+    ``section`` is the page shown in paged mode. Without it (single-page
+    form) a section counts as reached once an answer in it changes.
+    """
+    if not ENABLED:
+        return
+    state = _state(survey)
+    now = time.monotonic()
+    previous = state.get("answers")
+    if previous is None:
+        emit(survey, START, 0)
+        state.update(started=now, furthest=0, section=0, entered=now)
+    else:
+        sections = _section_of(survey)
+        reached = state["section"]
+        for key, value in answers.items():
+            if key in previous and previous[key] != value:
+                emit(survey, CHANGE, sections.get(key, ""), key)
+                reached = max(reached, sections.get(key, 0))
+        if section is None:
+            section = reached
+    if section is not None:
+        _enter(survey, state, section, now)
+    state["answers"] = dict(answers)
+
+
+def track(survey, event, key=""):
+    """Record a one-off event (``stop``, ``save``) in the session's current section."""
+    if ENABLED:
+        emit(survey, event, _state(survey).get("section", ""), key)
+
+
+def track_submit(survey):
+    """Record a submission and reset, so the session's next response starts over."""
+    if not ENABLED:
+        return
+    state = _state(survey)
+    now = time.monotonic()
+    if state.get("section") is not None:
+        emit(survey, LEAVE, state["section"], seconds=f"{now - state['entered']:.1f}")
+    started = state.get("started")
+    emit(survey, SUBMIT, state.get("section", ""), seconds=f"{now - started:.1f}" if started else "")
+    state.clear()
+
+
+# ---------- funnel ----------
+class FunnelAggregator:
+    """Incremental drop-off funnel of one survey over the event logs."""
+
+    def __init__(self, survey, directory=EVENTS_DIR):
+        self.survey = survey
+        self.directory = directory
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.offsets = {}  # log path -> bytes read
+        self.events = 0
+        self.sessions = {}  # session -> [furthest section, stopped, submitted]
+        self.seconds = Counter()  # section -> total seconds spent
+        self.visits = Counter()  # section -> completed visits (leave events)
+        self.changes = Counter()  # question key -> change events
+
+    def refresh(self):
+        """Fold in events logged since the last call. Returns how many were new."""
+        with self._lock:
+            paths = log_paths(self.directory)
+            if any(os.path.getsize(path) < offset for path, offset in self.offsets.items()
+                   if path in paths) or set(self.offsets) - set(paths):
+                self.reset()  # a log was rewritten or removed; start over
+            new = 0
+            for path in paths:
+                for record, end in iter_records(path, offset=self.offsets.get(path)):
+                    self.offsets[path] = end
+                    if record["survey"] == self.survey.name:
+                        self.add(record)
+                        new += 1
+            self.events += new
+            return new
+
+    def add(self, record):
+        event = record["event"]
+        section = int(record["section"]) if record["section"] not in ("", None) else None
+        state = self.sessions.get(record["session"])
+        if state is None:
+            state = self.sessions[record["session"]] = [0, False, False]
+        if section is not None and event in (START, SECTION):
+            state[0] = max(state[0], section)
+        elif event == STOP:
+            state[1] = True
+        elif event == SUBMIT:
+            state[0] = len(self.survey.sections) - 1
+            state[2] = True
+        elif event == LEAVE and section is not None and record["seconds"]:
+            self.seconds[section] += float(record["seconds"])
+            self.visits[section] += 1
+        elif event == CHANGE:
+            self.changes[record["key"]] += 1
+
+    def funnel(self):
+        """Per section: ``(title, sessions reached, share of starters, mean seconds)``.
+
+        Followed by the submit step as ``("Submitted", count, share, None)``.
+        """
+        reached = Counter(state[0] for state in self.sessions.values())
+        started = len(self.sessions)
+        rows = []
+        remaining = started
+        for i, section in enumerate(self.survey.sections):
+            mean = self.seconds[i] / self.visits[i] if self.visits[i] else None
+            rows.append((section.title, remaining, remaining / started if started else 0.0, mean))
+            remaining -= reached.get(i, 0)
+        submitted = sum(1 for state in self.sessions.values() if state[2])
+        rows.append(("Submitted", submitted, submitted / started if started else 0.0, None))
+        return rows
+
+    @property
+    def stopped(self):
+        """Sessions that took a screening question's stop branch."""
+        return sum(1 for state in self.sessions.values() if state[1])
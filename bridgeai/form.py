@@ -0,0 +1,246 @@
+# --------------------------------------------------------
+# Streamlit form renderer driven by the survey schema
+# --------------------------------------------------------
+"""Render a :class:`bridgeai.schema.Survey` as Streamlit widgets.
+
+Two layouts are available:
+
+* :func:`render_survey` – every section inside the caller's ``st.form``
+  (the classic single-page survey);
+* :func:`render_paged` – only the active section is sent to the browser.
+  Answers are kept in ``st.session_state`` between pages and returned
+  together on the final submit. Enabled with ``BRIDGEAI_PAGED=1`` or by
+  opening the page with ``?paged=1`` (see :func:`paged_mode`).
+
+Both save drafts (see ``bridgeai.drafts``) and restore them when a
+session comes back with its resume token, and record how far the session
+got in the form-interaction event log (see ``bridgeai.events``).
+
+:func:`submit_response` is what every survey app runs when its form is
+submitted: validate, screen, write, then tidy up the session.
+"""
+
+import os
+from datetime import datetime
+from functools import partial
+
+import streamlit as st
+
+from bridgeai import events
+from bridgeai.contacts import capture
+from bridgeai.dedupe import commit, screen
+from bridgeai.drafts import discard_draft, load_draft, save_draft
+from bridgeai.metrics import VALIDATION_ERRORS, timed
+from bridgeai.sink import get_sink
+
+
+def set_page_config(survey):
+    """``st.set_page_config`` from the survey's page definition."""
+    page = survey.page
+    st.set_page_config(page_title=page.page_title, page_icon=page.page_icon, layout=page.layout)
+
+
+def render_page(survey):
+    """Draw the sidebar, title and intro text defined for ``survey``."""
+    page = survey.page
+    if page.sidebar:
+        with st.sidebar:
+            for kind, text in page.sidebar:
+                getattr(st, kind)(text)
+    st.title(page.title)
+    if page.intro:
+        st.markdown(page.intro)
+    if page.divider:
+        st.divider()
+
+
+def render_question(question, value=None):
+    """Draw one question's widget and return its current value.
+
+    ``value`` pre-fills the widget, e.g. with an answer saved on another page.
+    """
+    if question.intro:
+        st.markdown(question.intro)
+    if question.caption:
+        st.caption(question.caption)
+
+    kind = question.kind
+    if kind in ("radio", "select"):
+        index = question.options.index(value) if value in question.options else 0
+        widget = st.radio if kind == "radio" else st.selectbox
+        return widget(question.label, question.options, index=index, key=question.key,
+                      help=question.help)
+    if kind == "multiselect":
+        default = [v for v in value or () if v in question.options]
+        return st.multiselect(question.label, question.options, default=default,
+                              key=question.key, help=question.help)
+    if kind == "slider":
+        return st.slider(
+            question.label,
+            min_value=question.min_value,
+            max_value=question.max_value,
+            value=question.default if value is None else value,
+            help=question.help,
+            key=question.key,
+        )
+    widget = st.text_area if kind == "textarea" else st.text_input
+    return widget(question.label, value=value or "", key=question.key,
+                  placeholder=question.placeholder)
+
+
+def render_section(section, answers, saved=None, on_stop=None):
+    """Draw a section's visible questions, recording values into ``answers``.
+
+    Returns the keys of the questions that were drawn. ``saved`` holds
+    previously submitted answers used to pre-fill the widgets. ``on_stop``
+    is called with the question's key before a stop branch ends the run.
+    """
+    saved = saved or {}
+    rendered = []
+    st.header(section.title)
+    for question in section.questions:
+        if not question.visible(answers):
+            continue
+        answers[question.key] = render_question(question, saved.get(question.key))
+        rendered.append(question.key)
+        if question.stop_if is not None and answers[question.key] == question.stop_if:
+            st.warning(question.stop_message)
+            if st.form_submit_button(question.stop_button):
+                if on_stop is not None:
+                    on_stop(question.key)
+                st.stop()
+    return rendered
+
+
+def render_survey(survey):
+    """Draw every section of ``survey`` (inside the caller's ``st.form``).
+
+    Widgets start from the session's saved draft, if any, and a "Save and
+    finish later" button stores the current answers as the new draft.
+    """
+    draft = load_draft(survey)
+    saved = draft["answers"] if draft else None
+    answers = {}
+    on_stop = partial(track_stop, survey, answers)
+    for index, section in enumerate(survey.sections):
+        if index:
+            st.divider()
+        render_section(section, answers, saved, on_stop)
+    events.observe(survey, answers)
+    if st.form_submit_button("💾 Save and finish later"):
+        events.track(survey, events.SAVE)
+        if save_draft(survey, answers):
+            st.info("Draft saved. Keep this page's link to continue later.")
+    return answers
+
+
+def track_stop(survey, answers, key, section=None):
+    """Log the answers that led to a stop branch, then the stop itself."""
+    events.observe(survey, answers, section)
+    events.track(survey, events.STOP, key)
+
+
+# ---------- paged mode ----------
+def paged_mode():
+    """Whether to render one section per page for this session."""
+    if os.environ.get("BRIDGEAI_PAGED") == "1":
+        return True
+    return st.query_params.get("paged") == "1"
+
+
+def _state_keys(survey):
+    return f"_{survey.name}_page", f"_{survey.name}_answers", f"_{survey.name}_shown"
+
+
+def render_paged(survey, submit_label):
+    """Render only the active section; return ``(answers, submitted)``.
+
+    ``submitted`` is true once, on the final page's submit, with the answers
+    from every page. The saved answers are then cleared so the session can
+    start a new response.
+    """
+    page_key, answers_key, shown_key = _state_keys(survey)
+    state = st.session_state
+    if page_key not in state:
+        draft = load_draft(survey)
+        if draft:
+            state[page_key] = min(draft["page"], len(survey.sections) - 1)
+            state[answers_key] = draft["answers"]
+    page = state.setdefault(page_key, 0)
+    saved = state.setdefault(answers_key, {})
+    sections = survey.sections
+    last = len(sections) - 1
+
+    st.progress((page + 1) / len(sections), text=f"Section {page + 1} of {len(sections)}")
+    with st.form(f"{survey.name}_page_{page}"):
+        current = dict(saved)
+        rendered = render_section(sections[page], current, saved,
+                                  partial(track_stop, survey, current, section=page))
+        back_col, next_col = st.columns(2)
+        back = back_col.form_submit_button("← Back", disabled=page == 0)
+        forward = next_col.form_submit_button(submit_label if page == last else "Next →")
+
+    # Questions drawn on the previous run of this page; anything new was
+    # revealed by this submit (e.g. "Other, please specify") and is still empty.
+    shown = state.get(shown_key)
+    state[shown_key] = (page, rendered)
+    events.observe(survey, current, page)
+    if not (back or forward):
+        return saved, False
+    revealed = shown is not None and shown[0] == page and set(rendered) - set(shown[1])
+    saved.update((key, current[key]) for key in rendered)
+    if back:
+        state[page_key] = page - 1
+        save_draft(survey, saved, page - 1)
+        st.rerun()
+
+    errors = survey.validate_answers({key: saved[key] for key in rendered})
+    if errors:
+        for error in errors:
+            st.error(error)
+        return saved, False
+    if revealed:
+        save_draft(survey, saved, page)
+        st.rerun()
+    if page < last:
+        state[page_key] = page + 1
+        save_draft(survey, saved, page + 1)
+        st.rerun()
+
+    del state[page_key], state[answers_key], state[shown_key]
+    return saved, True
+
+
+# ---------- submitting ----------
+def submit_response(survey, answers):
+    """Store one submitted form. Returns whether it was stored.
+
+    Each step is timed separately in ``bridgeai_phase_seconds`` (see
+    ``bridgeai.metrics``). Validation errors and screening rejections are
+    shown to the respondent; the caller shows its own thank-you.
+    """
+    name = survey.name
+    with timed(name, "validate"):
+        errors = survey.validate_answers(answers)
+    if errors:
+        VALIDATION_ERRORS.inc(len(errors), survey=name)
+        for error in errors:
+            st.error(error)
+        return False
+    submitted_at = datetime.now().isoformat()
+    # Repeats from this session and submit floods are dropped before writing
+    with timed(name, "screen"):
+        verdict = screen(survey, answers)
+    if verdict.rejected:
+        st.warning(verdict.message)
+        return False
+    # Queue the record for the shared writer
+    with timed(name, "sink"):
+        get_sink(survey).submit(survey.build_record(answers, submitted_at))
+        commit(survey, verdict, submitted_at)  # only a written response counts as seen
+        discard_draft(survey)  # the draft is no longer needed
+        events.track_submit(survey)  # closes the session's drop-off funnel
+    # Emails go to the contacts store, never into the response row
+    with timed(name, "contacts"):
+        capture(survey, answers, submitted_at)
+    return True
@@ -0,0 +1,168 @@
+# --------------------------------------------------------
+# Rerun timing instrumentation
+# --------------------------------------------------------
+"""Measure how long each Streamlit script execution takes.
+
+Streamlit re-executes the whole app script on every interaction, so the
+script run time is what a respondent waits for after each click. Wrap the
+script body in :meth:`RerunTimer.measure`; timings are kept in a rolling
+window shared by all sessions of the process, logged at DEBUG level on the
+``bridgeai.timings`` logger, and shown in the sidebar when
+``BRIDGEAI_TIMINGS=1`` is set or the page is opened with ``?timings=1``.
+Every run is also recorded in ``bridgeai_rerun_seconds`` (see
+``bridgeai.metrics``).
+
+Sampled profiling: with ``BRIDGEAI_PROFILE_EVERY=N`` every N-th run of an
+app executes under cProfile. A run opened with ``?profile=1`` is profiled
+too, but only when the operator also set ``BRIDGEAI_PROFILE_QUERY=1``;
+otherwise any visitor could turn it on. The stats are dumped to
+``data/profiles/<app>-<time>.prof``; read them with ``python -m pstats`` or
+snakeviz. Only one run is profiled at a time, and only the newest
+``BRIDGEAI_PROFILE_KEEP`` files (default 50) are kept.
+"""
+
+import cProfile
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import streamlit as st
+
+from bridgeai import metrics
+from bridgeai.storage import DATA_DIR
+
+log = logging.getLogger("bridgeai.timings")
+
+WINDOW = 500
+PROFILE_DIR = os.path.join(DATA_DIR, "profiles")
+PROFILE_EVERY = int(os.environ.get("BRIDGEAI_PROFILE_EVERY", "0"))
+PROFILE_QUERY = os.environ.get("BRIDGEAI_PROFILE_QUERY") == "1"
+PROFILE_KEEP = int(os.environ.get("BRIDGEAI_PROFILE_KEEP", "50"))
+
+_profile_lock = threading.Lock()  # cProfile allows one active profiler
+
+
+def _percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class RerunTimer:
+    """Rolling window of script run durations for one app."""
+
+    def __init__(self, name, window=WINDOW):
+        self.name = name
+        self.runs = 0
+        self._durations = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.runs += 1
+            self._durations.append(seconds)
+        metrics.RERUN_SECONDS.observe(seconds, app=self.name)
+        log.debug("%s rerun took %.1f ms", self.name, seconds * 1000)
+
+    def summary(self):
+        """``{"runs", "last_ms", "p50_ms", "p95_ms", "max_ms"}`` over the window."""
+        with self._lock:
+            durations = list(self._durations)
+            runs = self.runs
+        if not durations:
+            return {"runs": runs}
+        last = durations[-1]
+        durations.sort()
+        return {
+            "runs": runs,
+            "last_ms": round(last * 1000, 1),
+            "p50_ms": round(_percentile(durations, 50) * 1000, 1),
+            "p95_ms": round(_percentile(durations, 95) * 1000, 1),
+            "max_ms": round(durations[-1] * 1000, 1),
+        }
+
+    @contextmanager
+    def measure(self):
+        """Time the enclosed script body, including runs cut short by ``st.stop()``."""
+        placeholder = st.sidebar.empty() if timings_enabled() else None
+        profiler = self._start_profile()
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.record(time.perf_counter() - started)
+            if profiler is not None:
+                self._dump_profile(profiler)
+            if placeholder is not None:
+                s = self.summary()
+                placeholder.caption(
+                    f"⏱️ rerun {s['last_ms']} ms · p50 {s['p50_ms']} ms · "
+                    f"p95 {s['p95_ms']} ms · {s['runs']} runs"
+                )
+
+    def _start_profile(self):
+        with self._lock:
+            due = PROFILE_EVERY > 0 and (self.runs + 1) % PROFILE_EVERY == 0
+        requested = PROFILE_QUERY and _query_flag("profile")
+        if not (due or requested) or not _profile_lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # another profiler is active in this process
+            _profile_lock.release()
+            return None
+        return profiler
+
+    def _dump_profile(self, profiler):
+        try:
+            profiler.disable()
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PROFILE_DIR, f"{self.name}-{datetime.now():%Y%m%d-%H%M%S-%f}.prof")
+            profiler.dump_stats(path)
+            log.info("Profiled %s rerun: %s", self.name, path)
+            _prune_profiles()
+        finally:
+            _profile_lock.release()
+
+
+def _prune_profiles(keep=PROFILE_KEEP):
+    """Delete all but the newest ``keep`` profile dumps."""
+    try:
+        entries = [e for e in os.scandir(PROFILE_DIR) if e.name.endswith(".prof")]
+    except FileNotFoundError:
+        return
+    entries.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+    for entry in entries[keep:]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:  # another process pruned it first
+            pass
+
+
+def _query_flag(name):
+    try:
+        return st.query_params.get(name) == "1"
+    except Exception:  # outside a Streamlit session
+        return False
+
+
+def timings_enabled():
+    return os.environ.get("BRIDGEAI_TIMINGS") == "1" or _query_flag("timings")
+
+
+_timers = {}
+_timers_lock = threading.Lock()
+
+
+def rerun_timer(name):
+    """The process-wide timer for app ``name``."""
+    with _timers_lock:
+        timer = _timers.get(name)
+        if timer is None:
+            timer = _timers[name] = RerunTimer(name)
+            metrics.autostart()
+        return timer
@@ -0,0 +1,190 @@
+# --------------------------------------------------------
+# Curated newcomer knowledge base
+# --------------------------------------------------------
+"""Short, hand-written answers to the questions newcomers ask most.
+
+The topics follow the Q11/Q12 task lists of the customer survey (SIN,
+health card, bank account, housing, ...). The assistant
+(``bridgeai_assistant.py``) retrieves from these snippets first and adds
+what survey respondents wrote about the same topic.
+
+Rules differ by province and change over time, so every snippet points to
+the official source to confirm details. Add a topic by appending a
+:class:`Snippet`. The retrieval index notices the change and rebuilds.
+"""
+
+import hashlib
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Snippet:
+    key: str
+    title: str
+    text: str
+    tags: tuple = ()
+    link: str = None
+
+    @property
+    def document(self):
+        """Text indexed for retrieval: the title counts twice."""
+        return " ".join((self.title, self.title, " ".join(self.tags), self.text))
+
+
+SNIPPETS = (
+    Snippet(
+        "sin", "Getting your Social Insurance Number (SIN)",
+        "You need a SIN to work in Canada and to get government benefits. Apply for free "
+        "at a Service Canada office, online or by mail. Bring your primary document, such as "
+        "your Confirmation of Permanent Residence or your work or study permit. In person "
+        "you usually get the number the same day. Keep it private and only give it to your "
+        "employer, your bank and the government.",
+        ("sin", "social insurance number", "service canada", "work permit"),
+        "https://www.canada.ca/en/employment-social-development/services/sin.html",
+    ),
+    Snippet(
+        "health_card", "Applying for a provincial health card",
+        "Public health insurance is run by your province: OHIP in Ontario, MSP in British "
+        "Columbia, RAMQ in Quebec, AHCIP in Alberta. Apply as soon as you have an address. "
+        "Some provinces have a waiting period of up to three months, so buy private "
+        "insurance to cover your first weeks. Bring your immigration document, proof of "
+        "address and another piece of ID.",
+        ("health card", "ohip", "msp", "ramq", "health insurance", "waiting period"),
+        "https://www.canada.ca/en/immigration-refugees-citizenship/services/new-immigrants/new-life-canada/health-care/universal-system.html",
+    ),
+    Snippet(
+        "family_doctor", "Finding a family doctor",
+        "Family doctors have waiting lists in many cities. Register with your province's "
+        "program (Health Care Connect in Ontario, the Health Connect Registry in British "
+        "Columbia) and ask settlement agencies about clinics taking new patients. Until "
+        "then, use walk-in clinics or call the 811 health line for nurse advice. In an "
+        "emergency call 911.",
+        ("doctor", "family doctor", "clinic", "walk-in", "811", "health"),
+        "https://www.ontario.ca/page/find-family-doctor-or-nurse-practitioner",
+    ),
+    Snippet(
+        "bank_account", "Opening a bank account",
+        "You can open an account before you have a SIN. Bring your passport and your "
+        "immigration document. Most large banks and credit unions offer newcomer packages "
+        "with no monthly fees for the first year and a first credit card without credit "
+        "history. Compare the offers; you can often book an appointment before you arrive.",
+        ("bank", "bank account", "newcomer package", "chequing", "debit"),
+        "https://www.canada.ca/en/financial-consumer-agency/services/banking/opening-bank-account.html",
+    ),
+    Snippet(
+        "credit_history", "Building a credit history",
+        "Landlords, phone companies and lenders check your credit score, and credit from "
+        "your home country does not carry over. Start with a newcomer or secured credit "
+        "card, keep the balance low and pay it in full every month. Your score builds "
+        "within months. You can check your report for free with Equifax and TransUnion.",
+        ("credit", "credit score", "credit card", "credit history", "secured card"),
+        "https://www.canada.ca/en/financial-consumer-agency/services/credit-reports-score.html",
+    ),
+    Snippet(
+        "phone_plan", "Getting a phone plan",
+        "A prepaid plan needs no credit check and is the easiest start. Buy a SIM at the "
+        "airport or any carrier store. Smaller brands run by the big carriers are often "
+        "cheaper for the same network. Move to a monthly plan once you have a credit "
+        "history, and compare prices: plans in Canada are expensive.",
+        ("phone", "sim", "mobile", "cell phone", "prepaid", "data plan"),
+        "https://crtc.gc.ca/eng/phone/mobile/",
+    ),
+    Snippet(
+        "housing", "Finding housing",
+        "Book temporary housing for your first weeks and look for a long-term rental once "
+        "you can visit in person. Never send a deposit for a place you have not seen. Rules "
+        "protect tenants: in Ontario a landlord can only ask for first and last month's "
+        "rent and must use the standard lease. Landlords may ask for references, proof of "
+        "income or a credit check; a co-signer or a letter from your employer helps "
+        "when you have no history yet.",
+        ("housing", "rent", "apartment", "landlord", "lease", "deposit", "rental", "scam"),
+        "https://www.canada.ca/en/immigration-refugees-citizenship/services/new-immigrants/new-life-canada/housing.html",
+    ),
+    Snippet(
+        "transit", "Getting around on transit",
+        "Buy a reloadable transit card: PRESTO in Toronto and Ottawa, Compass in Vancouver, "
+        "OPUS in Montreal. Monthly passes are cheaper if you ride every day, and transfers "
+        "within a time window are usually free. Trip planners such as Google Maps or the "
+        "city's transit app show live schedules.",
+        ("transit", "bus", "subway", "presto", "compass", "opus", "transport"),
+        "https://www.canada.ca/en/immigration-refugees-citizenship/services/new-immigrants/new-life-canada/transportation.html",
+    ),
+    Snippet(
+        "drivers_license", "Getting a driver's license",
+        "Licenses are issued by each province. You can drive on your foreign license for a "
+        "short period (60 days in Ontario, 90 days in British Columbia). Some countries "
+        "have exchange agreements that let you swap your license without tests; otherwise "
+        "you take the knowledge and road tests. Bring proof of your driving experience "
+        "to get credit for it.",
+        ("driver", "license", "licence", "driving", "road test", "car"),
+        "https://www.ontario.ca/page/exchange-foreign-drivers-licence",
+    ),
+    Snippet(
+        "jobs", "Finding a job",
+        "Canadian resumes are short, have no photo and focus on results. Free employment "
+        "programs at settlement agencies help with resumes, mock interviews and networking. "
+        "Many jobs are found through contacts, so talk to people in your field and use "
+        "LinkedIn. Check whether your profession is regulated and start credential "
+        "recognition early.",
+        ("job", "jobs", "work", "resume", "interview", "employment", "career", "credential"),
+        "https://www.jobbank.gc.ca/findajob/newcomers",
+    ),
+    Snippet(
+        "taxes", "Filing taxes",
+        "File a tax return every year, even with little or no income: it is how you get "
+        "benefits such as the GST/HST credit and the Canada Child Benefit. The deadline is "
+        "usually April 30. Free tax clinics help people with modest income file at no cost.",
+        ("tax", "taxes", "tax return", "cra", "benefits", "gst"),
+        "https://www.canada.ca/en/revenue-agency/services/tax/individuals/segments/newcomers-canada-immigrants.html",
+    ),
+    Snippet(
+        "winter", "Preparing for winter",
+        "Dress in layers: a warm insulated coat, waterproof boots, a hat, gloves and a scarf. "
+        "Buy them after you arrive, when prices and choice are better than abroad; thrift "
+        "stores and end-of-season sales are cheap options. Winter tires are mandatory in "
+        "Quebec and strongly recommended elsewhere.",
+        ("winter", "cold", "snow", "clothes", "coat", "boots"),
+        "https://www.canada.ca/en/immigration-refugees-citizenship/services/new-immigrants/prepare-life-canada/prepare-arrival.html",
+    ),
+    Snippet(
+        "school", "Registering children for school",
+        "Public elementary and secondary school is free. Register with your local school "
+        "board; bring proof of address, the child's birth certificate or passport, "
+        "immigration documents and immunization records. Boards often run welcome centres "
+        "that assess language level and grade placement.",
+        ("school", "children", "kids", "school board", "education", "registration"),
+        "https://www.canada.ca/en/immigration-refugees-citizenship/services/new-immigrants/new-life-canada/education.html",
+    ),
+    Snippet(
+        "language", "Improving English or French",
+        "Permanent residents can take free language classes through LINC (English) or CLIC "
+        "(French). Libraries run free conversation circles. Your language level matters "
+        "for jobs and for citizenship later.",
+        ("english", "french", "language", "class", "linc", "clic"),
+        "https://www.canada.ca/en/immigration-refugees-citizenship/services/new-immigrants/new-life-canada/improve-english-french.html",
+    ),
+    Snippet(
+        "settlement", "Free settlement services",
+        "Government-funded settlement agencies help newcomers for free: finding housing, "
+        "filling in forms, job search, language classes and connecting with the community. "
+        "Search for services near you by postal code.",
+        ("settlement", "agency", "help", "services", "community", "support"),
+        "https://ircc.canada.ca/english/newcomers/services/index.asp",
+    ),
+    Snippet(
+        "first_week", "Your first week checklist",
+        "In your first days: get a SIN, open a bank account, get a phone plan, apply for "
+        "your provincial health card and buy a transit card. Then look for long-term "
+        "housing, register children for school and contact a settlement agency.",
+        ("first week", "checklist", "arrival", "arrive", "first days", "to do"),
+        "https://www.canada.ca/en/immigration-refugees-citizenship/services/new-immigrants/new-life-canada.html",
+    ),
+)
+
+
+def knowledge_version(snippets=SNIPPETS):
+    """Fingerprint of the knowledge base, stored in the index to detect edits."""
+    digest = hashlib.sha256()
+    for snippet in snippets:
+        digest.update(repr(snippet).encode("utf-8"))
+    return digest.hexdigest()[:16]
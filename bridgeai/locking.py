@@ -0,0 +1,137 @@
+# --------------------------------------------------------
+# Advisory file locks and atomic CSV appends
+# --------------------------------------------------------
+"""Cross-thread, cross-process locking for the response files.
+
+Every lock is taken on a sidecar ``<file>.lock`` so the data file itself can
+be atomically replaced (migrations, compaction) without invalidating locks
+held by other processes. Each acquisition opens its own descriptor, which
+makes ``flock`` exclude other threads of the same process as well as other
+Streamlit replicas sharing the volume.
+"""
+
+import contextlib
+import csv
+import io
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Context manager holding an advisory lock on ``path``.
+
+    ``shared=True`` takes a reader lock where the platform supports it;
+    writers always lock exclusively.
+    """
+
+    # msvcrt has no shared locks, so serialize in-process users ourselves.
+    _local_locks = {}
+    _local_guard = threading.Lock()
+
+    def __init__(self, path, shared=False):
+        self.path = os.path.abspath(path) + ".lock"
+        self.shared = shared and fcntl is not None
+        self._fd = None
+        self._local = None
+
+    def acquire(self):
+        if fcntl is None:
+            with FileLock._local_guard:
+                self._local = FileLock._local_locks.setdefault(self.path, threading.Lock())
+            self._local.acquire()
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX)
+            else:
+                msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+        except BaseException:
+            self._release_fd()
+            raise
+        return self
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            self._release_fd()
+
+    def _release_fd(self):
+        os.close(self._fd)
+        self._fd = None
+        if self._local is not None:
+            self._local.release()
+            self._local = None
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def encode_rows(rows, header=None):
+    """Serialize rows (and an optional header) to CSV bytes."""
+    buf = io.StringIO(newline="")
+    writer = csv.writer(buf)
+    if header is not None:
+        writer.writerow(header)
+    writer.writerows(rows)
+    return buf.getvalue().encode("utf-8")
+
+
+def _fence(fd, size):
+    """Bytes that terminate a torn trailing record, or ``b""`` if none."""
+    os.lseek(fd, size - 1, os.SEEK_SET)
+    if os.read(fd, 1) == b"\n":
+        return b""
+    # Only reached after a crash: an odd number of quotes in the file means
+    # the fragment stopped inside a quoted field, which must be closed too.
+    quotes = 0
+    os.lseek(fd, 0, os.SEEK_SET)
+    while True:
+        chunk = os.read(fd, 1 << 20)
+        if not chunk:
+            break
+        quotes += chunk.count(b'"')
+    return b'"\n' if quotes % 2 else b"\n"
+
+
+def append_rows(path, header, rows, fsync=False, lock=True):
+    """Append ``rows`` to ``path`` as one locked, single-buffer write.
+
+    The header is written only if the file is empty, checked under the lock.
+    If a previous writer crashed mid-row the file will not end in a newline;
+    in that case the torn fragment is fenced off first so it cannot swallow
+    the first new row. Pass ``lock=False`` when the caller already holds
+    ``FileLock(path)``.
+    """
+    payload = encode_rows(rows)
+    with FileLock(path) if lock else contextlib.nullcontext():
+        fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            size = os.fstat(fd).st_size
+            if size == 0:
+                payload = encode_rows([], header) + payload
+            else:
+                payload = _fence(fd, size) + payload
+            view = memoryview(payload)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            if fsync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
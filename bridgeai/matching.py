@@ -0,0 +1,581 @@
+# --------------------------------------------------------
+# Newcomer-to-business referral matching
+# --------------------------------------------------------
+"""Match newcomers (customer survey) with businesses (business survey).
+
+Both sides are reduced to a shared vocabulary of need categories
+(:data:`CATEGORIES`) and city regions (the business survey's Q2 options):
+
+* a newcomer needs a category when they found a related task difficult
+  (Q12), wanted related support (Q22) or, at half weight, worried about it
+  before arriving (Q7). Categories that matter most at the stage they want
+  help with (Q26) are boosted. Their city (Q2) maps to a region;
+* a business serves the category of its industry (Q1) in the regions it
+  operates in (Q2), ``All of Canada`` meaning every region. Its *quality*
+  is its interest in referrals (Q11), raised by up to
+  :data:`INFO_WEIGHT` when the newcomer's answers carry the details it
+  asked for (Q19: arrival date, city, immigration category).
+
+A pair scores ``need(newcomer, category) * quality(business, info)`` when
+the business serves the newcomer's region, and 0 otherwise. Since a
+business has a single category, and only the three info details vary
+between newcomers (8 combinations), every score comes from a few short
+posting lists:
+
+* :class:`BusinessIndex` keeps, per ``(category, region, info)``, the
+  businesses ranked by quality. A newcomer's top-k is the best k of the
+  first k entries of each list for the categories they need. That is exact,
+  and costs ``O(categories * k)`` whatever the number of businesses;
+* :class:`NewcomerIndex` keeps, per ``(category, region, info)``, the
+  newcomers ranked by need, for the reverse query.
+
+Region membership is a per-business bitset, so "serves region r" is a
+shift and a mask when the lists are built.
+
+:class:`MatchingEngine` answers one query in well under a millisecond (for
+a Streamlit page, cache it with ``st.cache_resource``). The batch commands
+score every newcomer or every business on a process pool and stream the
+results to CSV. Rows are numbered by their position in the response store,
+counting from 0. Requires ``numpy``::
+
+    python -m bridgeai.matching newcomers --k 10
+    python -m bridgeai.matching businesses --k 50 --workers 8
+"""
+
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from bridgeai.bulk import Progress, iter_source
+from bridgeai.columnar import EXPORT_DIR
+from bridgeai.schema import SchemaError, load_survey
+from bridgeai.storage import MULTI_SEPARATOR
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+CATEGORIES = (
+    "banking", "insurance", "telecom", "real_estate", "legal",
+    "employment", "education", "healthcare", "transport",
+)
+_CATEGORY = {name: i for i, name in enumerate(CATEGORIES)}
+
+INDUSTRY_CATEGORY = {
+    "Banking/Financial Services": "banking",
+    "Insurance (Home, Auto, Life, Health)": "insurance",
+    "Telecommunications (Phone/Internet)": "telecom",
+    "Real Estate": "real_estate",
+    "Legal Services": "legal",
+    "Employment/Recruitment": "employment",
+    "Education/Training": "education",
+    "Healthcare": "healthcare",
+    "Transportation (Driving school, Car sales, etc.)": "transport",
+}
+
+# customer column -> (weight, {option: categories})
+NEEDS = {
+    "difficult_tasks": (1.0, {
+        "Opening bank account": ("banking",),
+        "Getting phone plan": ("telecom",),
+        "Understanding transit": ("transport",),
+        "Finding affordable housing": ("real_estate",),
+        "Applying for health card": ("healthcare", "insurance"),
+        "Filing taxes": ("banking",),
+        "Driver’s license": ("transport", "insurance"),
+        "Finding family doctor": ("healthcare",),
+        "Understanding job market": ("employment",),
+        "Language barriers": ("education",),
+    }),
+    "needed_support": (1.0, {
+        "Job search/networking help": ("employment",),
+        "Mental health support": ("healthcare",),
+        "Help finding housing": ("real_estate",),
+        "Understanding Canadian workplace culture": ("employment", "education"),
+        "Tax filing guidance": ("banking",),
+        "Credential recognition guidance": ("education", "legal"),
+        "Language practice partners": ("education",),
+    }),
+    "concerns": (0.5, {
+        "Finding housing": ("real_estate",),
+        "Finding a job": ("employment",),
+        "Language (English/French)": ("education",),
+        "Getting credentials recognized": ("education", "legal"),
+        "Financial stability": ("banking", "insurance"),
+        "Healthcare system": ("healthcare", "insurance"),
+    }),
+}
+
+# best_timing -> categories that matter most then
+STAGE_BOOST = 1.25
+STAGE_CATEGORIES = {
+    "Before arriving": ("banking", "telecom", "real_estate"),
+    "First week": ("banking", "telecom", "real_estate", "transport"),
+    "First 3 months": ("employment", "healthcare", "insurance"),
+}
+
+NATIONWIDE = "All of Canada"
+REGIONS = (
+    "Toronto/GTA", "Vancouver/Lower Mainland", "Calgary", "Edmonton", "Montreal",
+    "Ottawa", "Winnipeg", "Halifax", "Other major city",
+)
+UNKNOWN_REGION = len(REGIONS)  # newcomers with no (or "Other") city: nationwide businesses only
+_REGION = {name: i for i, name in enumerate(REGIONS)}
+
+CITY_REGION = {
+    "Ontario - Toronto": "Toronto/GTA",
+    "Ontario - Mississauga": "Toronto/GTA",
+    "Ontario - Hamilton": "Toronto/GTA",
+    "Ontario - Ottawa": "Ottawa",
+    "British Columbia - Vancouver": "Vancouver/Lower Mainland",
+    "British Columbia - Surrey": "Vancouver/Lower Mainland",
+    "Alberta - Calgary": "Calgary",
+    "Alberta - Edmonton": "Edmonton",
+    "Quebec - Montreal": "Montreal",
+    "Manitoba - Winnipeg": "Winnipeg",
+    "Nova Scotia - Halifax": "Halifax",
+    "Quebec - Quebec City": "Other major city",
+    "Saskatchewan - Regina": "Other major city",
+    "New Brunswick - Moncton": "Other major city",
+}
+
+# customer_info option -> customer column that supplies it (one bit each)
+INFO_FIELDS = {
+    "When they arrived in Canada": "arrival_date",
+    "Their location/city": "city",
+    "Immigration category (student, worker, PR, etc.)": "category",
+}
+INFO_MASKS = 1 << len(INFO_FIELDS)
+INFO_WEIGHT = 0.25
+
+INTEREST = {
+    "Very interested - tell me more": 1.0,
+    "Somewhat interested": 0.8,
+    "Maybe, depends on details": 0.6,
+    "Not really interested": 0.3,
+    "Not interested at all": 0.0,
+}
+UNKNOWN_INTEREST = 0.5
+
+DEFAULT_K = 10
+MAX_K = 100  # depth of each posting list; queries may ask for up to this many
+CHUNK_ROWS = 16384
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("Referral matching needs numpy: pip install numpy")
+
+
+def check_vocabulary(customer, business):
+    """Raise ``SchemaError`` if a mapping above names an option the surveys no longer have."""
+    def check(survey, column, names):
+        options = set(survey.question_for(column).options)
+        missing = sorted(set(names) - options)
+        if missing:
+            raise SchemaError(f"matching: {survey.name}.{column} has no option(s) {missing}")
+
+    check(business, "industry", INDUSTRY_CATEGORY)
+    check(business, "cities", REGIONS + (NATIONWIDE,))
+    check(business, "referral_interest", INTEREST)
+    check(business, "customer_info", INFO_FIELDS)
+    check(customer, "city", CITY_REGION)
+    check(customer, "best_timing", STAGE_CATEGORIES)
+    for column, (_, options) in NEEDS.items():
+        check(customer, column, options)
+
+
+def _options(value):
+    if isinstance(value, (list, tuple)):
+        return value
+    return [v for v in (value or "").split(MULTI_SEPARATOR) if v]
+
+
+# ---------- profiles ----------
+def newcomer_profile(record):
+    """``(need, region, info)`` for a customer record (a dict keyed by column).
+
+    ``need`` is a float vector over :data:`CATEGORIES`; ``info`` is the bit
+    mask of :data:`INFO_FIELDS` details the record carries.
+    """
+    need = np.zeros(len(CATEGORIES), np.float32)
+    for column, (weight, options) in NEEDS.items():
+        for option in _options(record.get(column)):
+            for category in options.get(option, ()):
+                need[_CATEGORY[category]] += weight
+    for category in STAGE_CATEGORIES.get(record.get("best_timing"), ()):
+        need[_CATEGORY[category]] *= STAGE_BOOST
+    region = _REGION.get(CITY_REGION.get(record.get("city")), UNKNOWN_REGION)
+    info = 0
+    for bit, column in enumerate(INFO_FIELDS.values()):
+        if str(record.get(column) or "").strip():
+            info |= 1 << bit
+    return need, region, info
+
+
+def business_profile(record):
+    """``(category, regions, quality)`` for a business record.
+
+    ``category`` is -1 when the industry maps to none; ``regions`` is a bit
+    set over region codes (``UNKNOWN_REGION`` included for nationwide
+    businesses); ``quality`` has one value per info mask.
+    """
+    category = _CATEGORY.get(INDUSTRY_CATEGORY.get(record.get("industry")), -1)
+    regions = 0
+    for city in _options(record.get("cities")):
+        if city == NATIONWIDE:
+            regions = (1 << (len(REGIONS) + 1)) - 1
+            break
+        if city in _REGION:
+            regions |= 1 << _REGION[city]
+    interest = INTEREST.get(record.get("referral_interest"), UNKNOWN_INTEREST)
+    wanted = 0
+    for bit, option in enumerate(INFO_FIELDS):
+        if option in _options(record.get("customer_info")):
+            wanted |= 1 << bit
+    quality = np.empty(INFO_MASKS, np.float32)
+    for info in range(INFO_MASKS):
+        fit = bin(info & wanted).count("1") / bin(wanted).count("1") if wanted else 1.0
+        quality[info] = interest * (1 + INFO_WEIGHT * fit)
+    return category, regions, quality
+
+
+def _records(survey, source):
+    for values, _ in iter_source(survey, source):
+        yield dict(zip(survey.columns, values))
+
+
+@dataclass(frozen=True)
+class Match:
+    row: int  # position of the matched response in its store
+    score: float
+
+
+def _top(ids, scores, k):
+    """The ``k`` best positive ``(id, score)`` pairs, best first."""
+    if len(scores) > k:
+        keep = np.argpartition(-scores, k - 1)[:k]
+        ids, scores = ids[keep], scores[keep]
+    order = np.argsort(-scores, kind="stable")
+    return [(int(ids[i]), float(scores[i])) for i in order if scores[i] > 0]
+
+
+# ---------- indexes ----------
+class BusinessIndex:
+    """Businesses ranked by quality per ``(category, region, info)``."""
+
+    def __init__(self, profiles, rows=None, depth=MAX_K):
+        _require_numpy()
+        profiles = list(profiles)
+        self.rows = np.asarray(rows if rows is not None else range(len(profiles)), np.int64)
+        self.category = np.array([p[0] for p in profiles], np.int16)
+        self.regions = np.array([p[1] for p in profiles], np.uint32)
+        self.quality = (np.vstack([p[2] for p in profiles]) if profiles
+                        else np.zeros((0, INFO_MASKS), np.float32))
+        self.depth = depth
+        self.postings = {}
+        for c in range(len(CATEGORIES)):
+            in_category = np.flatnonzero((self.category == c) & (self.quality[:, 0] > 0))
+            for r in range(len(REGIONS) + 1):
+                members = in_category[(self.regions[in_category] >> r) & 1 == 1]
+                for info in range(INFO_MASKS):
+                    quality = self.quality[members, info]
+                    order = np.argsort(-quality, kind="stable")[:depth]
+                    self.postings[c, r, info] = (members[order], quality[order])
+
+    @classmethod
+    def from_records(cls, records, depth=MAX_K):
+        return cls((business_profile(r) for r in records), depth=depth)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def candidates(self, need, region, info, k):
+        """Parallel arrays of positions and scores for one newcomer (at most k per category)."""
+        ids, scores = [], []
+        for c in np.flatnonzero(need):
+            members, quality = self.postings[c, region, info]
+            ids.append(members[:k])
+            scores.append(quality[:k] * need[c])
+        if not ids:
+            return np.zeros(0, np.int64), np.zeros(0, np.float32)
+        return np.concatenate(ids), np.concatenate(scores)
+
+    def top(self, need, region, info, k=DEFAULT_K):
+        """Best ``(position, score)`` pairs for one newcomer profile."""
+        return _top(*self.candidates(need, region, info, min(k, self.depth)), k)
+
+    def top_many(self, needs, region, info, k=DEFAULT_K):
+        """Top-k for many newcomers sharing ``region`` and ``info``.
+
+        Returns ``(positions, scores)``, both ``len(needs) x k``; missing
+        entries have position -1 and score 0.
+        """
+        k = min(k, self.depth)
+        blocks, ids = [], []
+        for c in np.flatnonzero(needs.any(axis=0)):
+            members, quality = self.postings[c, region, info]
+            members, quality = members[:k], quality[:k]
+            ids.append(members)
+            blocks.append(needs[:, c, None] * quality[None, :])
+        out_ids = np.full((len(needs), k), -1, np.int64)
+        out_scores = np.zeros((len(needs), k), np.float32)
+        if not ids:
+            return out_ids, out_scores
+        ids = np.concatenate(ids)
+        scores = np.hstack(blocks)
+        if scores.shape[1] > k:
+            keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            scores = np.take_along_axis(scores, keep, axis=1)
+            ids = ids[keep]
+        else:
+            ids = np.broadcast_to(ids, scores.shape)
+        order = np.argsort(-scores, axis=1, kind="stable")
+        scores = np.take_along_axis(scores, order, axis=1)
+        ids = np.take_along_axis(ids, order, axis=1)
+        width = scores.shape[1]
+        out_scores[:, :width] = scores
+        out_ids[:, :width] = np.where(scores > 0, ids, -1)
+        return out_ids, out_scores
+
+
+class NewcomerIndex:
+    """Newcomers ranked by need per ``(category, region, info)``."""
+
+    def __init__(self, needs, regions, infos, rows=None, depth=MAX_K):
+        _require_numpy()
+        needs = np.asarray(needs, np.float32).reshape(-1, len(CATEGORIES))
+        regions = np.asarray(regions, np.int64)
+        infos = np.asarray(infos, np.int64)
+        self.rows = np.asarray(rows if rows is not None else range(len(needs)), np.int64)
+        self.depth = depth
+        self.postings = {}
+        empty = (np.zeros(0, np.int64), np.zeros(0, np.float32))
+        group = regions * INFO_MASKS + infos
+        for c in range(len(CATEGORIES)):
+            members = np.flatnonzero(needs[:, c] > 0)
+            # By group, then by need descending: each group's best come first.
+            order = np.lexsort((-needs[members, c], group[members]))
+            members = members[order]
+            groups = group[members]
+            for r in range(len(REGIONS) + 1):
+                for info in range(INFO_MASKS):
+                    g = r * INFO_MASKS + info
+                    lo = np.searchsorted(groups, g)
+                    hi = min(np.searchsorted(groups, g, side="right"), lo + depth)
+                    if hi > lo:
+                        chosen = members[lo:hi]
+                        self.postings[c, r, info] = (chosen, needs[chosen, c])
+                    else:
+                        self.postings[c, r, info] = empty
+
+    def __len__(self):
+        return len(self.rows)
+
+    def top(self, category, regions, quality, k=DEFAULT_K):
+        """Best ``(position, score)`` pairs for one business profile."""
+        if category < 0:
+            return []
+        k = min(k, self.depth)
+        ids, scores = [], []
+        for r in range(len(REGIONS) + 1):
+            if not regions >> r & 1:
+                continue
+            for info in range(INFO_MASKS):
+                members, need = self.postings[category, r, info]
+                if len(members):
+                    ids.append(members[:k])
+                    scores.append(need[:k] * quality[info])
+        if not ids:
+            return []
+        return _top(np.concatenate(ids), np.concatenate(scores), k)
+
+
+def load_newcomers(source=None, depth=MAX_K):
+    """Profile every customer response. Returns ``(needs, regions, infos)`` arrays."""
+    _require_numpy()
+    survey = load_survey("customer")
+    needs, regions, infos = [], [], []
+    for record in _records(survey, source):
+        need, region, info = newcomer_profile(record)
+        needs.append(need)
+        regions.append(region)
+        infos.append(info)
+    needs = np.vstack(needs) if needs else np.zeros((0, len(CATEGORIES)), np.float32)
+    return needs, np.array(regions, np.int64), np.array(infos, np.int64)
+
+
+class MatchingEngine:
+    """Both indexes, for per-query use (e.g. from a Streamlit page)."""
+
+    def __init__(self, businesses, newcomers=None):
+        self.businesses = businesses
+        self.newcomers = newcomers
+
+    @classmethod
+    def load(cls, customer_source=None, business_source=None, newcomers=True, depth=MAX_K):
+        _require_numpy()
+        check_vocabulary(load_survey("customer"), load_survey("business"))
+        businesses = BusinessIndex.from_records(_records(load_survey("business"), business_source),
+                                                depth=depth)
+        index = NewcomerIndex(*load_newcomers(customer_source), depth=depth) if newcomers else None
+        return cls(businesses, index)
+
+    def for_newcomer(self, record, k=DEFAULT_K):
+        """Best businesses for a customer record (e.g. the one just submitted)."""
+        hits = self.businesses.top(*newcomer_profile(record), k)
+        return [Match(int(self.businesses.rows[i]), score) for i, score in hits]
+
+    def for_business(self, record, k=DEFAULT_K):
+        """Best newcomers for a business record."""
+        if self.newcomers is None:
+            raise RuntimeError("This engine was loaded without the newcomer index")
+        hits = self.newcomers.top(*business_profile(record), k)
+        return [Match(int(self.newcomers.rows[i]), score) for i, score in hits]
+
+
+# ---------- batch ----------
+_worker_state = None
+
+
+def _init_worker(state):
+    global _worker_state
+    _worker_state = state
+
+
+def _match_newcomers(args):
+    """Top-k businesses for a contiguous slice of newcomers."""
+    needs, regions, infos, k = args
+    businesses = _worker_state
+    ids = np.full((len(needs), k), -1, np.int64)
+    scores = np.zeros((len(needs), k), np.float32)
+    group = regions * INFO_MASKS + infos
+    for g in np.unique(group):
+        members = np.flatnonzero(group == g)
+        ids[members], scores[members] = businesses.top_many(
+            needs[members], int(g // INFO_MASKS), int(g % INFO_MASKS), k)
+    return ids, scores
+
+
+def _match_businesses(args):
+    """Top-k newcomers for a contiguous slice of businesses."""
+    start, stop, k = args
+    businesses, newcomers = _worker_state
+    results = []
+    for b in range(start, stop):
+        profile = (int(businesses.category[b]), int(businesses.regions[b]), businesses.quality[b])
+        results.append(newcomers.top(*profile, k))
+    return results
+
+
+def _map(function, tasks, state, workers):
+    """``map`` over a process pool whose workers hold ``state``; inline for one worker."""
+    if workers == 1:
+        _init_worker(state)
+        yield from map(function, tasks)
+        return
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(state,)) as pool:
+        yield from pool.map(function, tasks)
+
+
+def _write(out, header, rows):
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    tmp_path = out + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        count = 0
+        for chunk in rows:
+            writer.writerows(chunk)
+            count += len(chunk)
+    os.replace(tmp_path, out)
+    return count
+
+
+def match_all_newcomers(out, k=DEFAULT_K, workers=None, customer_source=None,
+                        business_source=None, progress=None):
+    """Write the top-k businesses of every newcomer to ``out``. Returns rows written."""
+    _require_numpy()
+    check_vocabulary(load_survey("customer"), load_survey("business"))
+    businesses = BusinessIndex.from_records(_records(load_survey("business"), business_source))
+    needs, regions, infos = load_newcomers(customer_source)
+    progress = progress or Progress("match newcomers", enabled=False)
+    progress.total = len(needs)
+    tasks = ((needs[i:i + CHUNK_ROWS], regions[i:i + CHUNK_ROWS], infos[i:i + CHUNK_ROWS], k)
+             for i in range(0, len(needs), CHUNK_ROWS))
+
+    def rows():
+        start = 0
+        for ids, scores in _map(_match_newcomers, tasks, businesses, workers):
+            chunk = []
+            for offset, (row_ids, row_scores) in enumerate(zip(ids, scores)):
+                for rank, (b, score) in enumerate(zip(row_ids, row_scores), 1):
+                    if b >= 0:
+                        chunk.append((start + offset, rank, int(businesses.rows[b]), f"{score:.4f}"))
+            start += len(ids)
+            progress.update(len(ids), start)
+            yield chunk
+
+    count = _write(out, ("newcomer_row", "rank", "business_row", "score"), rows())
+    progress.done()
+    return count
+
+
+def match_all_businesses(out, k=DEFAULT_K, workers=None, customer_source=None,
+                         business_source=None, progress=None):
+    """Write the top-k newcomers of every business to ``out``. Returns rows written."""
+    _require_numpy()
+    check_vocabulary(load_survey("customer"), load_survey("business"))
+    businesses = BusinessIndex.from_records(_records(load_survey("business"), business_source))
+    newcomers = NewcomerIndex(*load_newcomers(customer_source))
+    progress = progress or Progress("match businesses", enabled=False)
+    progress.total = len(businesses)
+    step = max(1, CHUNK_ROWS // 16)
+    tasks = ((i, min(i + step, len(businesses)), k) for i in range(0, len(businesses), step))
+
+    def rows():
+        start = 0
+        for results in _map(_match_businesses, tasks, (businesses, newcomers), workers):
+            chunk = []
+            for offset, hits in enumerate(results):
+                business_row = int(businesses.rows[start + offset])
+                for rank, (n, score) in enumerate(hits, 1):
+                    chunk.append((business_row, rank, int(newcomers.rows[n]), f"{score:.4f}"))
+            start += len(results)
+            progress.update(len(results), start)
+            yield chunk
+
+    count = _write(out, ("business_row", "rank", "newcomer_row", "score"), rows())
+    progress.done()
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Match newcomers with businesses for referrals.")
+    parser.add_argument("direction", choices=["newcomers", "businesses"],
+                        help="rank businesses for every newcomer, or newcomers for every business")
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help=f"matches per row (max {MAX_K})")
+    parser.add_argument("--workers", type=int, help="processes (default: CPU count)")
+    parser.add_argument("--customer-source", help="customer responses (default: the configured store)")
+    parser.add_argument("--business-source", help="business responses (default: the configured store)")
+    parser.add_argument("--out", help="output CSV (default: data/exports/matches_<direction>.csv)")
+    parser.add_argument("--quiet", action="store_true", help="no progress output")
+    args = parser.parse_args(argv)
+    if not 1 <= args.k <= MAX_K:
+        parser.error(f"--k must be between 1 and {MAX_K}")
+
+    out = args.out or os.path.join(EXPORT_DIR, f"matches_{args.direction}.csv")
+    run = match_all_newcomers if args.direction == "newcomers" else match_all_businesses
+    progress = Progress(f"match {args.direction}", enabled=not args.quiet)
+    count = run(out, k=args.k, workers=args.workers, customer_source=args.customer_source,
+                business_source=args.business_source, progress=progress)
+    print(f"Wrote {count} matches to {out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,321 @@
+# --------------------------------------------------------
+# Process metrics in Prometheus text format
+# --------------------------------------------------------
+"""Counters, gauges and histograms for the apps, readable by a local scraper.
+
+Metrics live in one process-wide :data:`REGISTRY`, shared by every session
+like the sinks. They are exposed in the Prometheus text format, in either
+or both of two ways:
+
+* ``BRIDGEAI_METRICS_PORT=9108`` serves ``http://127.0.0.1:9108/metrics``
+  from a background thread (``BRIDGEAI_METRICS_HOST`` changes the address);
+* ``BRIDGEAI_METRICS_FILE=data/metrics.prom`` rewrites that file every
+  ``BRIDGEAI_METRICS_INTERVAL`` seconds (default 15) and at exit, for the
+  node_exporter textfile collector or a plain ``cat``.
+
+Both start the first time an app creates a rerun timer (see
+``bridgeai.instrument``). What is recorded:
+
+* ``bridgeai_rerun_seconds{app}`` – full script runs;
+* ``bridgeai_phase_seconds{app,phase}`` – the blocks wrapped in
+  :func:`timed`: form rendering and each step of the submit branch;
+* ``bridgeai_storage_write_seconds{survey}`` – backend writes (file open,
+  CSV encode and write, fsync), timed in the sink;
+* ``bridgeai_submissions_total``, ``bridgeai_submit_errors_total``,
+  ``bridgeai_validation_errors_total``, ``bridgeai_screened_total``;
+* ``bridgeai_response_bytes{survey}`` and ``bridgeai_sink_pending{survey}``,
+  read at scrape time;
+* ``bridgeai_collector_rows_total``, ``bridgeai_spooled_total`` and
+  ``bridgeai_replayed_total`` when a collector is in use (see
+  ``bridgeai.collector``).
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+log = logging.getLogger(__name__)
+
+METRICS_PORT = os.environ.get("BRIDGEAI_METRICS_PORT")
+METRICS_HOST = os.environ.get("BRIDGEAI_METRICS_HOST", "127.0.0.1")
+METRICS_FILE = os.environ.get("BRIDGEAI_METRICS_FILE")
+METRICS_INTERVAL = float(os.environ.get("BRIDGEAI_METRICS_INTERVAL", "15"))
+
+# Seconds; Streamlit reruns sit in the 10 ms - 1 s range.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines += self._samples()
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonic count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        super().__init__(name, help_text)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Current value per label set, set directly or read from a callback."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text):
+        super().__init__(name, help_text)
+        self._values = {}
+        self._functions = {}
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def set_function(self, function, **labels):
+        """Call ``function()`` at every scrape; errors skip the sample."""
+        with self._lock:
+            self._functions[_label_key(labels)] = function
+
+    def _samples(self):
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, function in functions.items():
+            try:
+                values[key] = function()
+            except Exception as exc:
+                log.debug("Gauge %s%s failed: %s", self.name, _format_labels(key), exc)
+        return [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    """Cumulative buckets, sum and count per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # label key -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels):
+        with self._lock:
+            state = self._values.get(_label_key(labels))
+            return state[-1] if state else 0
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, hits in zip(self.buckets, state):
+                cumulative += hits
+                le = (("le", _format_value(float(bound))),)
+                lines.append(f"{self.name}_bucket{_format_labels(key, le)} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, (('le', '+Inf'),))} {state[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {state[-1]}")
+        return lines
+
+
+class Registry:
+    """Named metrics of one process."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, help_text):
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name, help_text):
+        return self._get(Gauge, name, help_text)
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+RERUN_SECONDS = REGISTRY.histogram("bridgeai_rerun_seconds", "Streamlit script run time.")
+PHASE_SECONDS = REGISTRY.histogram("bridgeai_phase_seconds", "Time spent in a named block of an app.")
+STORAGE_WRITE_SECONDS = REGISTRY.histogram(
+    "bridgeai_storage_write_seconds", "Backend append time per batch (open, encode, write, fsync).")
+SUBMISSIONS = REGISTRY.counter("bridgeai_submissions_total", "Responses handed to the sink.")
+SUBMIT_ERRORS = REGISTRY.counter("bridgeai_submit_errors_total", "Exceptions raised in a timed block.")
+VALIDATION_ERRORS = REGISTRY.counter(
+    "bridgeai_validation_errors_total", "Submissions sent back by a validation rule.")
+SCREENED = REGISTRY.counter("bridgeai_screened_total", "Duplicate/spam screening verdicts.")
+RESPONSE_BYTES = REGISTRY.gauge("bridgeai_response_bytes", "Size of the stored responses.")
+SINK_PENDING = REGISTRY.gauge("bridgeai_sink_pending", "Records queued in the sink, not yet written.")
+
+
+@contextmanager
+def timed(app, phase):
+    """Time a block as ``bridgeai_phase_seconds{app,phase}``; count its exceptions."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        SUBMIT_ERRORS.inc(app=app, phase=phase)
+        raise
+    finally:
+        PHASE_SECONDS.observe(time.perf_counter() - started, app=app, phase=phase)
+
+
+# ---------- exposition ----------
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # keep scrapes out of the app's stderr
+        log.debug("metrics %s", format % args)
+
+
+def serve(port, host=METRICS_HOST):
+    """Serve ``/metrics`` on a daemon thread. Returns the server."""
+    server = ThreadingHTTPServer((host, int(port)), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def write_file(path):
+    """Atomically replace ``path`` with the current metrics."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(REGISTRY.render())
+    os.replace(tmp_path, path)
+
+
+def _file_writer(path, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            write_file(path)
+        except OSError as exc:
+            log.warning("Could not write metrics to %s: %s", path, exc)
+
+
+_started = False
+_start_lock = threading.Lock()
+
+
+def autostart():
+    """Start the configured exporters once per process."""
+    global _started
+    with _start_lock:
+        if _started:
+            return
+        _started = True
+    if METRICS_PORT:
+        try:
+            serve(METRICS_PORT)
+        except OSError as exc:  # e.g. a second app process on the same port
+            log.warning("Metrics endpoint on port %s not started: %s", METRICS_PORT, exc)
+    if METRICS_FILE:
+        os.makedirs(os.path.dirname(os.path.abspath(METRICS_FILE)), exist_ok=True)
+        threading.Thread(target=_file_writer, args=(METRICS_FILE, METRICS_INTERVAL),
+                         name="metrics-file", daemon=True).start()
+        atexit.register(write_file, METRICS_FILE)
@@ -0,0 +1,181 @@
+# --------------------------------------------------------
+# Schema migration for the response CSVs
+# --------------------------------------------------------
+"""Rewrite a response file into the current layout.
+
+The header row is only written when a file is created, so changing the
+question list used to leave files whose rows no longer matched their
+header. :func:`migrate` streams such a file through
+:class:`bridgeai.reader.RowMapper`:
+
+* rows matching the file's header are mapped by column name (following the
+  survey's renames), as are untagged rows of any earlier :class:`Layout`;
+* every row is re-tagged with the survey's current ``schema_version``;
+* rows that fit no known layout go to ``<file>.rejects.csv`` untouched.
+
+Headerless files are handled the same way. The rewrite goes to a temporary
+file in constant memory and replaces the original with an atomic rename.
+The old file is kept as ``<file>.bak`` unless ``--no-backup`` is given.
+Writers are blocked for the duration, since the file lock is held
+throughout.
+
+Rows carry their version, so a later schema change only needs a new
+``Layout``. Readers map old rows on the fly. Writers do not append under an
+out-of-date header: ``CSVBackend`` runs :func:`migrate` on the file before
+its first write, and ``SegmentedCSVBackend`` starts a new segment. Run it
+ahead of a deploy to pick the moment yourself::
+
+    python -m bridgeai.migrate customer --check
+    python -m bridgeai.migrate customer
+"""
+
+import argparse
+import os
+import shutil
+import sys
+from collections import Counter
+
+from bridgeai.locking import FileLock, encode_rows
+from bridgeai.reader import RowMapper, is_header, iter_rows, read_header
+from bridgeai.schema import SURVEYS, load_survey
+
+WRITE_BATCH = 4096
+
+
+class MigrationReport:
+    """What a migration found (or, with ``dry_run``, would do)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.header = None
+        self.by_version = Counter()  # version (or "header") -> rows
+        self.rejected = 0
+        self.dropped_columns = ()
+        self.changed = False
+
+    @property
+    def rows(self):
+        return sum(self.by_version.values())
+
+    def summary(self):
+        lines = [f"{self.path}: {self.rows} row(s) mapped, {self.rejected} rejected"]
+        for version, count in sorted(self.by_version.items(), key=str):
+            lines.append(f"  {version}: {count}")
+        if self.dropped_columns:
+            lines.append(f"  dropped columns: {', '.join(self.dropped_columns)}")
+        if not self.changed:
+            lines.append("  already up to date")
+        return "\n".join(lines)
+
+
+def _dropped(survey, header):
+    if header is None:
+        return ()
+    renames = survey.renames
+    known = set(survey.stored_columns)
+    return tuple(c for c in header if renames.get(c, c) not in known)
+
+
+def migrate(survey, path=None, dry_run=False, backup=True, rejects_path=None):
+    """Rewrite ``path`` (default: the survey's file) in the current layout."""
+    path = path or survey.csv_path
+    rejects_path = rejects_path or path + ".rejects.csv"
+    report = MigrationReport(path)
+    if not os.path.exists(path):
+        return report
+
+    with FileLock(path):
+        header, start = read_header(path, lock=False)
+        if header is not None and not is_header(header):
+            header, start = None, 0
+        report.header = header
+        report.dropped_columns = _dropped(survey, header)
+        mapper = RowMapper(survey, header)
+        current = str(survey.version)
+        report.changed = header != list(survey.stored_columns)
+
+        tmp_path = path + ".migrating"
+        out = rejects = None
+        try:
+            if not dry_run:
+                out = open(tmp_path, "wb")
+                out.write(encode_rows([], survey.stored_columns))
+            batch, bad = [], []
+            for row, _ in iter_rows(path, start, lock=False):
+                version, positions = mapper.match(row)
+                if positions is None:
+                    report.rejected += 1
+                    bad.append(row)
+                    continue
+                report.by_version[version if version is not None else "header"] += 1
+                if version != survey.version or row[-1] != current:
+                    report.changed = True
+                batch.append([row[i] if i is not None else "" for i in positions] + [current])
+                if len(batch) >= WRITE_BATCH:
+                    if out is not None:
+                        out.write(encode_rows(batch))
+                    batch = []
+                if len(bad) >= WRITE_BATCH:
+                    rejects = _write_rejects(rejects, rejects_path, bad, dry_run)
+                    bad = []
+            if out is not None and batch:
+                out.write(encode_rows(batch))
+            if bad:
+                rejects = _write_rejects(rejects, rejects_path, bad, dry_run)
+            report.changed = report.changed or report.rejected > 0
+
+            if out is not None:
+                out.flush()
+                os.fsync(out.fileno())
+                out.close()
+                out = None
+                if report.changed:
+                    if backup:
+                        _backup(path, path + ".bak")
+                    os.replace(tmp_path, path)
+        finally:
+            if out is not None:
+                out.close()
+            if rejects is not None:
+                rejects.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return report
+
+
+def _write_rejects(handle, path, rows, dry_run):
+    if dry_run:
+        return None
+    if handle is None:
+        handle = open(path, "ab")
+    handle.write(encode_rows(rows))
+    return handle
+
+
+def _backup(path, backup_path):
+    if os.path.exists(backup_path):
+        os.remove(backup_path)
+    try:
+        os.link(path, backup_path)  # no copy; the rename below leaves it as the old file
+    except OSError:
+        shutil.copy2(path, backup_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rewrite a survey response file in the current layout.")
+    parser.add_argument("survey", choices=SURVEYS)
+    parser.add_argument("--path", help="response CSV to migrate (default: the survey's file)")
+    parser.add_argument("--check", action="store_true", help="report what would change, write nothing")
+    parser.add_argument("--no-backup", action="store_true", help="do not keep <file>.bak")
+    parser.add_argument("--rejects", help="where to write unmappable rows (default: <file>.rejects.csv)")
+    args = parser.parse_args(argv)
+
+    survey = load_survey(args.survey)
+    report = migrate(survey, args.path, dry_run=args.check, backup=not args.no_backup,
+                     rejects_path=args.rejects)
+    print(report.summary())
+    return 1 if args.check and report.changed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
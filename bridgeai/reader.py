@@ -0,0 +1,184 @@
+# --------------------------------------------------------
+# Streaming reader for the response CSVs
+# --------------------------------------------------------
+"""Read response files record by record, tracking byte offsets.
+
+Free-text answers may contain newlines, so a CSV record can span several
+physical lines. :func:`iter_rows` reassembles records by quote parity and
+reports the byte offset just past each one, so callers can resume exactly
+where they stopped and only parse rows appended since. An incomplete record
+at the end of the file (a writer mid-append or a torn tail) is left for the
+next call.
+"""
+
+import csv
+import io
+import os
+
+from bridgeai.locking import FileLock
+
+CHUNK_SIZE = 1 << 20
+
+
+def _parse(block):
+    text = block.decode("utf-8", errors="replace")
+    return csv.reader(io.StringIO(text, newline=""))
+
+
+def iter_rows(path, offset=0, end=None, lock=True):
+    """Yield ``(row, end_offset)`` for each complete record after ``offset``.
+
+    ``end`` caps the bytes read (defaults to the size when reading starts).
+    With ``lock=True`` a shared lock is held for the whole read, so no writer
+    can append while the generator is active; consume it promptly.
+    """
+    if not os.path.exists(path):
+        return
+    guard = FileLock(path, shared=True) if lock else None
+    if guard is not None:
+        guard.acquire()
+    try:
+        with open(path, "rb") as f:
+            if end is None:
+                end = os.fstat(f.fileno()).st_size
+            f.seek(offset)
+            position = offset
+            record = b""
+            quotes = 0
+            # Complete records are batched into blocks and parsed by one reader.
+            block = []
+            ends = []
+            block_size = 0
+            while position < end:
+                line = f.readline(min(CHUNK_SIZE, end - position))
+                if not line:
+                    break
+                position += len(line)
+                record += line
+                quotes += line.count(b'"')
+                if quotes % 2 or not record.endswith(b"\n"):
+                    continue
+                if record.strip():
+                    block.append(record)
+                    ends.append(position)
+                    block_size += len(record)
+                record = b""
+                quotes = 0
+                if block_size >= CHUNK_SIZE:
+                    yield from zip(_parse(b"".join(block)), ends)
+                    block, ends, block_size = [], [], 0
+            if block:
+                yield from zip(_parse(b"".join(block)), ends)
+    finally:
+        if guard is not None:
+            guard.release()
+
+
+def read_header(path, lock=True):
+    """Return ``(header, offset_after_header)``, or ``(None, 0)`` for an empty file."""
+    for row, offset in iter_rows(path, lock=lock):
+        return row, offset
+    return None, 0
+
+
+def iter_records(path, columns=None, offset=None, lock=True):
+    """Yield ``(record_dict, end_offset)`` keyed by the file's own header.
+
+    Rows whose width does not match the header are skipped. Pass ``columns``
+    to read a headerless file.
+    """
+    if columns is None:
+        columns, start = read_header(path)
+        if columns is None:
+            return
+    else:
+        start = 0
+    if offset is None or offset < start:
+        offset = start
+    width = len(columns)
+    for row, end in iter_rows(path, offset, lock=lock):
+        if len(row) == width:
+            yield dict(zip(columns, row)), end
+
+
+# ---------- version-aware mapping ----------
+def is_header(row):
+    """Whether ``row`` looks like a header rather than a headerless file's first record."""
+    return bool(row) and row[0] == "timestamp"
+
+
+class RowMapper:
+    """Map rows of any known layout onto a survey's current columns.
+
+    A row is matched, in order, as:
+
+    1. a tagged row – its last field is a schema version and the width is
+       that layout's plus one;
+    2. a row as wide as the file's own ``header`` – columns matched by name,
+       following the survey's renames;
+    3. an untagged row of an earlier layout, recognised by its width.
+
+    :meth:`map` returns the values in ``survey.columns`` order, or ``None``
+    when the row fits none of these.
+    """
+
+    def __init__(self, survey, header=None):
+        self.survey = survey
+        self.columns = survey.columns
+        self.renames = survey.renames
+        self.tagged = {}
+        self.by_width = {}
+        layouts = survey.layouts + (survey.layout(survey.version),)
+        for layout in layouts:
+            positions = self._positions(layout.columns, dict(layout.renames))
+            self.tagged[str(layout.version)] = (len(layout.columns) + 1, positions)
+            self.by_width[len(layout.columns)] = (layout.version, positions)
+        self.header_width = None
+        if header is not None:
+            names = list(header)
+            if names and names[-1] == survey.stored_columns[-1]:
+                names = names[:-1]  # tag is checked per row
+            else:
+                self.header_width = len(names)
+                self.header_positions = self._positions(names, self.renames)
+
+    def _positions(self, names, renames):
+        index = {}
+        for i, name in enumerate(names):
+            index.setdefault(renames.get(name, name), i)
+        return [index.get(column) for column in self.columns]
+
+    def match(self, row):
+        """Return ``(version, positions)`` for ``row``; version is ``None`` for header matches."""
+        if row:
+            tagged = self.tagged.get(row[-1])
+            if tagged is not None and tagged[0] == len(row):
+                return int(row[-1]), tagged[1]
+        if self.header_width == len(row):
+            return None, self.header_positions
+        return self.by_width.get(len(row), (None, None))
+
+    def map(self, row):
+        version, positions = self.match(row)
+        if positions is None:
+            return None
+        return [row[i] if i is not None else "" for i in positions]
+
+
+def iter_survey_rows(survey, path, offset=None, lock=True):
+    """Yield ``(values, end_offset)`` in current column order for every mappable record.
+
+    Works on headerless files and on files mixing several layouts.
+    """
+    header, start = read_header(path)
+    if header is None:
+        return
+    if not is_header(header):
+        header, start = None, 0
+    if offset is None or offset < start:
+        offset = start
+    mapper = RowMapper(survey, header)
+    for row, end in iter_rows(path, offset, lock=lock):
+        values = mapper.map(row)
+        if values is not None:
+            yield values, end
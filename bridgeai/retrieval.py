@@ -0,0 +1,318 @@
+# --------------------------------------------------------
+# Offline retrieval index for the newcomer assistant
+# --------------------------------------------------------
+"""Hashed TF-IDF index over the knowledge base.
+
+Documents are the curated :data:`bridgeai.knowledge.SNIPPETS` only. Survey
+answers are never indexed: respondents were promised anonymity, and free
+text often holds names, employers or contact details, so nothing they wrote
+is shown to other visitors. Each document becomes a sparse vector:
+
+* terms and adjacent term pairs from :func:`bridgeai.textindex.tokenize`
+  are hashed into ``2**18`` buckets (no vocabulary to store or grow);
+* weights are ``(1 + log tf) * idf``, L2-normalized, so a dot product is
+  the cosine similarity.
+
+The matrix is stored column-major (CSC: one slice of documents per bucket)
+as plain ``.npy`` files next to the document texts. Each build goes into a
+new directory under ``data/retrieval/`` and a ``CURRENT`` file points to
+the finished one, so readers never see a half-written index. The build it
+replaced is kept until the next one, so a reader that has just read
+``CURRENT`` can still open it. A changed knowledge base triggers a
+background rebuild at most every ``BRIDGEAI_RETRIEVAL_REFRESH`` seconds
+(default 300). A query
+touches only the slices of its own buckets, whatever the corpus size.
+:class:`RetrievalIndex` memory-maps the files, so processes share the
+pages through the OS cache and load is instant.
+
+Requires ``numpy``; runs offline on CPU::
+
+    python -m bridgeai.retrieval build
+    python -m bridgeai.retrieval query "how do I get a health card"
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+
+from bridgeai.knowledge import SNIPPETS, knowledge_version
+from bridgeai.locking import FileLock
+from bridgeai.storage import DATA_DIR
+from bridgeai.textindex import tokenize
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+INDEX_DIR = os.path.join(DATA_DIR, "retrieval")
+CURRENT = "CURRENT"
+BUCKETS = 1 << 18
+REFRESH_SECONDS = float(os.environ.get("BRIDGEAI_RETRIEVAL_REFRESH", "300"))
+
+# Document kinds
+SNIPPET = 0
+
+log = logging.getLogger(__name__)
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("The retrieval index needs numpy: pip install numpy")
+
+
+def features(text):
+    """``{bucket: count}`` for the terms and term pairs of ``text``."""
+    terms = tokenize(text)
+    grams = terms + [f"{a} {b}" for a, b in zip(terms, terms[1:])]
+    return Counter(zlib.crc32(g.encode("utf-8")) & (BUCKETS - 1) for g in grams)
+
+
+# ---------- string tables ----------
+def _write_strings(path, strings):
+    """Concatenated UTF-8 in ``<path>.bin`` with offsets in ``<path>.idx.npy``."""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    with open(path + ".bin", "wb") as f:
+        f.write(b"".join(encoded))
+    np.save(path + ".idx.npy", offsets)
+
+
+class _Strings:
+    def __init__(self, path):
+        self.offsets = np.load(path + ".idx.npy", mmap_mode="r")
+        size = int(self.offsets[-1])
+        # np.memmap cannot map an empty file
+        self.blob = np.memmap(path + ".bin", np.uint8, "r") if size else np.zeros(0, np.uint8)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+
+# ---------- sources ----------
+def source_state():
+    """What the index was built from: the knowledge base version."""
+    return {"knowledge": knowledge_version()}
+
+
+def _documents():
+    """Yield ``(kind, ref, text, indexed text)`` for every document."""
+    for snippet in SNIPPETS:
+        yield SNIPPET, snippet.key, snippet.text, snippet.document
+
+
+# ---------- building ----------
+def build(directory=INDEX_DIR):
+    """Build a new index from the current sources. Returns its directory."""
+    _require_numpy()
+    state = source_state()
+    os.makedirs(directory, exist_ok=True)
+    with FileLock(os.path.join(directory, "build")):
+        kinds, refs, texts = [], [], []
+        doc_ids, buckets, counts = [], [], []
+        for doc, (kind, ref, text, indexed) in enumerate(_documents()):
+            kinds.append(kind)
+            refs.append(ref)
+            texts.append(text)
+            for bucket, tf in features(indexed).items():
+                doc_ids.append(doc)
+                buckets.append(bucket)
+                counts.append(tf)
+        docs = len(texts)
+        doc_ids = np.asarray(doc_ids, np.int32)
+        buckets = np.asarray(buckets, np.int64)
+        df = np.bincount(buckets, minlength=BUCKETS)
+        idf = (np.log((1 + docs) / (1 + df)) + 1).astype(np.float32)
+        weights = (1 + np.log(np.asarray(counts, np.float32))) * idf[buckets]
+        norms = np.sqrt(np.bincount(doc_ids, weights=weights * weights, minlength=docs))
+        weights = (weights / np.maximum(norms[doc_ids], 1e-12)).astype(np.float32)
+
+        order = np.argsort(buckets, kind="stable")  # CSC: documents grouped by bucket
+        indptr = np.zeros(BUCKETS + 1, np.int64)
+        indptr[1:] = np.cumsum(df)
+
+        name = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        out = os.path.join(directory, name)
+        os.makedirs(out)
+        np.save(os.path.join(out, "indptr.npy"), indptr)
+        np.save(os.path.join(out, "indices.npy"), doc_ids[order])
+        np.save(os.path.join(out, "data.npy"), weights[order])
+        np.save(os.path.join(out, "idf.npy"), idf)
+        np.save(os.path.join(out, "kinds.npy"), np.asarray(kinds, np.int8))
+        _write_strings(os.path.join(out, "texts"), texts)
+        _write_strings(os.path.join(out, "refs"), refs)
+        with open(os.path.join(out, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"docs": docs, "buckets": BUCKETS, "built_at": datetime.now().isoformat(),
+                       "source": state}, f, indent=1)
+
+        previous = current_index(directory)
+        current = os.path.join(directory, CURRENT)
+        with open(current + ".tmp", "w", encoding="utf-8") as f:
+            f.write(name)
+        os.replace(current + ".tmp", current)
+        # Older builds can go: processes still mapping them keep their pages. The one
+        # just replaced stays for readers that read CURRENT a moment ago.
+        keep = {name, os.path.basename(previous) if previous else None}
+        for old in os.listdir(directory):
+            path = os.path.join(directory, old)
+            if old not in keep and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+    return out
+
+
+def current_index(directory=INDEX_DIR):
+    """Directory of the latest finished build, or ``None``."""
+    try:
+        with open(os.path.join(directory, CURRENT), encoding="utf-8") as f:
+            return os.path.join(directory, f.read().strip())
+    except FileNotFoundError:
+        return None
+
+
+def is_stale(path):
+    """Whether the sources changed since the build at ``path``."""
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        return json.load(f)["source"] != source_state()
+
+
+def ensure_index(directory=INDEX_DIR):
+    """The current build, rebuilt first if it is missing or its sources changed."""
+    path = current_index(directory)
+    if path is not None and os.path.isdir(path) and not is_stale(path):
+        return path
+    return build(directory)
+
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+def refresh_in_background(directory=INDEX_DIR, min_interval=REFRESH_SECONDS):
+    """Start a rebuild thread if the current build is stale; never blocks.
+
+    A build younger than ``min_interval`` seconds is kept even if answers
+    arrived since, so a busy survey does not rebuild on every submission.
+    Callers keep answering from the build they have and pick up the new
+    one through :func:`current_index` once it is finished.
+    """
+    global _refresher
+    path = current_index(directory)
+    try:
+        if path is None or time.time() - os.path.getmtime(os.path.join(path, "meta.json")) < min_interval:
+            return False
+        if not is_stale(path):
+            return False
+    except FileNotFoundError:  # replaced by another process's build meanwhile
+        return False
+    with _refresher_lock:
+        if _refresher is not None and _refresher.is_alive():
+            return False
+        def run():
+            try:
+                build(directory)
+            except Exception as exc:
+                log.error("Rebuilding the retrieval index failed: %s", exc)
+
+        _refresher = threading.Thread(target=run, name="retrieval-build", daemon=True)
+        _refresher.start()
+    return True
+
+
+# ---------- querying ----------
+@dataclass(frozen=True)
+class Hit:
+    score: float
+    kind: int
+    ref: str
+    text: str
+
+
+class RetrievalIndex:
+    """A memory-mapped build, queried with sparse dot products."""
+
+    def __init__(self, path):
+        _require_numpy()
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        load = lambda name: np.load(os.path.join(path, name), mmap_mode="r")  # noqa: E731
+        self.indptr = load("indptr.npy")
+        self.indices = load("indices.npy")
+        self.data = load("data.npy")
+        self.idf = load("idf.npy")
+        self.kinds = np.asarray(load("kinds.npy"))
+        self.texts = _Strings(os.path.join(path, "texts"))
+        self.refs = _Strings(os.path.join(path, "refs"))
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def scores(self, query):
+        """Cosine similarity of ``query`` with every document."""
+        terms = features(query)
+        if not terms:
+            return np.zeros(len(self), np.float32)
+        buckets = np.fromiter(terms, np.int64, len(terms))
+        weights = (1 + np.log(np.fromiter(terms.values(), np.float32, len(terms)))) * self.idf[buckets]
+        weights /= np.linalg.norm(weights) or 1.0
+        starts, ends = self.indptr[buckets], self.indptr[buckets + 1]
+        lengths = ends - starts
+        # Gather every posting of the query buckets in one go.
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        contributions = self.data[positions] * np.repeat(weights, lengths)
+        return np.bincount(self.indices[positions], weights=contributions,
+                           minlength=len(self)).astype(np.float32)
+
+    def search(self, query, k=3, kind=None, min_score=0.0):
+        """Best ``k`` documents (optionally of one ``kind``) as :class:`Hit` objects."""
+        scores = self.scores(query)
+        if kind is not None:
+            scores[self.kinds != kind] = 0
+        candidates = np.flatnonzero(scores > min_score)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [Hit(float(scores[i]), int(self.kinds[i]), self.refs[i], self.texts[i])
+                for i in candidates]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query the assistant's retrieval index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="rebuild from the knowledge base")
+    p = sub.add_parser("query", help="show the best matches for a question")
+    p.add_argument("text")
+    p.add_argument("-k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        started = time.perf_counter()
+        path = build()
+        index = RetrievalIndex(path)
+        print(f"Indexed {len(index)} documents into {path} in {time.perf_counter() - started:.1f}s")
+        return 0
+    index = RetrievalIndex(ensure_index())
+    started = time.perf_counter()
+    hits = index.search(args.text, args.k)
+    elapsed = (time.perf_counter() - started) * 1000
+    for hit in hits:
+        print(f"{hit.score:.3f}  {hit.ref}: {hit.text[:100]}")
+    print(f"{len(index)} documents, {elapsed:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
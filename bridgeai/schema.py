@@ -0,0 +1,338 @@
+# --------------------------------------------------------
+# Declarative survey schema
+# --------------------------------------------------------
+"""One definition per survey drives the form, the header and the row.
+
+A :class:`Survey` is a list of :class:`Section` objects holding
+:class:`Question` objects. Each question knows its widget, its option set
+and the column it is stored in, so the column list, the record written by
+the apps and the widgets on screen can no longer drift apart.
+
+Questions with ``column=None`` are rendered but not stored (e.g. the Q1
+screening question). ``show_if=(key, value)`` renders a question only when
+an earlier answer equals ``value`` or, for multi-selects, contains it.
+``pii=True`` marks contact details: the column stays in the layout so
+existing files line up, but it is always written blank and the answer goes
+to the contacts store instead.
+
+Every stored row ends with a ``schema_version`` tag. When the question list
+changes, bump ``Survey.version`` and describe the old column order in a
+:class:`Layout`; readers map each row through its own version (see
+``bridgeai.reader.RowMapper``), so old files keep working without a rewrite.
+
+Survey definitions live in ``bridgeai.surveys`` and are loaded, validated
+and cached once per process by :func:`load_survey`. Everything in them is
+immutable, so Streamlit reruns and sessions share one copy instead of
+rebuilding option lists and page text on every interaction.
+"""
+
+import functools
+import importlib
+import os
+from dataclasses import dataclass, field
+
+from bridgeai.storage import DATA_DIR
+
+# ---------- column types ----------
+TIMESTAMP = "timestamp"
+TEXT = "text"
+CATEGORY = "category"
+MULTI = "multi"
+INTEGER = "int"
+
+KIND_TYPES = {
+    "radio": CATEGORY,
+    "select": CATEGORY,
+    "multiselect": MULTI,
+    "slider": INTEGER,
+    "text": TEXT,
+    "textarea": TEXT,
+}
+
+SURVEYS = ("customer", "business", "quick")
+
+VERSION_COLUMN = "schema_version"
+
+
+class SchemaError(ValueError):
+    """Raised when a survey definition is inconsistent."""
+
+
+@dataclass(frozen=True)
+class Question:
+    key: str
+    label: str
+    kind: str
+    options: tuple = ()
+    column: str = None
+    show_if: tuple = None
+    ref: str = None
+    intro: str = None
+    caption: str = None
+    help: str = None
+    placeholder: str = None
+    min_value: int = None
+    max_value: int = None
+    default: int = None
+    max_choices: int = None
+    stop_if: str = None
+    stop_message: str = None
+    stop_button: str = None
+    pii: bool = False
+
+    @property
+    def type(self):
+        return KIND_TYPES[self.kind]
+
+    def visible(self, answers):
+        """Whether this question is shown given the answers so far."""
+        if self.show_if is None:
+            return True
+        key, value = self.show_if
+        answer = answers.get(key)
+        if isinstance(answer, (list, tuple)):
+            return value in answer
+        return answer == value
+
+    def empty(self):
+        """The value stored when the question is hidden."""
+        return [] if self.kind == "multiselect" else ""
+
+
+@dataclass(frozen=True)
+class Section:
+    title: str
+    questions: tuple
+
+
+@dataclass(frozen=True)
+class Page:
+    """Static page scaffolding drawn above the form."""
+
+    title: str
+    page_title: str
+    page_icon: str
+    intro: str = ""
+    layout: str = "centered"
+    sidebar: tuple = ()  # ("markdown" | "caption", text) pairs
+    divider: bool = False
+
+
+@dataclass(frozen=True)
+class Layout:
+    """Column order written by an earlier version of a survey.
+
+    ``renames`` holds ``(old_name, current_name)`` pairs; columns with no
+    current counterpart are dropped when rows are mapped.
+    """
+
+    version: int
+    columns: tuple
+    renames: tuple = ()
+
+
+@dataclass(frozen=True, eq=False)
+class Survey:
+    name: str
+    filename: str
+    sections: tuple
+    page: Page = None
+    indexed: tuple = ()
+    version: int = 1
+    layouts: tuple = ()  # earlier Layouts, oldest first
+    published: bool = True  # False: readable by the tools, but no form or dashboard view
+    columns: tuple = field(init=False)
+    types: dict = field(init=False, repr=False)
+    by_column: dict = field(init=False, repr=False)
+
+    def __post_init__(self):
+        columns = ["timestamp"]
+        types = {"timestamp": TIMESTAMP}
+        by_column = {}
+        for question in self.questions:
+            if question.column is not None:
+                columns.append(question.column)
+                types[question.column] = question.type
+                by_column[question.column] = question
+        object.__setattr__(self, "columns", tuple(columns))
+        object.__setattr__(self, "types", types)
+        object.__setattr__(self, "by_column", by_column)
+
+    @property
+    def csv_path(self):
+        return os.path.join(DATA_DIR, self.filename)
+
+    @property
+    def questions(self):
+        return tuple(q for section in self.sections for q in section.questions)
+
+    @property
+    def stored_questions(self):
+        return tuple(q for q in self.questions if q.column is not None)
+
+    @property
+    def multi_columns(self):
+        return tuple(c for c in self.columns if self.types[c] == MULTI)
+
+    @property
+    def stored_columns(self):
+        """Columns as written to storage: the answers plus the version tag."""
+        return self.columns + (VERSION_COLUMN,)
+
+    @property
+    def renames(self):
+        """``{old_name: current_name}`` across every earlier layout."""
+        return {old: new for layout in self.layouts for old, new in layout.renames}
+
+    def layout(self, version):
+        """The :class:`Layout` rows tagged ``version`` were written with."""
+        if version == self.version:
+            return Layout(self.version, self.columns)
+        for layout in self.layouts:
+            if layout.version == version:
+                return layout
+        raise KeyError(f"{self.name} has no schema version {version}")
+
+    def question_for(self, column):
+        return self.by_column[column]
+
+    # ---------- records ----------
+    def build_record(self, answers, timestamp):
+        """Turn widget answers (keyed by question key) into a storage record."""
+        record = {"timestamp": timestamp, VERSION_COLUMN: self.version}
+        for question in self.stored_questions:
+            if question.visible(answers) and not question.pii:
+                record[question.column] = answers.get(question.key, question.empty())
+            else:
+                record[question.column] = question.empty()
+        return record
+
+    def contact_answers(self, answers):
+        """``{column: value}`` for the visible, non-blank PII answers.
+
+        These are left out of :meth:`build_record` and captured separately
+        (see ``bridgeai.contacts``).
+        """
+        return {
+            q.column: answers[q.key]
+            for q in self.stored_questions
+            if q.pii and q.visible(answers) and answers.get(q.key)
+        }
+
+    def validate_answers(self, answers):
+        """Return user-facing error messages for answers that break a rule."""
+        errors = []
+        for question in self.questions:
+            value = answers.get(question.key)
+            if question.max_choices and value and len(value) > question.max_choices:
+                errors.append(
+                    f"Please select **no more than {question.max_choices} options** "
+                    f"for {question.ref or question.key}."
+                )
+        return errors
+
+    # ---------- compact integer codes ----------
+    def encode(self, record):
+        """Encode a record's option answers as integers.
+
+        Single-choice answers become the option index (``-1`` when empty or
+        not a known option), multi-selects a bitmask over the option list and
+        sliders stay integers. Free text and the timestamp are kept as-is.
+        """
+        encoded = {}
+        for column in self.columns:
+            value = record.get(column, "")
+            kind = self.types[column]
+            if kind == CATEGORY:
+                options = self.question_for(column).options
+                encoded[column] = options.index(value) if value in options else -1
+            elif kind == MULTI:
+                options = self.question_for(column).options
+                if isinstance(value, str):
+                    value = [v for v in value.split("; ") if v]
+                mask = 0
+                for option in value:
+                    if option in options:
+                        mask |= 1 << options.index(option)
+                encoded[column] = mask
+            elif kind == INTEGER:
+                encoded[column] = int(value) if value not in ("", None) else -1
+            else:
+                encoded[column] = value
+        return encoded
+
+    def decode(self, encoded):
+        """Inverse of :meth:`encode`."""
+        record = {}
+        for column in self.columns:
+            value = encoded.get(column)
+            kind = self.types[column]
+            if kind == CATEGORY:
+                options = self.question_for(column).options
+                record[column] = options[value] if 0 <= value < len(options) else ""
+            elif kind == MULTI:
+                options = self.question_for(column).options
+                record[column] = [o for i, o in enumerate(options) if value >> i & 1]
+            elif kind == INTEGER:
+                record[column] = value if value >= 0 else ""
+            else:
+                record[column] = value
+        return record
+
+
+# ---------- validation & loading ----------
+def validate(survey):
+    """Check a survey definition for mistakes that would corrupt stored data."""
+    keys = set()
+    columns = set()
+    for question in survey.questions:
+        where = f"{survey.name}.{question.key}"
+        if question.key in keys:
+            raise SchemaError(f"{where}: duplicate question key")
+        if question.kind not in KIND_TYPES:
+            raise SchemaError(f"{where}: unknown kind {question.kind!r}")
+        if question.column is not None:
+            if question.column in columns or question.column == "timestamp":
+                raise SchemaError(f"{where}: duplicate column {question.column!r}")
+            columns.add(question.column)
+        if question.kind in ("radio", "select", "multiselect"):
+            if not question.options:
+                raise SchemaError(f"{where}: {question.kind} needs options")
+            if len(set(question.options)) != len(question.options):
+                raise SchemaError(f"{where}: duplicate options")
+        if question.kind == "slider":
+            if None in (question.min_value, question.max_value, question.default):
+                raise SchemaError(f"{where}: slider needs min_value, max_value and default")
+            if not question.min_value <= question.default <= question.max_value:
+                raise SchemaError(f"{where}: slider default out of range")
+        if question.show_if is not None and question.show_if[0] not in keys:
+            raise SchemaError(f"{where}: show_if must refer to an earlier question")
+        if question.stop_if is not None and question.stop_if not in question.options:
+            raise SchemaError(f"{where}: stop_if is not one of the options")
+        keys.add(question.key)
+    for column in survey.indexed:
+        if column not in survey.columns:
+            raise SchemaError(f"{survey.name}: indexed column {column!r} does not exist")
+    versions = [layout.version for layout in survey.layouts]
+    if len(set(versions)) != len(versions) or any(v >= survey.version for v in versions):
+        raise SchemaError(f"{survey.name}: layout versions must be unique and older than "
+                          f"version {survey.version}")
+    # Rows written before version tags are recognised by width alone, so no
+    # two layouts, tagged (one column wider) or not, may share a width.
+    widths = [len(layout.columns) + tag for layout in survey.layouts + (survey.layout(survey.version),)
+              for tag in (0, 1)]
+    if len(set(widths)) != len(widths):
+        raise SchemaError(f"{survey.name}: two layouts have the same number of columns")
+    for layout in survey.layouts:
+        for old, new in layout.renames:
+            if old not in layout.columns or new not in survey.columns:
+                raise SchemaError(f"{survey.name}: bad rename {old!r} -> {new!r} "
+                                  f"in layout {layout.version}")
+    return survey
+
+
+@functools.lru_cache(maxsize=None)
+def load_survey(name):
+    """Import, validate and cache the survey definition called ``name``."""
+    module = importlib.import_module(f"bridgeai.surveys.{name}")
+    return validate(module.SURVEY)
@@ -0,0 +1,328 @@
+# --------------------------------------------------------
+# Size/day-rotated response segments with compaction
+# --------------------------------------------------------
+"""Log-structured storage: each survey writes to a series of CSV segments.
+
+Selected with ``BRIDGEAI_STORAGE=segments``. A survey's segments live in
+``data/segments/<survey>/``. Records are appended to one *active* segment.
+The segment is sealed and a new one started when it reaches
+``BRIDGEAI_SEGMENT_MB`` (default 64) or when the local date changes. Each
+segment is an ordinary response CSV with its own header.
+
+``manifest.json`` lists the active segment and every sealed one, with its
+row count, size and SHA-256. Sealed segments never change again, so:
+
+* readers (:class:`SegmentCursor`) read each sealed segment once and only
+  track a byte offset into the active one;
+* backups (:func:`backup`) copy only segments the destination lacks;
+* :func:`compact` merges sealed segments into one Parquet file under
+  ``compacted/``. When pyarrow is installed the backend runs it on a
+  background thread, starting with the first write after a seal.
+
+Command line::
+
+    python -m bridgeai.segments status customer
+    python -m bridgeai.segments verify customer
+    python -m bridgeai.segments compact customer
+    python -m bridgeai.segments backup customer /mnt/backup/customer
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+from datetime import date, datetime
+
+from bridgeai.locking import FileLock, append_rows
+from bridgeai.reader import iter_rows, iter_survey_rows, read_header
+from bridgeai.storage import DATA_DIR, DEFAULT_STORAGE, CSVBackend
+
+SEGMENT_DIR = os.path.join(DATA_DIR, "segments")
+DEFAULT_SEGMENT_BYTES = int(float(os.environ.get("BRIDGEAI_SEGMENT_MB", "64")) * 1024 * 1024)
+MANIFEST = "manifest.json"
+COMPACTED = "compacted"
+
+log = logging.getLogger(__name__)
+
+
+def segment_dir(name):
+    return os.path.join(SEGMENT_DIR, name)
+
+
+def response_source(survey):
+    """Where the configured backend keeps ``survey``'s CSV rows: a file or a segment directory."""
+    return segment_dir(survey.name) if DEFAULT_STORAGE == "segments" else survey.csv_path
+
+
+# ---------- manifest ----------
+def _manifest_path(directory):
+    return os.path.join(directory, MANIFEST)
+
+
+def read_manifest(directory):
+    """The manifest as a dict (empty skeleton if there is none yet)."""
+    try:
+        with open(_manifest_path(directory), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"active": None, "sealed": []}
+
+
+def _write_manifest(directory, manifest):
+    path = _manifest_path(directory)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _checksum(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _seal_entry(directory, name):
+    path = os.path.join(directory, name)
+    rows = sum(1 for _ in iter_rows(path)) - 1  # minus the header
+    return {
+        "name": name,
+        "rows": max(0, rows),
+        "bytes": os.path.getsize(path),
+        "sha256": _checksum(path),
+        "sealed_at": datetime.now().isoformat(),
+        "compacted": None,
+    }
+
+
+def segment_paths(directory):
+    """Sealed segments in order, then the active one."""
+    manifest = read_manifest(directory)
+    names = [entry["name"] for entry in manifest["sealed"]]
+    if manifest["active"]:
+        names.append(manifest["active"])
+    return [os.path.join(directory, name) for name in names]
+
+
+# ---------- writer ----------
+class SegmentedCSVBackend(CSVBackend):
+    """Append to the active segment, rolling it by size or by day."""
+
+    def __init__(self, directory, name, columns, multi_columns=(), indexed=(),
+                 max_bytes=DEFAULT_SEGMENT_BYTES, compact_in_background=True):
+        super().__init__(_manifest_path(directory), name, columns, multi_columns, indexed)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.compact_in_background = compact_in_background
+        self._compactor = None
+        self._compact_due = False
+        self._checked = None  # active segment known to have the current header
+        os.makedirs(directory, exist_ok=True)
+
+    def files(self):
+        return segment_paths(self.directory)
+
+    def _new_name(self, manifest, today):
+        prefix = f"{self.name}-{today:%Y%m%d}-"
+        seq = sum(1 for e in manifest["sealed"] if e["name"].startswith(prefix)) + 1
+        return f"{prefix}{seq:04d}.csv"
+
+    def _roll(self, manifest, today):
+        """Seal the active segment if due; returns whether the manifest changed."""
+        active = manifest["active"]
+        if active is not None:
+            path = os.path.join(self.directory, active)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            current = active.startswith(f"{self.name}-{today:%Y%m%d}-") and size < self.max_bytes
+            # A segment begun by an older schema is sealed, not appended to under its header.
+            if current and (not size or active == self._checked or read_header(path)[0] == self.columns):
+                self._checked = active
+                return False
+            if size:
+                manifest["sealed"].append(_seal_entry(self.directory, active))
+        manifest["active"] = self._new_name(manifest, today)
+        return True
+
+    def append(self, records, durable=False):
+        # Compaction starts on the write after a seal, so a seal during the
+        # final drain at exit does not spawn a thread mid-shutdown.
+        if self._compact_due and self.compact_in_background:
+            self._compact_due = False
+            self._start_compaction()
+        rows = [self.to_row(r) for r in records]
+        sealed = False
+        with FileLock(self.path):  # the manifest; held while choosing the segment
+            manifest = read_manifest(self.directory)
+            before = len(manifest["sealed"])
+            if self._roll(manifest, date.today()):
+                _write_manifest(self.directory, manifest)
+                sealed = len(manifest["sealed"]) > before
+            active = os.path.join(self.directory, manifest["active"])
+            append_rows(active, self.columns, rows, fsync=durable)
+        self._compact_due = self._compact_due or sealed
+
+    def _start_compaction(self):
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return
+        from bridgeai.schema import load_survey
+
+        def run():
+            try:
+                compact(load_survey(self.name), self.directory)
+            except Exception as exc:
+                log.error("Compaction of %s failed: %s", self.directory, exc)
+
+        self._compactor = threading.Thread(target=run, name=f"compact:{self.name}", daemon=True)
+        self._compactor.start()
+
+    def close(self):
+        if self._compactor is not None:
+            self._compactor.join()
+
+
+# ---------- readers ----------
+class SegmentCursor:
+    """Remembers which segments (and how much of the active one) were read."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.reset()
+
+    def reset(self):
+        self.seen = set()
+        self.active = None
+        self.offset = None
+
+    def read_new(self, survey):
+        """Yield rows (current column order) not returned by earlier calls."""
+        manifest = read_manifest(self.directory)
+        for entry in manifest["sealed"]:
+            name = entry["name"]
+            if name in self.seen:
+                continue
+            # A segment sealed since the last call resumes where we stopped.
+            offset = self.offset if name == self.active else None
+            for values, _ in iter_survey_rows(survey, os.path.join(self.directory, name), offset):
+                yield values
+            self.seen.add(name)
+            if name == self.active:
+                self.active = self.offset = None
+        active = manifest["active"]
+        if active is None:
+            return
+        if active != self.active:
+            self.active, self.offset = active, None
+        for values, end in iter_survey_rows(survey, os.path.join(self.directory, active), self.offset):
+            self.offset = end
+            yield values
+
+
+# ---------- maintenance ----------
+def compact(survey, directory=None):
+    """Merge sealed, not yet compacted segments into one Parquet file.
+
+    Returns the compacted file name, or ``None`` if there was nothing to do.
+    """
+    from bridgeai.columnar import export
+
+    directory = directory or segment_dir(survey.name)
+    # One compaction at a time per directory, across processes.
+    with FileLock(os.path.join(directory, COMPACTED)):
+        pending = [e["name"] for e in read_manifest(directory)["sealed"] if not e.get("compacted")]
+        if not pending:
+            return None
+        first, last = pending[0][:-len(".csv")], pending[-1][:-len(".csv")]
+        out_name = f"{first}.parquet" if first == last else f"{first}__{last}.parquet"
+        export(survey, os.path.join(directory, COMPACTED, out_name),
+               source=[os.path.join(directory, name) for name in pending], fmt="parquet")
+        with FileLock(_manifest_path(directory)):
+            manifest = read_manifest(directory)
+            for entry in manifest["sealed"]:
+                if entry["name"] in pending:
+                    entry["compacted"] = f"{COMPACTED}/{out_name}"
+            _write_manifest(directory, manifest)
+    return out_name
+
+
+def verify(directory):
+    """Re-check sealed segments against the manifest. Returns a list of problems."""
+    problems = []
+    for entry in read_manifest(directory)["sealed"]:
+        path = os.path.join(directory, entry["name"])
+        if not os.path.exists(path):
+            problems.append(f"{entry['name']}: missing")
+        elif os.path.getsize(path) != entry["bytes"] or _checksum(path) != entry["sha256"]:
+            problems.append(f"{entry['name']}: checksum mismatch")
+    return problems
+
+
+def backup(directory, destination):
+    """Copy new sealed segments, the active segment and the manifest. Returns files copied."""
+    os.makedirs(destination, exist_ok=True)
+    with FileLock(_manifest_path(directory)):
+        manifest = read_manifest(directory)
+        copied = []
+        for entry in manifest["sealed"]:
+            target = os.path.join(destination, entry["name"])
+            if os.path.exists(target) and os.path.getsize(target) == entry["bytes"]:
+                continue  # sealed segments never change
+            shutil.copy2(os.path.join(directory, entry["name"]), target)
+            copied.append(entry["name"])
+        if manifest["active"]:
+            active = os.path.join(directory, manifest["active"])
+            with FileLock(active, shared=True):
+                shutil.copy2(active, os.path.join(destination, manifest["active"]))
+            copied.append(manifest["active"])
+        _write_manifest(destination, manifest)
+    return copied
+
+
+def main(argv=None):
+    from bridgeai.schema import SURVEYS, load_survey
+
+    parser = argparse.ArgumentParser(description="Inspect and maintain segmented response storage.")
+    parser.add_argument("command", choices=["status", "verify", "compact", "backup"])
+    parser.add_argument("survey", choices=SURVEYS)
+    parser.add_argument("destination", nargs="?", help="backup directory")
+    parser.add_argument("--dir", help="segment directory (default: data/segments/<survey>)")
+    args = parser.parse_args(argv)
+
+    survey = load_survey(args.survey)
+    directory = args.dir or segment_dir(survey.name)
+    if args.command == "status":
+        manifest = read_manifest(directory)
+        for entry in manifest["sealed"]:
+            print(f"{entry['name']}  {entry['rows']:>9} rows  {entry['bytes']:>12} bytes  "
+                  f"{'compacted' if entry.get('compacted') else 'sealed'}")
+        print(f"{manifest['active'] or '-'}  active")
+    elif args.command == "verify":
+        problems = verify(directory)
+        for problem in problems:
+            print(problem)
+        print("ok" if not problems else f"{len(problems)} problem(s)")
+        return 1 if problems else 0
+    elif args.command == "compact":
+        out_name = compact(survey, directory)
+        print(f"Wrote {COMPACTED}/{out_name}" if out_name else "Nothing to compact")
+    else:
+        if not args.destination:
+            parser.error("backup needs a destination directory")
+        copied = backup(directory, args.destination)
+        print(f"Copied {len(copied)} file(s) to {args.destination}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
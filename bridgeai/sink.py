@@ -0,0 +1,235 @@
+# --------------------------------------------------------
+# Batched submission writer shared by the survey apps
+# --------------------------------------------------------
+"""Process-wide submission sink.
+
+Streamlit re-runs each app script on every interaction, but imported modules
+stay loaded, so a sink registered here is shared by every session of the
+process. Records are queued in memory and handed to the storage backend
+(see ``bridgeai.storage``) in batches.
+
+Durability modes (``BRIDGEAI_DURABILITY``):
+
+* ``row``   – write each record before ``submit`` returns.
+* ``group`` – queue the record and return; a background thread commits the
+  batch when it reaches ``batch_size`` records or is ``interval_ms`` old.
+* ``fsync`` – ``submit`` waits until its record has been written and
+  fsynced. The writer syncs whatever is queued as soon as it is idle, so
+  records arriving during one fsync share the next one (group commit).
+
+With ``BRIDGEAI_COLLECTOR`` set, batches are sent to a collector process
+that owns the storage instead of being written here (see
+``bridgeai.collector``).
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+
+from bridgeai.collector import COLLECTOR_ADDRESS, CollectorBackend
+from bridgeai.metrics import RESPONSE_BYTES, SINK_PENDING, STORAGE_WRITE_SECONDS, SUBMISSIONS
+from bridgeai.storage import open_backend
+
+DURABILITY_ROW = "row"
+DURABILITY_GROUP = "group"
+DURABILITY_FSYNC = "fsync"
+DURABILITY_MODES = (DURABILITY_ROW, DURABILITY_GROUP, DURABILITY_FSYNC)
+
+DEFAULT_DURABILITY = os.environ.get("BRIDGEAI_DURABILITY", DURABILITY_GROUP)
+DEFAULT_BATCH_SIZE = int(os.environ.get("BRIDGEAI_BATCH_SIZE", "64"))
+DEFAULT_INTERVAL_MS = int(os.environ.get("BRIDGEAI_FLUSH_MS", "200"))
+
+log = logging.getLogger(__name__)
+
+
+class SubmissionSink:
+    """Queue records in memory and write them to ``backend`` in batches."""
+
+    def __init__(self, backend, durability=DEFAULT_DURABILITY,
+                 batch_size=DEFAULT_BATCH_SIZE, interval_ms=DEFAULT_INTERVAL_MS):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode: {durability!r}")
+        self.backend = backend
+        self.durability = durability
+        self.batch_size = max(1, batch_size)
+        self.interval = max(0, interval_ms) / 1000.0
+
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._pending = []
+        self._oldest = None
+        self._submitted = 0
+        self._done = 0
+        self._failures = []
+        self._flush_to = 0  # flush() waits for every ticket up to this one
+        self._closed = False
+
+        self._thread = None
+        if durability != DURABILITY_ROW:
+            self._thread = threading.Thread(
+                target=self._run, name=f"sink:{backend.name}", daemon=True
+            )
+            self._thread.start()
+
+    # ---------- public API ----------
+    def submit(self, record):
+        """Queue one record. Returns once it is as durable as the mode promises."""
+        SUBMISSIONS.inc(survey=self.backend.name)
+        if self.durability == DURABILITY_ROW:
+            with self._cond:
+                self._check_open()
+            self._write([record])
+            return
+
+        with self._cond:
+            self._check_open()
+            self._pending.append(record)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._submitted += 1
+            ticket = self._submitted
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+
+            if self.durability == DURABILITY_FSYNC:
+                self._cond.notify_all()
+                while self._done < ticket:
+                    self._cond.wait()
+                for start, end, exc in self._failures:
+                    if start < ticket <= end:
+                        raise exc
+
+    def flush(self):
+        """Write everything queued so far.
+
+        The writer thread does the writing, so batches are still committed
+        one at a time and in submit order; this only wakes it and waits.
+        Raises the error of a failed batch holding any of those records.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            with self._cond:
+                batch = self._take()
+            if batch:
+                exc = self._commit(batch)
+                if exc is not None:
+                    raise exc
+            return
+        with self._cond:
+            mark, target = self._done, self._submitted
+            self._flush_to = max(self._flush_to, target)
+            self._cond.notify_all()
+            while self._done < target:
+                self._cond.wait()
+            for start, end, exc in self._failures:
+                if start < target and end > mark:
+                    raise exc
+
+    def close(self):
+        """Stop the background thread and drain the queue."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+        self.backend.close()
+
+    @property
+    def pending(self):
+        with self._cond:
+            return len(self._pending)
+
+    # ---------- internals ----------
+    def _check_open(self):
+        if self._closed:
+            raise RuntimeError(f"Submission sink for {self.backend.name} is closed")
+
+    def _take(self):
+        batch, self._pending, self._oldest = self._pending, [], None
+        return batch
+
+    def _due(self):
+        if not self._pending:
+            return False
+        if self._closed or len(self._pending) >= self.batch_size:
+            return True
+        if self._flush_to > self._submitted - len(self._pending):
+            return True
+        if self.durability == DURABILITY_FSYNC:
+            return True
+        return time.monotonic() - self._oldest >= self.interval
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._due():
+                    if self._closed:
+                        return
+                    timeout = None
+                    if self._oldest is not None:
+                        timeout = max(0.0, self.interval - (time.monotonic() - self._oldest))
+                    self._cond.wait(timeout)
+                batch = self._take()
+            exc = self._commit(batch)
+            if exc is not None:
+                log.error("Failed to write %d record(s) to %s: %s",
+                          len(batch), self.backend.name, exc)
+
+    def _commit(self, batch):
+        """Write ``batch`` and wake any submitters waiting on it."""
+        try:
+            self._write(batch)
+            exc = None
+        except Exception as err:  # keep the writer alive, surface to waiters
+            exc = err
+        with self._cond:
+            start = self._done
+            self._done += len(batch)
+            if exc is not None:
+                self._failures.append((start, self._done, exc))
+                del self._failures[:-16]
+            self._cond.notify_all()
+        return exc
+
+    def _write(self, records):
+        with self._write_lock, STORAGE_WRITE_SECONDS.time(survey=self.backend.name):
+            self.backend.append(records, durable=self.durability == DURABILITY_FSYNC)
+
+
+# ---------- process-wide registry ----------
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def get_sink(survey, **kwargs):
+    """Return the shared sink for ``survey``, creating it on first use."""
+    with _registry_lock:
+        sink = _registry.get(survey.name)
+        if sink is None:
+            if COLLECTOR_ADDRESS:
+                backend = CollectorBackend(COLLECTOR_ADDRESS, survey.name, survey.stored_columns,
+                                           survey.multi_columns, survey.indexed)
+            else:
+                os.makedirs(os.path.dirname(os.path.abspath(survey.csv_path)), exist_ok=True)
+                backend = open_backend(survey.name, survey.csv_path, survey.stored_columns,
+                                       survey.multi_columns, survey.indexed)
+            sink = _registry[survey.name] = SubmissionSink(backend, **kwargs)
+            RESPONSE_BYTES.set_function(backend.size, survey=survey.name)
+            SINK_PENDING.set_function(lambda: sink.pending, survey=survey.name)
+        return sink
+
+
+def drain_all():
+    """Flush and close every registered sink. Registered with ``atexit``."""
+    with _registry_lock:
+        sinks = list(_registry.values())
+        _registry.clear()
+    for sink in sinks:
+        sink.close()
+
+
+atexit.register(drain_all)
@@ -0,0 +1,221 @@
+# --------------------------------------------------------
+# Storage backends for survey submissions
+# --------------------------------------------------------
+"""Pluggable persistence for submission records.
+
+A record is a dict keyed by column name; multi-select answers stay Python
+lists until a backend decides how to store them. The backend is chosen with
+``BRIDGEAI_STORAGE``:
+
+* ``csv``    – one flat CSV per survey under ``data/`` (default, unchanged
+  on-disk format: multi-selects joined with ``"; "``).
+* ``sqlite`` – one WAL-mode database shared by all surveys, with indexes on
+  the commonly filtered columns and multi-selects normalized into
+  ``<survey>__<column>`` child tables.
+* ``segments`` – size/day-rotated CSV segments with a checksummed manifest
+  (see ``bridgeai.segments``).
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+
+from bridgeai.locking import append_rows
+from bridgeai.reader import read_header
+
+MULTI_SEPARATOR = "; "
+
+DATA_DIR = os.environ.get("BRIDGEAI_DATA_DIR", "data")
+DEFAULT_STORAGE = os.environ.get("BRIDGEAI_STORAGE", "csv")
+DEFAULT_SQLITE_PATH = os.environ.get("BRIDGEAI_SQLITE_PATH", os.path.join(DATA_DIR, "responses.db"))
+
+log = logging.getLogger(__name__)
+
+
+class StorageBackend:
+    """Base class for submission stores."""
+
+    def __init__(self, name, columns, multi_columns=(), indexed=()):
+        self.name = name
+        self.columns = list(columns)
+        self.multi_columns = frozenset(multi_columns)
+        self.indexed = tuple(indexed)
+
+    def append(self, records, durable=False):
+        """Persist a batch of records. ``durable`` asks for an fsync/full sync."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def size(self):
+        """Bytes on disk used by the store (0 if nothing was written yet)."""
+        return sum(os.path.getsize(p) for p in self.files() if os.path.exists(p))
+
+    def files(self):
+        return []
+
+    def to_row(self, record):
+        """Flatten a record into a positional row in ``columns`` order."""
+        row = []
+        for column in self.columns:
+            value = record.get(column, "")
+            if column in self.multi_columns and not isinstance(value, str):
+                value = MULTI_SEPARATOR.join(value)
+            row.append(value)
+        return row
+
+
+class CSVBackend(StorageBackend):
+    """Append-only CSV file, the format the apps have always written."""
+
+    def __init__(self, path, name, columns, multi_columns=(), indexed=()):
+        super().__init__(name, columns, multi_columns, indexed)
+        self.path = path
+        self._header_checked = False
+
+    def files(self):
+        return [self.path]
+
+    def append(self, records, durable=False):
+        if not self._header_checked:
+            self._check_header()
+        append_rows(self.path, self.columns, [self.to_row(r) for r in records], fsync=durable)
+
+    def _check_header(self):
+        # Rows are appended under the file's existing header, so a file written
+        # by an older schema (or without a header) is brought up to date first.
+        header, _ = read_header(self.path)
+        if header is not None and header != self.columns:
+            self._migrate()
+        self._header_checked = True
+
+    def _migrate(self):
+        """Rewrite the file in the current layout before the first append."""
+        from bridgeai.migrate import migrate
+        from bridgeai.schema import SURVEYS, load_survey
+
+        survey = load_survey(self.name) if self.name in SURVEYS else None
+        if survey is None or list(survey.stored_columns) != self.columns:
+            raise RuntimeError(f"{self.path} has a different header than the rows to append; "
+                               f"rewrite it before writing to it")
+        report = migrate(survey, self.path)
+        if report.changed:
+            log.warning("Migrated %s to schema v%s before appending (original kept as %s.bak): %s",
+                        self.path, survey.version, self.path, report.summary())
+
+
+class SQLiteBackend(StorageBackend):
+    """Embedded SQLite store in WAL mode.
+
+    Scalar answers live in one ``<survey>`` table; each multi-select column
+    gets a ``<survey>__<column>(response_id, option)`` child table indexed by
+    option, so per-option counts are index scans instead of string splits.
+    """
+
+    def __init__(self, path, name, columns, multi_columns=(), indexed=()):
+        super().__init__(name, columns, multi_columns, indexed)
+        self.path = path
+        self.scalar_columns = [c for c in self.columns if c not in self.multi_columns]
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+
+        cols = ", ".join(_quote(c) for c in self.scalar_columns)
+        marks = ", ".join("?" for _ in self.scalar_columns)
+        self._insert_sql = f"INSERT INTO {_quote(name)} ({cols}) VALUES ({marks})"
+        self._child_sql = {
+            c: f"INSERT INTO {_quote(self.child_table(c))} (response_id, option) VALUES (?, ?)"
+            for c in self.columns if c in self.multi_columns
+        }
+
+    def files(self):
+        return [self.path, self.path + "-wal"]
+
+    def child_table(self, column):
+        return f"{self.name}__{column}"
+
+    def _create_tables(self):
+        table = _quote(self.name)
+        cols = ", ".join(_quote(c) for c in self.scalar_columns)
+        with self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, {cols})"
+            )
+            # Tables created by an older schema gain the new columns in place.
+            existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+            for column in self.scalar_columns:
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {_quote(column)}")
+            for column in self.indexed:
+                if column in self.multi_columns:
+                    continue
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {_quote(f'ix_{self.name}_{column}')} "
+                    f"ON {table} ({_quote(column)})"
+                )
+            for column in self.columns:
+                if column not in self.multi_columns:
+                    continue
+                child = self.child_table(column)
+                self._conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {_quote(child)} ("
+                    f"response_id INTEGER NOT NULL REFERENCES {table}(id), "
+                    f"option TEXT NOT NULL)"
+                )
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {_quote(f'ix_{child}_option')} "
+                    f"ON {_quote(child)} (option, response_id)"
+                )
+
+    def append(self, records, durable=False):
+        with self._lock:
+            conn = self._conn
+            if durable:
+                conn.execute("PRAGMA synchronous=FULL")
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    for record in records:
+                        values = [record.get(c, "") for c in self.scalar_columns]
+                        response_id = conn.execute(self._insert_sql, values).lastrowid
+                        for column, sql in self._child_sql.items():
+                            options = record.get(column) or []
+                            if isinstance(options, str):
+                                options = [o for o in options.split(MULTI_SEPARATOR) if o]
+                            conn.executemany(sql, [(response_id, o) for o in options])
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            finally:
+                if durable:
+                    conn.execute("PRAGMA synchronous=NORMAL")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def open_backend(name, csv_path, columns, multi_columns=(), indexed=(), kind=None):
+    """Build the backend selected by ``kind`` (default: ``BRIDGEAI_STORAGE``)."""
+    kind = kind or DEFAULT_STORAGE
+    if kind == "csv":
+        return CSVBackend(csv_path, name, columns, multi_columns, indexed)
+    if kind == "sqlite":
+        return SQLiteBackend(DEFAULT_SQLITE_PATH, name, columns, multi_columns, indexed)
+    if kind == "segments":
+        from bridgeai.segments import SegmentedCSVBackend, segment_dir
+
+        return SegmentedCSVBackend(segment_dir(name), name, columns, multi_columns, indexed)
+    raise ValueError(f"Unknown storage backend: {kind!r}")
@@ -0,0 +1 @@
+"""Survey definitions, one module per survey. Load them with ``bridgeai.schema.load_survey``."""
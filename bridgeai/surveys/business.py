@@ -0,0 +1,471 @@
+# --------------------------------------------------------
+# 🇨🇦 Business Survey – Reaching Immigrant Customers in Canada
+# --------------------------------------------------------
+
+from bridgeai.schema import Page, Question, Section, Survey
+
+PAGE = Page(
+    title="📊 Business Survey: Reaching Immigrant Customers in Canada",
+    page_title="Business Survey – Reaching Immigrant Customers in Canada",
+    page_icon="📊",
+    layout="centered",
+    intro="""
+Please answer the questions below as accurately as you can.  
+Most questions are multiple choice; a few are open-ended.
+""",
+    sidebar=(
+        ("markdown", "## About this survey"),
+        (
+            "caption",
+            "Quick 5-minute survey to understand how businesses connect with newcomers to Canada. "
+            "Your responses help improve services for both businesses and immigrants. "
+            "All responses are anonymous and confidential.",
+        ),
+        ("markdown", "**Target:** Small & medium service businesses in Canada."),
+    ),
+    divider=True,
+)
+
+SECTION_1 = Section("Section 1 · About Your Business", (
+    Question(
+        "industry",
+        "Q1. What industry are you in?",
+        "radio",
+        (
+            "Banking/Financial Services",
+            "Insurance (Home, Auto, Life, Health)",
+            "Telecommunications (Phone/Internet)",
+            "Real Estate",
+            "Legal Services",
+            "Employment/Recruitment",
+            "Education/Training",
+            "Healthcare",
+            "Transportation (Driving school, Car sales, etc.)",
+            "Other",
+        ),
+        column="industry",
+    ),
+    Question(
+        "industry_other",
+        "Please specify your industry:",
+        "text",
+        column="industry_other",
+        show_if=("industry", "Other"),
+    ),
+    Question(
+        "cities",
+        "Q2. Which cities do you operate in? (Select all that apply)",
+        "multiselect",
+        (
+            "Toronto/GTA",
+            "Vancouver/Lower Mainland",
+            "Calgary",
+            "Edmonton",
+            "Montreal",
+            "Ottawa",
+            "Winnipeg",
+            "Halifax",
+            "Other major city",
+            "All of Canada",
+        ),
+        column="cities",
+    ),
+    Question(
+        "immigrant_share",
+        "Q3. What percentage of your customers are immigrants (arrived within last 5 years)?",
+        "radio",
+        (
+            "0-10%",
+            "11-25%",
+            "26-50%",
+            "51-75%",
+            "76-100%",
+            "Don't know",
+        ),
+        column="immigrant_share",
+    ),
+    Question(
+        "more_immigrants",
+        "Q4. Would you like to have MORE immigrant customers?",
+        "radio",
+        (
+            "Yes, definitely - it's a priority",
+            "Yes, somewhat interested",
+            "Neutral - happy with current mix",
+            "No, not our target market",
+        ),
+        column="more_immigrants",
+    ),
+))
+
+SECTION_2 = Section("Section 2 · Finding Immigrant Customers", (
+    Question(
+        "difficulty",
+        "Q5. How difficult is it to reach immigrant customers?",
+        "slider",
+        min_value=1,
+        max_value=5,
+        default=3,
+        help="1 = Very easy, 5 = Very difficult",
+        column="difficulty",
+    ),
+    Question(
+        "challenge",
+        "Q6. What's your BIGGEST challenge in attracting immigrant customers? (Pick ONE)",
+        "radio",
+        (
+            "Don't know where to find them",
+            "They don't know about my business",
+            "Hard to build trust with newcomers",
+            "Language barriers",
+            "They don't understand Canadian systems (credit, insurance, etc.)",
+            "Too expensive to reach them (advertising costs)",
+            "Long sales cycle",
+            "No specific challenges",
+            "Other",
+        ),
+        column="challenge",
+    ),
+    Question(
+        "challenge_other",
+        "Please describe your other challenge:",
+        "text",
+        column="challenge_other",
+        show_if=("challenge", "Other"),
+    ),
+    Question(
+        "cac_cost",
+        "Q7. How much does it typically cost you to acquire ONE new immigrant customer?",
+        "radio",
+        (
+            "$0-50",
+            "$51-100",
+            "$101-200",
+            "$201-500",
+            "$500+",
+            "Don't know / Don't track this",
+        ),
+        column="cac_cost",
+    ),
+    Question(
+        "finding_methods",
+        "Q8. How do you currently find immigrant customers? (Select all that apply)",
+        "multiselect",
+        (
+            "Word of mouth/referrals",
+            "Google Ads / Online advertising",
+            "Social media ads (Facebook, Instagram, etc.)",
+            "Community events",
+            "Partnerships with immigration consultants/lawyers",
+            "Real estate agents",
+            "Settlement agencies (YMCA, ISSofBC, etc.)",
+            "Ethnic media/newspapers",
+            "We don't actively target them",
+            "Other",
+        ),
+        column="finding_methods",
+    ),
+    Question(
+        "finding_other",
+        "Please describe other methods you use:",
+        "text",
+        column="finding_other",
+        show_if=("finding_methods", "Other"),
+    ),
+    Question(
+        "satisfaction",
+        "Q9. On a scale of 1-10, how satisfied are you with your current methods of reaching immigrants?",
+        "slider",
+        min_value=1,
+        max_value=10,
+        default=5,
+        help="1 = Very unsatisfied, 10 = Very satisfied",
+        column="satisfaction",
+    ),
+))
+
+SECTION_3 = Section("Section 3 · Paying for Customer Referrals", (
+    Question(
+        "paid_referrals",
+        "Q10. Have you ever PAID for customer referrals or leads?",
+        "radio",
+        (
+            "Yes, currently do this",
+            "Yes, did in the past",
+            "No, but open to it",
+            "No, not interested in paying for referrals",
+        ),
+        column="paid_referrals",
+    ),
+    Question(
+        "referral_interest",
+        "Q11. If a trusted platform could send you QUALIFIED immigrant customers, would you be interested?",
+        "radio",
+        (
+            "Very interested - tell me more",
+            "Somewhat interested",
+            "Maybe, depends on details",
+            "Not really interested",
+            "Not interested at all",
+        ),
+        column="referral_interest",
+    ),
+    Question(
+        "trust_factors",
+        "Select up to 3 options:",
+        "multiselect",
+        (
+            "Verified customer information (real immigrants with real needs)",
+            "Track record / proven results from other businesses",
+            "Only pay for actual customers (not just clicks or leads)",
+            "Clear, transparent pricing",
+            "No long-term contract or commitment",
+            "Ability to track where customers came from",
+            "Other reputable businesses using it",
+            "Free trial period",
+            "Other",
+        ),
+        column="trust_factors",
+        intro="**Q12. What would make you trust a referral platform? (Select up to 3)**",
+        max_choices=3,
+        ref="Q12",
+    ),
+    Question(
+        "trust_other",
+        "Please describe any other factor that builds trust:",
+        "text",
+        column="trust_other",
+        show_if=("trust_factors", "Other"),
+    ),
+    Question(
+        "payment_model",
+        "Q13. Which payment model would you prefer? (Pick your TOP choice)",
+        "radio",
+        (
+            "Pay per LEAD: Small fee for each potential customer (e.g., $25-50 per lead)",
+            "Pay per CUSTOMER: Only pay when someone becomes a paying customer (e.g., $100-200)",
+            "Commission: Pay percentage of what the customer spends (e.g., 10-15%)",
+            "Monthly subscription: Fixed monthly fee for unlimited referrals (e.g., $500-1000/month)",
+            "None of these - not interested in paying for referrals",
+        ),
+        column="payment_model",
+    ),
+    # Q14 - grid as three separate questions
+    Question(
+        "q14_lead",
+        "Pay-per-lead (for each contact/lead)",
+        "select",
+        ("$10-25", "$26-50", "$51-100", "Nothing - wouldn't pay"),
+        column="q14_lead",
+        intro="**Q14. For QUALIFIED immigrant leads, what would you be willing to pay?**",
+        caption="Select one option for each payment model.",
+    ),
+    Question(
+        "q14_customer",
+        "Pay-per-customer (for each paying customer)",
+        "select",
+        ("$50-100", "$101-200", "$201-500", "Nothing - wouldn't pay"),
+        column="q14_customer",
+    ),
+    Question(
+        "q14_commission",
+        "Commission rate (% of sale value)",
+        "select",
+        ("5-10%", "11-20%", "21%+", "Nothing - wouldn't pay"),
+        column="q14_commission",
+    ),
+    Question(
+        "referral_volume",
+        "Q15. How many NEW immigrant customers per month would make paying for referrals worthwhile?",
+        "radio",
+        (
+            "5-10 per month",
+            "11-25 per month",
+            "26-50 per month",
+            "50+ per month",
+            "Any amount helps",
+            "Wouldn't pay for referrals",
+        ),
+        column="referral_volume",
+    ),
+    Question(
+        "refusal_reasons",
+        "Q16. What would make you say NO to a referral service? (Select all that apply)",
+        "multiselect",
+        (
+            "Too expensive",
+            "Don't trust the quality of leads",
+            "Prefer organic/natural growth",
+            "Bad past experience with referral services",
+            "Don't need more customers right now",
+            "Complicated setup or long contracts",
+            "My competitors would also be on the platform",
+            "Worried about data privacy",
+            "Nothing - I'd be open to trying it",
+            "Other",
+        ),
+        column="refusal_reasons",
+    ),
+    Question(
+        "refusal_other",
+        "Please describe any other reason you’d say no:",
+        "text",
+        column="refusal_other",
+        show_if=("refusal_reasons", "Other"),
+    ),
+))
+
+SECTION_4 = Section("Section 4 · Value & Timing", (
+    Question(
+        "timing_value",
+        "Q17. A service that connects you with immigrants exactly when they need you "
+        "(e.g., just arrived & need a phone plan) would be:",
+        "radio",
+        (
+            "Extremely valuable - would definitely pay for this",
+            "Very valuable - would likely pay for this",
+            "Somewhat valuable - would consider it",
+            "Not very valuable",
+            "Not valuable at all",
+        ),
+        column="timing_value",
+    ),
+    Question(
+        "discount",
+        "Q18. Would you offer a special discount to attract immigrant customers?",
+        "radio",
+        (
+            "Yes, 10-20% discount",
+            "Yes, 5-10% discount",
+            "Maybe, depends on expected volume",
+            "No, standard pricing only",
+            "Not sure",
+        ),
+        column="discount",
+    ),
+    Question(
+        "customer_info",
+        "Q19. What information about referred customers would you want? (Select all that apply)",
+        "multiselect",
+        (
+            "Name and phone number",
+            "Email address",
+            "When they arrived in Canada",
+            "Their country of origin",
+            "What they specifically need from me",
+            "Their location/city",
+            "Language preference",
+            "Immigration category (student, worker, PR, etc.)",
+            "Just basic contact info is fine",
+            "Other",
+        ),
+        column="customer_info",
+    ),
+    Question(
+        "customer_info_other",
+        "Please describe any other information you’d like:",
+        "text",
+        column="customer_info_other",
+        show_if=("customer_info", "Other"),
+    ),
+    Question(
+        "risk_free_trial",
+        "Q20. If there was a risk-free way to test getting immigrant referrals "
+        "(no long-term commitment, cancel anytime), would you try it?",
+        "radio",
+        (
+            "Yes, definitely would try it",
+            "Probably yes",
+            "Maybe - need more details",
+            "Probably not",
+            "No",
+        ),
+        column="risk_free_trial",
+    ),
+))
+
+SECTION_5 = Section("Section 5 · Quick Demographics", (
+    Question(
+        "business_age",
+        "Q21. How long have you been in business?",
+        "radio",
+        (
+            "Less than 1 year",
+            "1-3 years",
+            "3-5 years",
+            "5-10 years",
+            "10+ years",
+        ),
+        column="business_age",
+    ),
+    Question(
+        "role",
+        "Q22. What's your role?",
+        "radio",
+        (
+            "Owner/Founder",
+            "Manager/Director",
+            "Marketing/Sales",
+            "Operations",
+            "Other",
+        ),
+        column="role",
+    ),
+    Question(
+        "role_other",
+        "Please specify your role:",
+        "text",
+        column="role_other",
+        show_if=("role", "Other"),
+    ),
+    Question(
+        "company_size",
+        "Q23. Company size:",
+        "radio",
+        (
+            "Just me (solo entrepreneur)",
+            "2-10 employees",
+            "11-50 employees",
+            "51-200 employees",
+            "200+ employees",
+        ),
+        column="company_size",
+    ),
+))
+
+FINAL = Section("Final Questions", (
+    Question(
+        "extra_thoughts",
+        "Q24. Any other thoughts on reaching immigrant customers or paying for referrals?",
+        "textarea",
+        placeholder="Share any additional insights, concerns, or ideas...",
+        column="extra_thoughts",
+    ),
+    Question(
+        "stay_updated",
+        "Q25. If we build a platform to connect businesses with immigrant customers, would you like to be notified?",
+        "radio",
+        (
+            "Yes, keep me updated (provide email below)",
+            "No thanks",
+        ),
+        column="stay_updated",
+    ),
+    Question(
+        "email",
+        "Q26. Your email (optional):",
+        "text",
+        placeholder="name@example.com",
+        column="email",
+        show_if=("stay_updated", "Yes, keep me updated (provide email below)"),
+        pii=True,
+    ),
+))
+
+SURVEY = Survey(
+    name="business",
+    filename="business_survey_responses.csv",
+    sections=(SECTION_1, SECTION_2, SECTION_3, SECTION_4, SECTION_5, FINAL),
+    page=PAGE,
+    indexed=("timestamp", "industry", "company_size", "payment_model"),
+)
@@ -0,0 +1,257 @@
+# --------------------------------------------------------
+# 🇨🇦 YourFirstYear Canada – Immigrant Experience Survey
+# --------------------------------------------------------
+
+from bridgeai.schema import Layout, Page, Question, Section, Survey
+
+OTHER = "If other, please specify:"
+
+PAGE = Page(
+    title="🇨🇦 YourFirstYear Canada – Immigrant Experience Survey",
+    page_title="YourFirstYear Canada 🇨🇦",
+    page_icon="🇨🇦",
+    intro="""
+Help us understand what newcomers need most during their first year in Canada.  
+Your responses are anonymous and help shape future newcomer tools. 🍁
+""",
+)
+
+SECTION_1 = Section("Section 1 · Your Immigration to Canada", (
+    Question(
+        "q1", "Q1. Have you immigrated to Canada in the past 5 years?", "radio",
+        ("Yes", "No"),
+        stop_if="No",
+        stop_message="Thank you! This survey is for newcomers who moved within the past 5 years.",
+        stop_button="End Survey",
+    ),
+    Question(
+        "q2", "Q2. Which province/city did you settle in?", "select",
+        (
+            "Ontario - Toronto", "Ontario - Ottawa", "Ontario - Mississauga", "Ontario - Hamilton",
+            "British Columbia - Vancouver", "British Columbia - Surrey", "Alberta - Calgary",
+            "Alberta - Edmonton", "Quebec - Montreal", "Quebec - Quebec City", "Manitoba - Winnipeg",
+            "Saskatchewan - Regina", "Nova Scotia - Halifax", "New Brunswick - Moncton", "Other",
+        ),
+        column="city",
+    ),
+    Question("q3", "Q3. When did you arrive in Canada? (Example: January 2023)", "text",
+             column="arrival_date"),
+    Question(
+        "q4", "Q4. What was your immigration category?", "radio",
+        (
+            "Express Entry (Skilled Worker)", "Provincial Nominee Program (PNP)",
+            "Study Permit (International Student)", "Family Sponsorship",
+            "Refugee/Protected Person", "Work Permit (Temporary Foreign Worker)", "Other",
+        ),
+        column="category",
+    ),
+    Question("q4_other", OTHER, "text", column="category_other", show_if=("q4", "Other")),
+    Question(
+        "q5", "Q5. What was your PRIMARY reason for choosing Canada?", "radio",
+        (
+            "Career opportunities", "Better quality of life", "Education (for self or children)",
+            "Safety and security", "Family reunification", "Healthcare system", "Other",
+        ),
+        column="reason",
+    ),
+    Question("q5_other", OTHER, "text", column="reason_other", show_if=("q5", "Other")),
+))
+
+SECTION_2 = Section("Section 2 · Before Arriving in Canada", (
+    Question(
+        "q6", "Q6. How much time did you have to prepare before moving?", "radio",
+        ("<1 month", "1–3 months", "3–6 months", "6–12 months", "More than 1 year"),
+        column="prep_time",
+    ),
+    Question(
+        "q7", "Q7. What were your top 3 concerns BEFORE arriving?", "multiselect",
+        (
+            "Finding housing", "Finding a job", "Cold weather/winter", "Making friends",
+            "Language (English/French)", "Getting credentials recognized",
+            "Understanding Canadian culture", "Financial stability", "Healthcare system",
+            "Missing family back home", "Other",
+        ),
+        column="concerns",
+    ),
+    # Q7/Q8 "Other" text has never had a column; kept unstored so the file layout is unchanged.
+    Question("q7_other", OTHER, "text", show_if=("q7", "Other")),
+    Question(
+        "q8", "Q8. Where did you get information to prepare for Canada?", "multiselect",
+        (
+            "Government of Canada website (canada.ca)", "YouTube videos", "Facebook groups",
+            "Reddit", "Friends/family already in Canada", "Immigration consultant/lawyer",
+            "Google searches", "TikTok", "Settlement agencies", "Other",
+        ),
+        column="sources",
+    ),
+    Question("q8_other", OTHER, "text", show_if=("q8", "Other")),
+    Question("q9", "Q9. What information do you wish you had BEFORE arriving?", "textarea",
+             column="missing_info"),
+    Question(
+        "q10", "Q10. Rate the quality of pre-arrival information you found:", "radio",
+        ("Very poor", "Poor", "Okay", "Good", "Excellent"),
+        column="info_quality",
+    ),
+))
+
+SECTION_3 = Section("Section 3 · First Month in Canada", (
+    Question(
+        "q11", "Q11. What did you do in your FIRST WEEK in Canada?", "multiselect",
+        (
+            "Applied for SIN", "Opened bank account", "Got a phone plan", "Applied for health card",
+            "Looked for housing", "Bought winter clothes", "Figured out transit", "Searched for jobs",
+            "Explored neighborhood", "Rested and adjusted", "Registered children for school", "Other",
+        ),
+        column="first_week",
+    ),
+    Question(
+        "q12", "Q12. Which tasks were most DIFFICULT or CONFUSING?", "multiselect",
+        (
+            "Getting SIN", "Opening bank account", "Getting phone plan", "Understanding transit",
+            "Finding affordable housing", "Applying for health card", "Filing taxes", "Driver’s license",
+            "Finding family doctor", "Understanding job market", "Language barriers", "Other",
+        ),
+        column="difficult_tasks",
+    ),
+    Question("q13", "Q13. What was the biggest surprise or unexpected challenge in your first month?",
+             "textarea", column="biggest_surprise"),
+    Question(
+        "q14", "Q14. How did you find housing?", "radio",
+        (
+            "Facebook Marketplace", "Kijiji", "Craigslist", "Realtor", "Friends/family",
+            "Student housing", "Airbnb", "PadMapper/Zumper/RentBoard", "Other",
+        ),
+        column="housing_method",
+    ),
+    Question(
+        "q15", "Q15. Did you experience any of these in your first month?", "multiselect",
+        (
+            "Loneliness/isolation", "Culture shock", "Homesickness", "Overwhelmed by tasks",
+            "Difficulty communicating", "Financial stress", "Excitement and optimism",
+            "Regret about moving", "Weather shock", "None of the above",
+        ),
+        column="experiences",
+    ),
+    Question("q16", "Q16. On a scale of 1–10, how overwhelming was your first month?", "slider",
+             min_value=1, max_value=10, default=5, column="overwhelm_score"),
+))
+
+SECTION_4 = Section("Section 4 · Settlement Experience (3–12 months)", (
+    Question(
+        "q17", "Q17. What were your biggest challenges AFTER the first 3 months?", "multiselect",
+        (
+            "Finding a job in my field", "Canadian experience requirement", "Making friends/social isolation",
+            "Winter/cold weather", "Cost of living", "Getting credentials recognized",
+            "Missing family/friends", "Language barriers", "Mental health/depression",
+            "Work-life balance", "Housing affordability", "Other",
+        ),
+        column="challenges_after_3m",
+    ),
+    Question(
+        "q18", "Q18. When did you start feeling 'at home' in Canada?", "radio",
+        ("Within first month", "1–3 months", "3–6 months", "6–12 months",
+         "1–2 years", "More than 2 years", "Still don't feel at home"),
+        column="feel_home_when",
+    ),
+    Question(
+        "q19", "Q19. What helped you adjust and feel more settled?", "multiselect",
+        (
+            "Getting a job", "Making friends", "Joining community groups",
+            "Learning about Canadian culture", "Finding permanent housing", "Improving English/French",
+            "Meeting people from my country", "Exploring Canadian activities", "Establishing routines",
+            "Time/natural adjustment", "Other",
+        ),
+        column="adjustment_factors",
+    ),
+    Question(
+        "q20", "Q20. Did you try to find people for activities or hobbies?", "radio",
+        ("Yes, actively looked", "Yes, but struggled to find people", "No, but wish I had",
+         "No, wasn’t interested"),
+        column="found_hobby",
+    ),
+    Question(
+        "q21", "Q21. If there was an app to help you find people for activities, would you have used it?",
+        "radio",
+        ("Definitely yes", "Probably yes", "Maybe", "Probably not", "Definitely not"),
+        column="would_use_app",
+    ),
+    Question(
+        "q22", "Q22. What support would have been most helpful during your first year?", "multiselect",
+        (
+            "Step-by-step arrival checklist", "24/7 chatbot for questions", "Job search/networking help",
+            "Social events to meet people", "Mental health support", "Help finding housing",
+            "Understanding Canadian workplace culture", "Tax filing guidance", "Credential recognition guidance",
+            "Language practice partners", "Just someone to talk to", "Other",
+        ),
+        column="needed_support",
+    ),
+))
+
+SECTION_5 = Section("Section 5 · Looking Back & Feedback", (
+    Question("q23", "Q23. If you could go back, what ONE thing do you wish you had known or had help with?",
+             "textarea", column="wish_known"),
+    Question("q24", "Q24. Rate your overall first-year experience in Canada (1=Very difficult, 10=Excellent):",
+             "slider", min_value=1, max_value=10, default=6, column="overall_experience"),
+    Question(
+        "q25", "Q25. Would you have paid for an app that helped you with settlement?", "radio",
+        ("Yes - $5-10/month", "Yes - $2-5/month", "Maybe if free trial", "No - only if free",
+         "No - wouldn't use it"),
+        column="pay_app",
+    ),
+    Question(
+        "q26", "Q26. When would this kind of app be MOST helpful?", "radio",
+        ("Before arriving", "First week", "First 3 months", "Throughout first year",
+         "All stages equally important"),
+        column="best_timing",
+    ),
+))
+
+BONUS = Section("Bonus Section (Optional)", (
+    Question("q27", "Q27. Would you be interested in a 20-min interview for a $20 Tim Hortons gift card?",
+             "radio", ("Yes", "No"), column="interview_interest"),
+    Question("q27_email", "Email for interview (optional):", "text",
+             column="interview_email", show_if=("q27", "Yes"), pii=True),
+    Question("q28", "Q28. Want early access to the YourFirstYear app?", "radio", ("Yes", "No"),
+             column="early_access"),
+    Question("q28_email", "Email for early access (optional):", "text",
+             column="early_email", show_if=("q28", "Yes"), pii=True),
+    Question("q29", "Q29. Would you like to receive updates about newcomer tools?", "radio", ("Yes", "No"),
+             column="receive_updates"),
+    Question("q29_email", "Email for updates (optional):", "text",
+             column="updates_email", show_if=("q29", "Yes"), pii=True),
+    Question("q30", "Q30. Any other comments or suggestions?", "textarea", column="other_comments"),
+))
+
+# ---------- Earlier file layouts (read by bridgeai.reader / bridgeai.migrate) ----------
+# v1: the first release; timeline, features and the demographics were later dropped.
+LAYOUT_V1 = Layout(1, (
+    "timestamp", "province_city", "arrival_date", "category", "category_other", "reason",
+    "reason_other", "timeline", "prep_time", "top_concerns", "info_sources", "missing_info",
+    "info_quality", "first_week", "difficult_tasks", "biggest_surprise", "housing_method",
+    "experiences", "overwhelm_score", "wish_known", "features", "pay_option", "helpful_stage",
+    "experience_score", "age", "family_status", "english_level", "interview_interest",
+    "interview_email", "early_access", "early_email",
+), renames=(
+    ("province_city", "city"), ("top_concerns", "concerns"), ("info_sources", "sources"),
+    ("pay_option", "pay_app"), ("helpful_stage", "best_timing"),
+    ("experience_score", "overall_experience"),
+))
+
+# v2: the current questions up to Q26, before the bonus section was added.
+LAYOUT_V2 = Layout(2, (
+    "timestamp", "city", "arrival_date", "category", "category_other", "reason", "reason_other",
+    "prep_time", "concerns", "sources", "missing_info", "info_quality", "first_week",
+    "difficult_tasks", "biggest_surprise", "housing_method", "experiences", "overwhelm_score",
+    "challenges_after_3m", "feel_home_when", "adjustment_factors", "found_hobby", "would_use_app",
+    "needed_support", "wish_known", "overall_experience", "pay_app", "best_timing",
+))
+
+SURVEY = Survey(
+    name="customer",
+    filename="yourfirstyear_customer_survey.csv",
+    sections=(SECTION_1, SECTION_2, SECTION_3, SECTION_4, SECTION_5, BONUS),
+    page=PAGE,
+    indexed=("timestamp", "city", "category"),
+    version=3,
+    layouts=(LAYOUT_V1, LAYOUT_V2),
+)
@@ -0,0 +1,89 @@
+# --------------------------------------------------------
+# 🍁 Quick Newcomer Check-in (survey_responses.csv)
+# --------------------------------------------------------
+# NOT PUBLISHED. No source for this questionnaire was found; only its
+# responses were. The repository-root survey_responses.csv holds a single
+# five-field row, which is also the first row of data/survey_responses.csv.
+# The second row there has 12 fields. The answer options of questions 1-3
+# below are the ones those rows contain. Everything else is a
+# reconstruction: the question wording, the other options, the split of
+# the six 1-5 answers into readiness topics, and the last two fields. It
+# is defined so the response files can be read, migrated and archived.
+# The page stays off (published=False) until the real wording is confirmed.
+
+from bridgeai.schema import Layout, Page, Question, Section, Survey
+
+PAGE = Page(
+    title="🍁 Quick Newcomer Check-in",
+    page_title="Quick Check-in 🍁",
+    page_icon="🍁",
+    intro="""
+Two minutes, eleven questions: tell us where you are in your move and how ready you feel.
+Answers are anonymous. 🙏
+""",
+)
+
+READINESS = "How confident do you feel about"
+
+ABOUT_YOU = Section("About you", (
+    Question(
+        "category", "1. Which best describes you?", "radio",
+        (
+            "🎓 International student", "💼 Skilled worker", "👨‍👩‍👧 Family sponsorship",
+            "🛡️ Refugee / protected person", "🏠 Permanent resident (other)", "🔎 Other",
+        ),
+        column="category",
+    ),
+    Question(
+        "province", "2. Which province or territory are you (moving) in?", "select",
+        (
+            "Ontario", "British Columbia", "Quebec", "Alberta", "Manitoba", "Saskatchewan",
+            "Nova Scotia", "New Brunswick", "Newfoundland and Labrador", "Prince Edward Island",
+            "Yukon", "Northwest Territories", "Nunavut", "Not sure yet",
+        ),
+        column="province",
+    ),
+    Question(
+        "arrival_stage", "3. Where are you in your move?", "radio",
+        (
+            "🛫 I haven’t arrived yet (planning my move)", "🆕 Less than 3 months",
+            "📅 3–12 months", "🗓️ 1–3 years", "🏡 More than 3 years",
+        ),
+        column="arrival_stage",
+    ),
+))
+
+READINESS_SECTION = Section("How ready do you feel? (1 = not at all, 5 = fully)", tuple(
+    Question(f"ready_{topic}", f"{n}. {READINESS} {label}?", "slider",
+             min_value=1, max_value=5, default=3, column=f"ready_{topic}")
+    for n, (topic, label) in enumerate((
+        ("housing", "finding housing"),
+        ("banking", "banking and credit"),
+        ("healthcare", "health care"),
+        ("jobs", "finding work"),
+        ("transit", "getting around"),
+        ("paperwork", "government paperwork (SIN, permits, taxes)"),
+    ), start=4)
+))
+
+FINAL = Section("Last thing", (
+    Question("biggest_challenge", "10. What is the ONE thing you need help with right now?", "textarea",
+             column="biggest_challenge"),
+    Question("email", "11. Email, if you'd like newcomer tips (optional):", "text",
+             placeholder="name@example.com", column="email", pii=True),
+))
+
+# ---------- Earlier file layouts (read by bridgeai.reader / bridgeai.migrate) ----------
+# v1: the first five-field version; the last field (top need) has no current question.
+LAYOUT_V1 = Layout(1, ("timestamp", "category", "arrival_stage", "biggest_challenge", "top_need"))
+
+SURVEY = Survey(
+    name="quick",
+    filename="survey_responses.csv",
+    sections=(ABOUT_YOU, READINESS_SECTION, FINAL),
+    page=PAGE,
+    indexed=("timestamp", "category", "province"),
+    version=2,
+    layouts=(LAYOUT_V1,),
+    published=False,
+)
@@ -0,0 +1,55 @@
+# --------------------------------------------------------
+# Synthetic, schema-valid survey answers
+# --------------------------------------------------------
+"""Random answers for load tests, benchmarks and demo data.
+
+Answers respect the schema: options come from each question's option set,
+slider values stay in range, ``max_choices`` is honoured, conditional
+follow-ups are only filled when visible and screening questions never take
+their stop branch.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+WORDS = (
+    "housing rent bank SIN health card doctor winter transit job resume credentials "
+    "friends lonely family english french taxes school daycare phone plan credit "
+    "landlord deposit lease Toronto Vancouver Calgary Montreal shelter community"
+).split()
+
+
+def random_text(rng, low=0, high=25):
+    words = rng.choices(WORDS, k=rng.randint(low, high))
+    return " ".join(words).capitalize()
+
+
+def random_answers(survey, rng=random):
+    """Answers keyed by question key, as the form renderer would return them."""
+    answers = {}
+    for question in survey.questions:
+        if not question.visible(answers):
+            continue
+        kind = question.kind
+        if kind in ("radio", "select"):
+            options = [o for o in question.options if o != question.stop_if]
+            answers[question.key] = rng.choice(options)
+        elif kind == "multiselect":
+            limit = question.max_choices or min(4, len(question.options))
+            answers[question.key] = rng.sample(question.options, rng.randint(0, limit))
+        elif kind == "slider":
+            answers[question.key] = rng.randint(question.min_value, question.max_value)
+        elif kind == "textarea":
+            answers[question.key] = random_text(rng)
+        elif question.key.endswith("email") or question.placeholder == "name@example.com":
+            answers[question.key] = f"user{rng.randrange(10**6)}@example.com"
+        else:
+            answers[question.key] = random_text(rng, 0, 4)
+    return answers
+
+
+def random_record(survey, rng=random, timestamp=None):
+    """A storage record built from :func:`random_answers`."""
+    if timestamp is None:
+        timestamp = datetime.now() - timedelta(seconds=rng.randrange(365 * 86400))
+    return survey.build_record(random_answers(survey, rng), timestamp.isoformat())
@@ -0,0 +1,404 @@
+# --------------------------------------------------------
+# Keyword index over the free-text answers
+# --------------------------------------------------------
+"""Tokenize open-text answers and search them with BM25.
+
+Indexed columns are every free-text question that is not PII: Q9, Q13,
+Q23 and Q30 in the customer survey, and ``extra_thoughts`` plus the
+``*_other`` fields in the business survey. :func:`build` streams the
+responses from where the previous run stopped and tokenizes them in a
+process pool. It then adds them to an on-disk index, a SQLite database per
+survey under ``data/textindex/``:
+
+* ``docs``     – one row per non-empty answer (response number, column, text);
+* ``postings`` – per term and build batch, packed ``int32`` arrays of
+  document ids and term frequencies, clustered by term;
+* ``terms``    – document and collection frequency per ``(column, term)``.
+
+The read position is kept in the index, so re-running ``build`` only
+processes new rows and appends one posting block per term. A rewritten or
+rotated source file triggers a rebuild. A search reads only the blocks of
+its query terms and scores them with NumPy (requires ``numpy``)::
+
+    python -m bridgeai.textindex build customer
+    python -m bridgeai.textindex search customer "bank account credit history" --column wish_known
+    python -m bridgeai.textindex terms customer --column wish_known
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+import unicodedata
+from collections import Counter
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+from bridgeai.reader import iter_survey_rows, read_header
+from bridgeai.schema import SURVEYS, TEXT, load_survey
+from bridgeai.segments import SegmentCursor, response_source
+from bridgeai.storage import DATA_DIR
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+INDEX_DIR = os.path.join(DATA_DIR, "textindex")
+BATCH_DOCS = 5000
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further
+had has have having he her here hers him his how i if in into is it its itself just me more
+most my no nor not now of off on once only or other our ours out over own same she should so
+some such than that the their theirs them then there these they this those through to too
+under until up very was we were what when where which while who whom why will with would
+you your yours i'm i've it's don't didn't wasn't
+""".split())
+
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def _stem(word):
+    """Very light English suffix folding: plurals and possessives."""
+    if word.endswith("'s"):
+        word = word[:-2]
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Lower-case, accent-folded, stop-word-free terms of ``text``."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c)).replace("’", "'")
+    return [_stem(w) for w in _WORD.findall(text) if w not in STOPWORDS and len(w) > 1]
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("The text index needs numpy: pip install numpy")
+
+
+def _tokenize_batch(texts):
+    return [Counter(tokenize(text)) for text in texts]
+
+
+def text_columns(survey):
+    """The free-text, non-PII columns of ``survey``."""
+    return [q.column for q in survey.stored_questions if q.type == TEXT and not q.pii]
+
+
+def index_path(survey):
+    return os.path.join(INDEX_DIR, f"{survey.name}.db")
+
+
+# ---------- index ----------
+class TextIndex:
+    """On-disk inverted index for one survey."""
+
+    def __init__(self, path):
+        _require_numpy()
+        self.path = path
+        self._lengths = np.zeros(1, np.int32)  # by doc id, loaded incrementally
+        self._columns = np.full(1, -1, np.int16)  # slot 0 is no doc (ids start at 1)
+        self._column_codes = {}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS docs (
+                id INTEGER PRIMARY KEY, response INTEGER, col TEXT, text TEXT, length INTEGER);
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT, batch INTEGER, docs BLOB, tfs BLOB,
+                PRIMARY KEY (term, batch)) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS terms (
+                col TEXT, term TEXT, df INTEGER, cf INTEGER, PRIMARY KEY (col, term)) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def get(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, json.dumps(value)))
+
+    def clear(self):
+        with self.conn:
+            for table in ("docs", "postings", "terms", "meta"):
+                self.conn.execute(f"DELETE FROM {table}")
+        self._lengths = np.zeros(1, np.int32)
+        self._columns = np.full(1, -1, np.int16)
+        self._column_codes = {}
+
+    def stats(self, columns=None):
+        """``(documents, average length)``, optionally within ``columns``."""
+        sql, params = "SELECT COUNT(*), SUM(length) FROM docs", []
+        if columns:
+            sql += f" WHERE col IN ({', '.join('?' for _ in columns)})"
+            params = list(columns)
+        docs, total = self.conn.execute(sql, params).fetchone()
+        return docs, (total or 0) / docs if docs else 0.0
+
+    def add(self, docs, counts):
+        """Add ``docs`` (``(response, column, text)``) with their term counters."""
+        conn = self.conn
+        next_id = (conn.execute("SELECT MAX(id) FROM docs").fetchone()[0] or 0) + 1
+        batch = self.get("batches", 0) + 1
+        doc_rows, postings, term_stats = [], {}, Counter()
+        collection = Counter()
+        for doc_id, ((response, column, text), terms) in enumerate(zip(docs, counts), next_id):
+            doc_rows.append((doc_id, response, column, text, sum(terms.values())))
+            for term, tf in terms.items():
+                ids, tfs = postings.setdefault(term, ([], []))
+                ids.append(doc_id)
+                tfs.append(tf)
+                term_stats[column, term] += 1
+                collection[column, term] += tf
+        conn.executemany("INSERT INTO docs VALUES (?, ?, ?, ?, ?)", doc_rows)
+        conn.executemany(
+            "INSERT INTO postings VALUES (?, ?, ?, ?)",
+            [(term, batch, np.array(ids, np.int32).tobytes(), np.array(tfs, np.int32).tobytes())
+             for term, (ids, tfs) in postings.items()],
+        )
+        self._set("batches", batch)
+        conn.executemany(
+            "INSERT INTO terms VALUES (?, ?, ?, ?) ON CONFLICT (col, term) DO UPDATE "
+            "SET df = df + excluded.df, cf = cf + excluded.cf",
+            [(c, t, df, collection[c, t]) for (c, t), df in term_stats.items()],
+        )
+
+    # ---------- queries ----------
+    def _load_docs(self):
+        """Extend the in-memory doc length / column arrays with new docs."""
+        known = len(self._lengths) - 1
+        rows = self.conn.execute(
+            "SELECT id, length, col FROM docs WHERE id > ? ORDER BY id", (known,)
+        ).fetchall()
+        if not rows:
+            return
+        size = rows[-1][0] + 1
+        lengths = np.zeros(size, np.int32)
+        columns = np.full(size, -1, np.int16)
+        lengths[:len(self._lengths)] = self._lengths
+        columns[:len(self._columns)] = self._columns
+        ids = np.fromiter((r[0] for r in rows), np.int64, len(rows))
+        lengths[ids] = np.fromiter((r[1] for r in rows), np.int32, len(rows))
+        codes = self._column_codes
+        columns[ids] = [codes.setdefault(r[2], len(codes)) for r in rows]
+        self._lengths, self._columns = lengths, columns
+
+    @contextmanager
+    def _snapshot(self):
+        """One read transaction, so every query inside sees the same committed batches."""
+        if self.conn.in_transaction:
+            yield
+            return
+        self.conn.execute("BEGIN")
+        try:
+            yield
+        finally:
+            self.conn.execute("COMMIT")
+
+    def search(self, query, k=10, columns=None):
+        """Top ``k`` answers for ``query`` by BM25: ``[(score, response, column, text)]``."""
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return []
+        # Docs and postings are read from one snapshot: a batch the indexer
+        # commits in between would otherwise bring ids past the loaded arrays.
+        with self._snapshot():
+            return self._search(terms, k, columns)
+
+    def _search(self, terms, k, columns):
+        self._load_docs()
+        in_scope = self._columns >= 0
+        if columns:
+            wanted = [self._column_codes[c] for c in columns if c in self._column_codes]
+            in_scope = np.isin(self._columns, wanted)
+        docs = int(in_scope.sum())
+        if not docs:
+            return []
+        avg_length = self._lengths[in_scope].mean()
+        blocks = {}
+        for term, ids, tfs in self.conn.execute(
+            f"SELECT term, docs, tfs FROM postings WHERE term IN ({', '.join('?' for _ in terms)}) "
+            f"ORDER BY term, batch", terms,
+        ):
+            blocks.setdefault(term, ([], []))
+            blocks[term][0].append(np.frombuffer(ids, np.int32))
+            blocks[term][1].append(np.frombuffer(tfs, np.int32))
+        scores = np.zeros(len(self._lengths), np.float64)
+        for ids, tfs in blocks.values():
+            ids = np.concatenate(ids)
+            tfs = np.concatenate(tfs).astype(np.float64)
+            keep = in_scope[ids]
+            ids, tfs = ids[keep], tfs[keep]
+            if not len(ids):
+                continue
+            idf = math.log(1 + (docs - len(ids) + 0.5) / (len(ids) + 0.5))
+            norm = K1 * (1 - B + B * self._lengths[ids] / avg_length)
+            scores[ids] += idf * tfs * (K1 + 1) / (tfs + norm)  # ids are unique per term
+        hits = np.flatnonzero(scores)
+        if not len(hits):
+            return []
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        found = {
+            doc: (response, column, text)
+            for doc, response, column, text in self.conn.execute(
+                f"SELECT id, response, col, text FROM docs WHERE id IN ({', '.join('?' for _ in hits)})",
+                [int(doc) for doc in hits],
+            )
+        }
+        return [(float(scores[doc]),) + found[int(doc)] for doc in hits]
+
+    def top_terms(self, n=30, column=None):
+        """Most frequent terms: ``[(term, documents, occurrences)]``."""
+        if column:
+            sql = "SELECT term, df, cf FROM terms WHERE col = ? ORDER BY df DESC LIMIT ?"
+            return self.conn.execute(sql, (column, n)).fetchall()
+        sql = ("SELECT term, SUM(df) AS df, SUM(cf) FROM terms GROUP BY term "
+               "ORDER BY df DESC LIMIT ?")
+        return self.conn.execute(sql, (n,)).fetchall()
+
+
+# ---------- building ----------
+def _source_state(source):
+    """Identity of the source used to detect rewrites (header + inode)."""
+    if os.path.isdir(source):
+        return {"kind": "segments"}
+    header, _ = read_header(source)
+    try:
+        inode = os.stat(source).st_ino
+    except FileNotFoundError:
+        inode = None
+    return {"kind": "file", "header": header, "inode": inode}
+
+
+def _iter_new_rows(survey, source, index):
+    """Yield rows added since the last build, persisting the position in ``index``."""
+    if os.path.isdir(source):
+        cursor = SegmentCursor(source)
+        state = index.get("cursor", {})
+        cursor.seen = set(state.get("seen", []))
+        cursor.active = state.get("active")
+        cursor.offset = state.get("offset")
+        for values in cursor.read_new(survey):
+            yield values, {"seen": sorted(cursor.seen), "active": cursor.active,
+                           "offset": cursor.offset}
+        return
+    for values, end in iter_survey_rows(survey, source, index.get("cursor", {}).get("offset")):
+        yield values, {"offset": end}
+
+
+def build(survey, source=None, path=None, workers=None, rebuild=False, batch_docs=BATCH_DOCS):
+    """Index rows added since the last build. Returns the number of new answers."""
+    source = source or response_source(survey)
+    index = TextIndex(path or index_path(survey))
+    try:
+        state = _source_state(source)
+        size = os.path.getsize(source) if os.path.isfile(source) else None
+        cursor = index.get("cursor", {})
+        if rebuild or index.get("source") != state or (
+                size is not None and size < cursor.get("offset", 0)):
+            index.clear()
+            with index.conn:
+                index._set("source", state)
+        columns = text_columns(survey)
+        positions = [survey.columns.index(c) for c in columns]
+        response = index.get("responses", 0)
+        added = 0
+        pool = ProcessPoolExecutor(workers) if workers != 1 else None
+        try:
+            batch, position = [], None
+            for values, position in _iter_new_rows(survey, source, index):
+                for column, i in zip(columns, positions):
+                    text = values[i].strip()
+                    if text:
+                        batch.append((response, column, text))
+                response += 1
+                if len(batch) >= batch_docs:
+                    added += _flush(index, pool, batch, response, position)
+                    batch = []
+            if position is not None:
+                added += _flush(index, pool, batch, response, position)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return added
+    finally:
+        index.close()
+
+
+def _flush(index, pool, batch, responses, position):
+    texts = [text for _, _, text in batch]
+    if pool is None or len(texts) < 2 * 256:
+        counts = _tokenize_batch(texts)
+    else:
+        chunk = 256
+        counts = [c for part in pool.map(_tokenize_batch,
+                                         [texts[i:i + chunk] for i in range(0, len(texts), chunk)])
+                  for c in part]
+    with index.conn:  # one transaction: answers and read position move together
+        index.add(batch, counts)
+        index._set("responses", responses)
+        index._set("cursor", position)
+    return len(batch)
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index and search the free-text survey answers.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("build", help="index new responses")
+    p.add_argument("survey", choices=SURVEYS)
+    p.add_argument("--source", help="response CSV or segment directory")
+    p.add_argument("--workers", type=int, help="tokenizer processes (default: CPU count)")
+    p.add_argument("--rebuild", action="store_true", help="drop the index and start over")
+    p = sub.add_parser("search", help="rank answers for a query")
+    p.add_argument("survey", choices=SURVEYS)
+    p.add_argument("query")
+    p.add_argument("--column", action="append", help="restrict to a column (repeatable)")
+    p.add_argument("-k", type=int, default=10)
+    p = sub.add_parser("terms", help="most frequent terms")
+    p.add_argument("survey", choices=SURVEYS)
+    p.add_argument("--column")
+    p.add_argument("-n", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    survey = load_survey(args.survey)
+    if args.command == "build":
+        added = build(survey, args.source, workers=args.workers, rebuild=args.rebuild)
+        print(f"Indexed {added} new answer(s) into {index_path(survey)}")
+        return 0
+    index = TextIndex(index_path(survey))
+    try:
+        if args.command == "search":
+            for score, response, column, text in index.search(args.query, args.k, args.column):
+                print(f"{score:6.2f}  #{response} {column}: {text}")
+        else:
+            for term, df, cf in index.top_terms(args.n, args.column):
+                print(f"{term:20} {df:8} {cf:8}")
+    finally:
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+# --------------------------------------------------------
+# Raking weights for representative estimates
+# --------------------------------------------------------
+"""Weight responses so chosen breakdowns match known population shares.
+
+Respondents come from wherever the link was shared, so raw shares
+over-represent some cities and immigration categories. :func:`rake` runs
+iterative proportional fitting: it adjusts a weight per response until,
+for every target column, the weighted share of each answer matches the
+share given.
+
+Targets are ``{column: {answer: share}}`` over single-choice columns of a
+:class:`~bridgeai.analytics.SurveyFrame`. Shares may be proportions or
+counts; they are normalized. Besides exact option labels, a key may name a
+prefix of ``"<prefix> - <rest>"`` options. ``{"city": {"Ontario": 0.39}}``
+therefore covers every Ontario city, which gives province targets::
+
+    {"city": {"Ontario": 0.39, "British Columbia": 0.17, "Alberta": 0.13, ...},
+     "category": {"Express Entry (Skilled Worker)": 0.3, ...}}
+
+Every answer given by at least one respondent must be covered. Blank
+answers are left out of that column's adjustment. A target group with no
+respondents cannot be reached; it is dropped and reported in
+:attr:`RakeResult.unreached`.
+
+Weights only depend on which combination of target answers a row has, so
+raking runs on those combinations (a few hundred cells) instead of on
+every row. Millions of rows converge in milliseconds once the frame is
+loaded. ``cap`` trims weights to at most that multiple of the mean after
+every pass. The final weights average 1, so weighted counts stay on the
+respondent scale.
+
+:func:`rake_frame` caches the result per frame version and target set and
+attaches it to the frame. Every analysis can then use it directly::
+
+    frame = load_frame(load_survey("customer"))
+    rake_frame(frame, targets, name="raked")
+    frame.share("needed_support", weights="raked", by="category")
+
+Command line (writes one weight per response, in file order)::
+
+    python -m bridgeai.weighting customer targets.json --cap 5
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from bridgeai.analytics import load_frame
+from bridgeai.columnar import EXPORT_DIR
+from bridgeai.schema import MULTI, SURVEYS, load_survey
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+PREFIX_SEPARATOR = " - "
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-6  # largest allowed gap between a weighted share and its target
+CACHE_SIZE = 32
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("Weighting needs numpy: pip install numpy")
+
+
+@dataclass(frozen=True)
+class Margin:
+    """One target column: each option code's group and each group's share."""
+
+    column: str
+    groups: tuple  # group labels, in target order
+    group_of: object  # int array: option code -> group index, -1 = not covered
+    shares: object  # float array over groups, summing to 1
+
+
+@dataclass
+class RakeResult:
+    weights: object
+    iterations: int
+    converged: bool
+    max_error: float
+    margins: tuple
+    unreached: tuple = ()  # (column, group) targets nobody answered
+
+    @property
+    def effective_n(self):
+        """Kish effective sample size: ``(sum w)^2 / sum w^2``."""
+        w = self.weights
+        return float(w.sum() ** 2 / (w ** 2).sum()) if len(w) else 0.0
+
+    @property
+    def design_effect(self):
+        """Variance inflation due to weighting (1 = none)."""
+        return len(self.weights) / self.effective_n if self.effective_n else float("nan")
+
+
+def resolve_targets(frame, targets):
+    """Turn ``{column: {answer or prefix: share}}`` into :class:`Margin` objects.
+
+    Raises ``ValueError`` for multi-select or unknown columns, keys that
+    match no option, and answered options no key covers.
+    """
+    _require_numpy()
+    margins = []
+    for column, shares in targets.items():
+        if column not in frame.codes:
+            kind = "a multi-select" if frame.survey.types.get(column) == MULTI else "not a single-choice column"
+            raise ValueError(f"Cannot rake on {column!r}: {kind}")
+        labels = frame.labels[column]
+        group_of = np.full(len(labels), -1, np.int64)
+        groups = list(shares)
+        for g, key in enumerate(groups):
+            matched = [i for i, label in enumerate(labels)
+                       if label == key or label.startswith(key + PREFIX_SEPARATOR)]
+            if not matched:
+                raise ValueError(f"{column}: {key!r} matches no answer")
+            overlap = [labels[i] for i in matched if group_of[i] >= 0]
+            if overlap:
+                raise ValueError(f"{column}: {overlap} covered by more than one target")
+            group_of[matched] = g
+        answered = np.bincount(frame.codes[column][frame.codes[column] >= 0], minlength=len(labels))
+        uncovered = [labels[i] for i in np.flatnonzero((group_of < 0) & (answered > 0))]
+        if uncovered:
+            raise ValueError(f"{column}: no target for answer(s) {uncovered}")
+        values = np.array([float(shares[g]) for g in groups])
+        if (values < 0).any() or values.sum() <= 0:
+            raise ValueError(f"{column}: shares must be non-negative and not all zero")
+        margins.append(Margin(column, tuple(groups), group_of, values / values.sum()))
+    return margins
+
+
+def _cells(frame, margins, base):
+    """Collapse rows to distinct (group per margin, base weight) cells.
+
+    Returns ``(inverse, cell_groups, cell_base)``: each row's cell, each
+    cell's group per margin (-1 = blank) and each cell's summed base weight.
+    """
+    key = np.zeros(frame.rows, np.int64)
+    row_groups = []
+    for margin in margins:
+        codes = frame.codes[margin.column]
+        groups = np.where(codes >= 0, margin.group_of[np.maximum(codes, 0)], -1)
+        row_groups.append(groups)
+        key = key * (len(margin.groups) + 1) + (groups + 1)
+    if base is not None:
+        base_values, base_code = np.unique(base, return_inverse=True)
+        key = key * len(base_values) + base_code
+    cell_keys, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    cell_groups = [groups[first] for groups in row_groups]
+    weights = np.ones(frame.rows) if base is None else base
+    cell_base = np.bincount(inverse, weights=weights, minlength=len(cell_keys))
+    return inverse, cell_groups, cell_base
+
+
+def rake(frame, targets, base=None, cap=None, max_iterations=MAX_ITERATIONS, tolerance=TOLERANCE):
+    """Raking weights for ``frame`` (see the module docstring). Returns a :class:`RakeResult`.
+
+    ``base`` is an optional starting weight per row (design weights);
+    ``cap`` trims weights to at most ``cap`` times the mean after each pass.
+    """
+    _require_numpy()
+    margins = resolve_targets(frame, targets) if isinstance(targets, dict) else list(targets)
+    if base is not None:
+        base = np.asarray(base, np.float64)
+        if base.shape != (frame.rows,):
+            raise ValueError(f"base weights must have one value per row ({frame.rows})")
+    if frame.rows == 0:
+        return RakeResult(np.zeros(0), 0, True, 0.0, tuple(margins))
+
+    inverse, cell_groups, cell_base = _cells(frame, margins, base)
+    cell_rows = np.bincount(inverse, minlength=len(cell_base))
+    factor = np.ones(len(cell_base))
+    unreached = []
+    targets_by_margin = []
+    for margin, groups in zip(margins, cell_groups):
+        answered = groups >= 0
+        present = np.bincount(groups[answered], weights=cell_base[answered], minlength=len(margin.groups)) > 0
+        unreached += [(margin.column, margin.groups[g]) for g in np.flatnonzero(~present)]
+        shares = np.where(present, margin.shares, 0.0)
+        targets_by_margin.append(shares / shares.sum() if shares.sum() else shares)
+
+    iterations, max_error, converged = 0, float("inf"), False
+    for iterations in range(1, max_iterations + 1):
+        for margin, groups, target in zip(margins, cell_groups, targets_by_margin):
+            answered = groups >= 0
+            weighted = cell_base * factor
+            totals = np.bincount(groups[answered], weights=weighted[answered], minlength=len(target))
+            desired = target * totals.sum()
+            adjust = np.divide(desired, totals, out=np.ones_like(totals), where=totals > 0)
+            factor[answered] *= adjust[groups[answered]]
+        if cap is not None:
+            # Rows of a cell share one base value, so a row's weight is that times the factor.
+            # Trimming lowers the mean, so repeat until the cap holds against the new mean.
+            per_row = np.divide(cell_rows, cell_base, out=np.full(len(factor), np.inf), where=cell_base > 0)
+            for _ in range(20):
+                limit = cap * (cell_base * factor).sum() / frame.rows * per_row
+                if (factor <= limit * (1 + tolerance)).all():
+                    break
+                factor = np.minimum(factor, limit)
+        max_error = 0.0
+        weighted = cell_base * factor
+        for groups, target in zip(cell_groups, targets_by_margin):
+            answered = groups >= 0
+            totals = np.bincount(groups[answered], weights=weighted[answered], minlength=len(target))
+            if totals.sum() > 0:
+                max_error = max(max_error, float(np.abs(totals / totals.sum() - target).max()))
+        if max_error <= tolerance:
+            converged = True
+            break
+
+    weights = factor[inverse] * (base if base is not None else 1.0)
+    weights *= frame.rows / weights.sum()
+    return RakeResult(weights, iterations, converged, max_error, tuple(margins), tuple(unreached))
+
+
+# ---------- cached, attached to frames ----------
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def targets_digest(targets, cap=None):
+    """Stable fingerprint of a target set (and trimming cap)."""
+    text = json.dumps({"targets": targets, "cap": cap}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def rake_frame(frame, targets, name="raked", cap=None):
+    """Rake ``frame`` (cached per frame version and targets) and attach the weights as ``name``."""
+    key = (frame.survey.name, frame.version, targets_digest(targets, cap))
+    with _cache_lock:
+        result = _cache.get(key)
+        if result is not None:
+            _cache.move_to_end(key)
+    if result is None or len(result.weights) != frame.rows:
+        result = rake(frame, targets, cap=cap)
+        with _cache_lock:
+            _cache[key] = result
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    if frame.weights.get(name) is not result.weights:
+        frame.add_weights(name, result.weights)
+    return result
+
+
+def margin_report(frame, result):
+    """Rows of ``(column, group, sample share, target, weighted share)``."""
+    def shares(groups, size, weights=None):
+        totals = np.bincount(groups, weights=weights, minlength=size)
+        return totals / totals.sum() if totals.sum() else totals
+
+    lines = []
+    for margin in result.margins:
+        codes = frame.codes[margin.column]
+        answered = codes >= 0
+        groups = margin.group_of[codes[answered]]
+        size = len(margin.groups)
+        sample = shares(groups, size)
+        weighted = shares(groups, size, result.weights[answered])
+        for g, group in enumerate(margin.groups):
+            lines.append((margin.column, group, float(sample[g]), float(margin.shares[g]),
+                          float(weighted[g])))
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute raking weights against target shares.")
+    parser.add_argument("survey", choices=SURVEYS)
+    parser.add_argument("targets", help='JSON file: {"column": {"answer or prefix": share, ...}, ...}')
+    parser.add_argument("--source", help="response CSV or segment directory "
+                                         "(default: where the survey is stored)")
+    parser.add_argument("--cap", type=float, help="trim weights to at most this multiple of the mean")
+    parser.add_argument("--out", help="weights CSV (default: data/exports/<survey>_weights.csv)")
+    args = parser.parse_args(argv)
+
+    with open(args.targets, encoding="utf-8") as f:
+        targets = json.load(f)
+    survey = load_survey(args.survey)
+    frame = load_frame(survey, args.source)
+    try:
+        result = rake(frame, targets, cap=args.cap)
+    except ValueError as exc:
+        parser.exit(2, f"{exc}\n")
+
+    out = args.out or os.path.join(EXPORT_DIR, f"{survey.name}_weights.csv")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    tmp_path = out + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("row", "weight"))
+        writer.writerows(enumerate(np.round(result.weights, 6).tolist()))
+    os.replace(tmp_path, out)
+
+    status = "converged" if result.converged else "did NOT converge"
+    print(f"{frame.rows} rows, {status} after {result.iterations} iteration(s), "
+          f"max error {result.max_error:.2e}")
+    if frame.rows:
+        print(f"effective n {result.effective_n:.0f}, design effect {result.design_effect:.2f}, "
+              f"weights {result.weights.min():.3f}-{result.weights.max():.3f}")
+    for column, group in result.unreached:
+        print(f"  unreached: {column} = {group} (no respondents)")
+    for column, group, sample, target, weighted in margin_report(frame, result):
+        print(f"  {column:<12} {group[:40]:<40} sample {sample:6.1%}  target {target:6.1%}  "
+              f"weighted {weighted:6.1%}")
+    print(f"Wrote weights to {out}")
+    return 0 if result.converged else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
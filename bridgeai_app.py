@@ -0,0 +1,43 @@
+# --------------------------------------------------------
+# 🍁 BridgeAI – every survey in one app
+# Streamlit entry point: streamlit run bridgeai_app.py
+# --------------------------------------------------------
+"""One Streamlit server for every audience.
+
+The survey apps are also pages of this app: the newcomer survey, the
+business survey, the quick check-in (once its survey is published) and the
+assistant. Pages run in the
+same process, so they share what lives at module level: the parsed
+surveys (``load_survey``), the batched writers (``get_sink``), the contacts
+queue, the screening filters and the metrics registry. A single
+interpreter and Streamlit runtime replaces one server per survey. Each
+page script still runs on its own with ``streamlit run <page>.py``.
+
+The results dashboard is not a page here; it stays an internal app.
+"""
+
+import streamlit as st
+
+from bridgeai.schema import SURVEYS, load_survey
+
+# Parse and validate every survey once at startup instead of on the first
+# visit to each page.
+for name in SURVEYS:
+    load_survey(name)
+
+SURVEY_PAGES = {
+    "customer": st.Page("bridgeai_chat.py", title="Newcomer survey", icon="🇨🇦", url_path="newcomer",
+                        default=True),
+    "business": st.Page("bridgeai_business_chat.py", title="Business survey", icon="🏢",
+                        url_path="business"),
+    "quick": st.Page("bridgeai_quick.py", title="Quick check-in", icon="🍁", url_path="quick"),
+}
+
+PAGES = {
+    "Surveys": [page for name, page in SURVEY_PAGES.items() if load_survey(name).published],
+    "Help": [
+        st.Page("bridgeai_assistant.py", title="Ask a question", icon="💬", url_path="assistant"),
+    ],
+}
+
+st.navigation(PAGES).run()
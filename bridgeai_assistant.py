@@ -0,0 +1,102 @@
+# --------------------------------------------------------
+# 💬 Newcomer assistant
+# Streamlit entry point: streamlit run bridgeai_assistant.py
+# --------------------------------------------------------
+
+import time
+
+import streamlit as st
+
+from bridgeai.instrument import rerun_timer
+from bridgeai.knowledge import SNIPPETS
+from bridgeai.retrieval import SNIPPET, RetrievalIndex, current_index, ensure_index, refresh_in_background
+
+# ---------- PAGE CONFIG ----------
+st.set_page_config(page_title="YourFirstYear Assistant", page_icon="💬", layout="centered")
+
+SNIPPETS_BY_KEY = {s.key: s for s in SNIPPETS}
+MIN_SNIPPET_SCORE = 0.08  # below this the question is not covered by the knowledge base
+
+SUGGESTIONS = (
+    "How do I get a SIN?",
+    "When can I apply for a health card?",
+    "How do I find an apartment without credit history?",
+)
+
+
+@st.cache_resource(max_entries=1)
+def load_index(path):
+    """The memory-mapped index of the current build, shared by every session.
+
+    Only the latest build is cached; loading a new one drops the old maps.
+    """
+    return RetrievalIndex(path)
+
+
+def open_index():
+    """Load the current build, following ``CURRENT`` again if the build just went away."""
+    for _ in range(3):
+        path = current_index()
+        if path is None:
+            with st.spinner("Preparing the knowledge base…"):
+                path = ensure_index()
+        try:
+            return load_index(path)
+        except FileNotFoundError:  # another process replaced and removed it meanwhile
+            continue
+    return load_index(ensure_index())
+
+
+def reply(index, question):
+    """Markdown answer from the best matching snippets of the knowledge base."""
+    parts = []
+    snippets = index.search(question, k=2, kind=SNIPPET, min_score=MIN_SNIPPET_SCORE)
+    if snippets:
+        best = SNIPPETS_BY_KEY[snippets[0].ref]
+        parts.append(f"**{best.title}**\n\n{best.text}")
+        if best.link:
+            parts.append(f"Official source: {best.link}")
+        if len(snippets) > 1:
+            parts.append(f"_See also: {SNIPPETS_BY_KEY[snippets[1].ref].title}_")
+    else:
+        parts.append("I don't have a prepared answer for that yet. A local settlement agency "
+                     "can help: https://ircc.canada.ca/english/newcomers/services/index.asp")
+    return "\n\n".join(parts)
+
+
+# ---------- SIDEBAR ----------
+with st.sidebar:
+    st.markdown("## 💬 Assistant")
+    st.info("Answers come from our newcomer guides. "
+            "Everything runs on this server; your questions are not stored.")
+    if st.button("🧹 Clear chat"):
+        st.session_state.pop("assistant_messages", None)
+
+with rerun_timer("assistant").measure():
+    st.title("💬 Ask about your first year in Canada")
+    st.caption("SIN, health card, banking, housing, transit, jobs and more.")
+
+    index = open_index()
+    # Knowledge base updates are picked up by a background rebuild; keep serving this one.
+    refresh_in_background()
+
+    messages = st.session_state.setdefault("assistant_messages", [])
+    for message in messages:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+
+    if not messages:
+        st.markdown("Try: " + " · ".join(f"_{s}_" for s in SUGGESTIONS))
+
+    question = st.chat_input("Ask a question")
+    if question:
+        messages.append({"role": "user", "content": question})
+        with st.chat_message("user"):
+            st.markdown(question)
+        started = time.perf_counter()
+        answer = reply(index, question)
+        elapsed = (time.perf_counter() - started) * 1000
+        messages.append({"role": "assistant", "content": answer})
+        with st.chat_message("assistant"):
+            st.markdown(answer)
+            st.caption(f"{len(index):,} documents searched in {elapsed:.0f} ms")
@@ -0,0 +1,164 @@
+# --------------------------------------------------------
+# 📈 Survey results dashboard
+# Streamlit entry point: streamlit run bridgeai_dashboard.py
+# --------------------------------------------------------
+
+import pandas as pd
+import streamlit as st
+
+from bridgeai.aggregate import IncrementalAggregator
+from bridgeai.analytics import load_frame
+from bridgeai.events import FunnelAggregator
+from bridgeai.schema import CATEGORY, INTEGER, MULTI, load_survey
+
+# ---------- PAGE CONFIG ----------
+st.set_page_config(page_title="Survey Results", page_icon="📈", layout="wide")
+
+# Q4-Q9 of the quick check-in: ready_<topic> sliders
+READINESS_TOPICS = ("housing", "banking", "healthcare", "jobs", "transit", "paperwork")
+
+# Pairs tallied jointly, per survey: (rows, columns)
+CROSSTABS = {
+    "customer": [("city", "overall_experience"), ("city", "overwhelm_score")],
+    "business": [
+        ("industry", "payment_model"),
+        ("payment_model", "q14_lead"),
+        ("payment_model", "q14_customer"),
+        ("payment_model", "q14_commission"),
+    ],
+    "quick": [("arrival_stage", f"ready_{topic}") for topic in READINESS_TOPICS],
+}
+
+# Default pivot in the explorer, per survey
+EXPLORE = {
+    "customer": ("city", "overall_experience"),
+    "business": ("payment_model", "q14_lead"),
+    "quick": ("category", "arrival_stage"),
+}
+
+
+@st.cache_resource
+def get_aggregator(name):
+    """One aggregator per survey, shared by every dashboard session."""
+    survey = load_survey(name)
+    return IncrementalAggregator(survey, crosstabs=CROSSTABS.get(name, ()))
+
+
+@st.cache_resource
+def get_funnel(name):
+    """One drop-off funnel per survey, read incrementally from the event logs."""
+    return FunnelAggregator(load_survey(name))
+
+
+def bar(counts, label):
+    frame = pd.DataFrame({"responses": list(counts.values())}, index=list(counts.keys()))
+    frame.index.name = label
+    st.bar_chart(frame)
+
+
+def table(nested, row_label):
+    frame = pd.DataFrame(nested).T.fillna(0).astype(int)
+    frame.index.name = row_label
+    st.dataframe(frame)
+
+
+def shares(frame):
+    st.dataframe(frame.dropna(how="all").style.format("{:.0%}"))
+
+
+# ---------- SIDEBAR ----------
+with st.sidebar:
+    st.markdown("## Results")
+    # Unpublished surveys have no confirmed question wording to report under
+    name = st.radio("Survey", [n for n in ("customer", "business", "quick") if load_survey(n).published],
+                    format_func={"customer": "Newcomer survey", "business": "Business survey",
+                                 "quick": "Quick check-in"}.get)
+    st.button("🔄 Refresh")  # any interaction reruns the script and picks up new rows
+
+survey = load_survey(name)
+agg = get_aggregator(name)
+agg.refresh()
+
+st.title("📈 Survey Results")
+col1, col2 = st.columns(2)
+col1.metric("Responses", agg.rows, delta=agg.last_new_rows or None)
+col2.metric("Bytes read", f"{agg.offset:,}")
+
+if not agg.rows:
+    st.info(f"No responses yet in `{agg.path}`.")
+    st.stop()
+
+# ---------- HIGHLIGHTS ----------
+if name == "customer":
+    st.header("Highlights")
+    left, right = st.columns(2)
+    with left:
+        st.subheader("Q16 · How overwhelming was the first month?")
+        bar(agg.distribution("overwhelm_score"), "score")
+    with right:
+        st.subheader("Q24 · Average first-year score by city")
+        means = agg.mean_by("city", "overall_experience")
+        if means:
+            bar(dict(sorted(means.items(), key=lambda kv: -kv[1])), "city")
+elif name == "quick":
+    st.header("Highlights")
+    st.subheader("Q4–Q9 · Average readiness (1–5) by stage of the move")
+    readiness = {topic: agg.mean_by("arrival_stage", f"ready_{topic}") for topic in READINESS_TOPICS}
+    st.dataframe(pd.DataFrame(readiness).rename_axis("arrival_stage").style.format("{:.1f}"))
+else:
+    st.header("Highlights")
+    st.subheader("Q13 · Preferred payment model by industry")
+    table(agg.crosstab("industry", "payment_model"), "industry")
+    st.subheader("Q14 · Willingness to pay, by preferred payment model")
+    for column, title in [("q14_lead", "Pay-per-lead"), ("q14_customer", "Pay-per-customer"),
+                          ("q14_commission", "Commission")]:
+        st.markdown(f"**{title}**")
+        table(agg.crosstab("payment_model", column), "payment_model")
+
+    coded = load_frame(survey)
+    st.subheader("Q15 · Referrals per month needed, by company size")
+    shares(coded.share("referral_volume", by="company_size"))
+    st.subheader("Q7 · Cost to acquire one immigrant customer, by industry")
+    shares(coded.share("cac_cost", by="industry"))
+    band = st.selectbox("Confidence interval for", survey.question_for("cac_cost").options)
+    st.dataframe(coded.bootstrap_ci("cac_cost", band, by="industry").dropna()
+                 .style.format({"share": "{:.0%}", "low": "{:.0%}", "high": "{:.0%}"}))
+
+# ---------- DROP-OFF ----------
+funnel = get_funnel(name)
+funnel.refresh()
+if funnel.sessions:
+    st.header("Drop-off")
+    steps = pd.DataFrame(funnel.funnel(), columns=["step", "sessions", "share", "seconds"]).set_index("step")
+    st.dataframe(steps.style.format({"share": "{:.0%}", "seconds": "{:.0f}"}, na_rep=""))
+    st.caption(f"{len(funnel.sessions):,} sessions opened the form; {funnel.stopped:,} took the "
+               "screening question's stop branch. Seconds is the mean time spent on a section.")
+    if funnel.changes:
+        st.subheader("Most changed answers")
+        bar(dict(funnel.changes.most_common(10)), "question")
+
+# ---------- EXPLORE ----------
+st.header("Explore")
+coded = load_frame(survey)
+labels = {column: survey.question_for(column).label for column in coded.columns}
+default_row, default_col = EXPLORE[name]
+pick_row, pick_col, pick_mode = st.columns(3)
+row = pick_row.selectbox("Rows", coded.columns, index=coded.columns.index(default_row),
+                         format_func=labels.get)
+col = pick_col.selectbox("Columns", coded.columns, index=coded.columns.index(default_col),
+                         format_func=labels.get)
+as_shares = pick_mode.toggle("Shares within each row", value=True)
+if as_shares:
+    shares(coded.crosstab(row, col, normalize="index"))
+else:
+    st.dataframe(coded.crosstab(row, col).astype(int))
+
+# ---------- EVERY QUESTION ----------
+st.header("All questions")
+for question in survey.stored_questions:
+    if survey.types[question.column] not in (CATEGORY, MULTI, INTEGER):
+        continue
+    with st.expander(question.intro or question.label):
+        if survey.types[question.column] == MULTI:
+            st.caption("Multi-select: each selected option counts once.")
+        bar(agg.distribution(question.column), question.column)
@@ -0,0 +1,39 @@
+# --------------------------------------------------------
+# 🍁 Quick Newcomer Check-in
+# Streamlit entry point: streamlit run bridgeai_quick.py
+# --------------------------------------------------------
+
+import streamlit as st
+
+from bridgeai.form import (
+    paged_mode, render_page, render_paged, render_survey, set_page_config, submit_response,
+)
+from bridgeai.instrument import rerun_timer
+from bridgeai.metrics import timed
+from bridgeai.schema import load_survey
+
+# ---------- Survey definition (bridgeai/surveys/quick.py) ----------
+SURVEY = load_survey("quick")
+
+set_page_config(SURVEY)
+
+if not SURVEY.published:  # see bridgeai/surveys/quick.py
+    st.info("The quick check-in is not open yet.")
+    st.stop()
+
+with rerun_timer("quick").measure():
+    render_page(SURVEY)
+
+    # ---------- Form ----------
+    with timed("quick", "render"):
+        if paged_mode():
+            # One section per page; answers persist in session state until the end.
+            answers, submitted = render_paged(SURVEY, "Send ✅")
+        else:
+            with st.form(key="quick_checkin"):
+                answers = render_survey(SURVEY)
+                submitted = st.form_submit_button("Send ✅")
+
+    if submitted and submit_response(SURVEY, answers):
+        with timed("quick", "feedback"):
+            st.success("🙏 Thanks! Your check-in was saved.")